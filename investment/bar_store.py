@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+本地K线缓存 - Local OHLCV Bar Store
+基于 SQLite 的K线存储，按 (symbol, period) 索引，支持增量刷新
+
+TechnicalAnalyzer 和 RiskAnalyzer 共用同一个缓存文件：
+- 首次请求时全量下载并写入本地
+- 之后只下载上次存储时间戳之后缺失的K线，合并后从本地切片返回
+- 在 max_age 内重复请求直接读本地，不访问网络
+
+数据源返回的是复权价 (LongPort 前复权、Yahoo auto_adjust)，除权或拆股后整段历史都会变化。
+增量刷新时会重新下载倒数第二根 (已收盘) K线作为锚点，收盘价与本地不一致时丢弃该标的的缓存并全量重新下载；
+日线缺失数量按自然日估算 (加密货币周末也交易)，增量K线仍未接上本地历史时同样全量重新下载。
+全量下载返回的K线少于请求数量时 (如新上市标的) 记录数据源的最早K线，之后不再因历史不足而反复全量下载。
+
+用法:
+    python bar_store.py --stats
+    python bar_store.py --show MSFT --period 1d --count 10
+    python bar_store.py --clear MSFT
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+# 默认缓存文件位置
+DEFAULT_BAR_STORE = Path(__file__).parent / 'data' / 'bar_cache.sqlite'
+
+# 各周期的K线时长 (秒)，用于估算缺失K线数量
+PERIOD_SECONDS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600,
+    '60m': 3600,
+    '4h': 4 * 3600,
+    '1d': 86400,
+    '1w': 7 * 86400,
+    '1wk': 7 * 86400,
+    '1M': 30 * 86400,
+    '1mo': 30 * 86400,
+}
+
+# 增量刷新时锚点K线收盘价的最大相对偏差，超过视为复权价变化 (除权/拆股)
+ADJUSTMENT_TOLERANCE = 1e-4
+
+# 获取函数签名: fetcher(count, since) -> DataFrame(date, open, high, low, close, volume)
+Fetcher = Callable[[int, Optional[pd.Timestamp]], pd.DataFrame]
+
+# 批量获取函数签名: fetcher({symbol: (count, since)}) -> {symbol: DataFrame}
+BatchFetcher = Callable[[Dict[str, Tuple[int, Optional[pd.Timestamp]]]], Dict[str, pd.DataFrame]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    period TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (symbol, period, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS refresh_log (
+    symbol TEXT NOT NULL,
+    period TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (symbol, period)
+);
+
+CREATE TABLE IF NOT EXISTS history_start (
+    symbol TEXT NOT NULL,
+    period TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    requested INTEGER NOT NULL,
+    PRIMARY KEY (symbol, period)
+);
+"""
+
+_EPOCH = pd.Timestamp(0)
+
+
+def _to_epoch_seconds(dates: pd.Series) -> np.ndarray:
+    """日期列 -> 整数秒时间戳 (带时区的日期先转为本地无时区时间)"""
+    dates = pd.to_datetime(dates)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return ((dates - _EPOCH) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+
+
+class BarStore:
+    """SQLite K线缓存"""
+
+    def __init__(self, path: Optional[str] = None, max_age: float = 3600):
+        """
+        Args:
+            path: SQLite 文件路径 (默认 investment/data/bar_cache.sqlite)
+            max_age: 距上次刷新不超过该秒数时直接读本地，不请求网络
+        """
+        self.path = Path(path) if path else DEFAULT_BAR_STORE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """每次操作使用独立连接，可在线程池中安全使用"""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def last_timestamp(self, symbol: str, period: str = "1d") -> Optional[pd.Timestamp]:
+        """最后一根已存储K线的时间"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM bars WHERE symbol = ? AND period = ?",
+                (symbol, period)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pd.Timestamp(row[0], unit='s')
+
+    def bar_count(self, symbol: str, period: str = "1d") -> int:
+        """已存储的K线数量"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM bars WHERE symbol = ? AND period = ?",
+                (symbol, period)
+            ).fetchone()
+        return int(row[0])
+
+    def last_fetched(self, symbol: str, period: str = "1d") -> Optional[float]:
+        """上次从网络刷新的时间 (unix 秒)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fetched_at FROM refresh_log WHERE symbol = ? AND period = ?",
+                (symbol, period)
+            ).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, symbol: str, period: str, df: pd.DataFrame) -> int:
+        """
+        写入K线，相同时间戳的K线以新数据覆盖 (最后一根未收盘K线会被更新)
+
+        Returns:
+            写入的K线数量
+        """
+        if df is None or df.empty:
+            return 0
+
+        ts = _to_epoch_seconds(df['date'])
+        rows = list(zip(
+            [symbol] * len(df), [period] * len(df), ts.tolist(),
+            df['open'].astype(float).tolist(), df['high'].astype(float).tolist(),
+            df['low'].astype(float).tolist(), df['close'].astype(float).tolist(),
+            df['volume'].astype(float).tolist()
+        ))
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO bars (symbol, period, ts, open, high, low, close, volume) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def mark_fetched(self, symbol: str, period: str = "1d"):
+        """记录刷新时间"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO refresh_log (symbol, period, fetched_at) VALUES (?, ?, ?)",
+                (symbol, period, time.time())
+            )
+
+    def load(self, symbol: str, period: str = "1d", count: Optional[int] = None,
+             start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        从本地读取K线 (按时间升序)
+
+        Args:
+            count: 只返回最近 count 根
+            start/end: 时间范围过滤
+        """
+        query = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol = ? AND period = ?"
+        params = [symbol, period]
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(int(_to_epoch_seconds(pd.Series([start]))[0]))
+        if end is not None:
+            query += " AND ts <= ?"
+            params.append(int(_to_epoch_seconds(pd.Series([end]))[0]))
+        query += " ORDER BY ts DESC"
+        if count is not None:
+            query += " LIMIT ?"
+            params.append(int(count))
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        if not rows:
+            return pd.DataFrame()
+
+        data = np.array(rows[::-1], dtype=np.float64)
+        df = pd.DataFrame({
+            'date': pd.to_datetime(data[:, 0].astype(np.int64), unit='s'),
+            'open': data[:, 1],
+            'high': data[:, 2],
+            'low': data[:, 3],
+            'close': data[:, 4],
+            'volume': data[:, 5].astype(np.int64),
+        })
+        return df
+
+    def missing_bars(self, symbol: str, period: str = "1d") -> Optional[int]:
+        """
+        估算自最后一根K线以来缺失的K线数量 (含最后一根，用于覆盖未收盘K线)
+
+        Returns:
+            None 表示本地无数据，需要全量下载
+        """
+        last = self.last_timestamp(symbol, period)
+        if last is None:
+            return None
+        now = pd.Timestamp(datetime.now())
+        if period == '1d':
+            # 日线按自然日计数: 加密货币 7×24 交易，按工作日会少算周末，
+            # 而 LongPort 忽略起始时间只返回最近 count 根，少算会在缓存中留下缺口；
+            # 股票的周末/节假日多请求的几根无害
+            missing = (now.date() - last.date()).days + 1
+        else:
+            elapsed = (now - last).total_seconds()
+            missing = int(elapsed // PERIOD_SECONDS.get(period, 86400)) + 1
+        return max(missing, 1)
+
+    def _recent_ts(self, symbol: str, period: str, n: int = 2) -> List[int]:
+        """最近 n 根已存储K线的时间戳 (降序)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT ts FROM bars WHERE symbol = ? AND period = ? ORDER BY ts DESC LIMIT ?",
+                (symbol, period, n)
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def history_exhausted(self, symbol: str, period: str, count: int) -> bool:
+        """
+        数据源已没有更早的K线: 此前请求不少于 count 根的全量下载返回不足，
+        且本地已存储到数据源的最早K线
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT h.ts, h.requested, MIN(b.ts) FROM history_start h "
+                "LEFT JOIN bars b ON b.symbol = h.symbol AND b.period = h.period "
+                "WHERE h.symbol = ? AND h.period = ?",
+                (symbol, period)
+            ).fetchone()
+        if row is None or row[0] is None or row[2] is None:
+            return False
+        start, requested, first = row
+        return requested >= count and first <= start
+
+    def _refresh_plan(self, symbol: str, period: str, count: int):
+        """
+        判断是否需要访问网络
+
+        Returns:
+            None 表示本地数据足够新，否则为 (下载K线数, 增量起始时间)，起始时间为 None 表示全量
+        """
+        stored = self.bar_count(symbol, period)
+        last_fetched = self.last_fetched(symbol, period)
+        fresh = last_fetched is not None and time.time() - last_fetched < self.max_age
+        enough = stored >= count or (stored > 0 and self.history_exhausted(symbol, period, count))
+
+        if enough and fresh:
+            return None
+
+        missing = self.missing_bars(symbol, period)
+        if missing is None or not enough:
+            # 本地无数据或窗口比已存储的更长 (且数据源还有更早的K线): 全量下载
+            return count, None
+        # 从倒数第二根 (已收盘) K线开始重新下载，作为检测复权价变化的锚点
+        recent = self._recent_ts(symbol, period)
+        return missing + len(recent) - 1, pd.Timestamp(recent[-1], unit='s')
+
+    def adjustment_changed(self, symbol: str, period: str, df: pd.DataFrame) -> bool:
+        """
+        增量下载的K线与本地已收盘K线 (最后一根之前) 重叠部分的收盘价是否不一致
+
+        复权价随除权/拆股整体变化，不一致说明本地历史已失效
+        """
+        recent = self._recent_ts(symbol, period, 1)
+        if not recent:
+            return False
+        ts = _to_epoch_seconds(df['date'])
+        closed = ts < recent[0]
+        if not closed.any():
+            return False
+        with self._connect() as conn:
+            stored = dict(conn.execute(
+                "SELECT ts, close FROM bars WHERE symbol = ? AND period = ? AND ts >= ? AND ts < ?",
+                (symbol, period, int(ts[closed].min()), recent[0])
+            ).fetchall())
+        for t, close in zip(ts[closed].tolist(), df['close'].to_numpy(dtype=np.float64)[closed]):
+            old = stored.get(t)
+            if old and abs(close / old - 1.0) > ADJUSTMENT_TOLERANCE:
+                return True
+        return False
+
+    def incremental_gap(self, symbol: str, period: str, df: pd.DataFrame) -> bool:
+        """增量下载的最早K线晚于本地最后一根: 中间的K线没有取到，直接拼接会在缓存中留下缺口"""
+        recent = self._recent_ts(symbol, period, 1)
+        return bool(recent) and int(_to_epoch_seconds(df['date']).min()) > recent[0]
+
+    def _drop(self, symbol: str, period: str):
+        """删除单个 (symbol, period) 的全部K线与刷新记录"""
+        with self._lock, self._connect() as conn:
+            for table in ('bars', 'refresh_log', 'history_start'):
+                conn.execute(f"DELETE FROM {table} WHERE symbol = ? AND period = ?", (symbol, period))
+
+    def _reset(self, symbol: str, period: str, count: int, reason: str) -> Tuple[int, None]:
+        """本地历史失效: 丢弃本地缓存，返回全量下载计划"""
+        print(f"🔄 {symbol} {reason}，重新全量下载 {period} K线")
+        self._drop(symbol, period)
+        return count, None
+
+    def _store(self, symbol: str, period: str, df: Optional[pd.DataFrame],
+               plan: Tuple[int, Optional[pd.Timestamp]]) -> Optional[str]:
+        """
+        写入下载结果
+
+        Returns:
+            None 表示已写入；否则为本地历史失效的原因 (增量数据与本地复权价不一致，
+            或没有接上本地最后一根K线)，需要全量重新下载 (此时不写入)
+        """
+        if df is None or df.empty:
+            return None
+        count, since = plan
+        if since is not None:
+            if self.incremental_gap(symbol, period, df):
+                return "增量K线未接上本地历史"
+            if self.adjustment_changed(symbol, period, df):
+                return "复权价格已变化 (除权/拆股)"
+        self.upsert(symbol, period, df)
+        if since is None and len(df) < count:
+            # 数据源的历史比请求的短: 记录最早K线
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO history_start (symbol, period, ts, requested) VALUES (?, ?, ?, ?)",
+                    (symbol, period, int(_to_epoch_seconds(df['date']).min()), int(count))
+                )
+        self.mark_fetched(symbol, period)
+        return None
+
+    def get_bars(self, symbol: str, period: str, count: int, fetcher: Fetcher) -> pd.DataFrame:
+        """
+        获取最近 count 根K线，仅从网络下载缺失部分
+
+        Args:
+            symbol: 股票代码
+            period: K线周期
+            count: 需要的K线数量
+            fetcher: 网络获取函数 fetcher(count, since)，since 为 None 时全量下载
+        """
+        plan = self._refresh_plan(symbol, period, count)
+        reason = self._store(symbol, period, fetcher(*plan), plan) if plan is not None else None
+        if reason:
+            plan = self._reset(symbol, period, count, reason)
+            self._store(symbol, period, fetcher(*plan), plan)
+        return self.load(symbol, period, count)
+
+    def get_bars_many(self, symbols: List[str], period: str, count: int,
+                      fetcher: BatchFetcher) -> Dict[str, pd.DataFrame]:
+        """
+        批量版 get_bars: 汇总所有需要刷新的标的，只调用一次 fetcher
+
+        Args:
+            fetcher: 批量获取函数 fetcher({symbol: (count, since)}) -> {symbol: DataFrame}
+        """
+        requests = {}
+        for symbol in symbols:
+            plan = self._refresh_plan(symbol, period, count)
+            if plan is not None:
+                requests[symbol] = plan
+
+        if requests:
+            readjust = {}
+            for symbol, df in fetcher(requests).items():
+                reason = self._store(symbol, period, df, requests[symbol])
+                if reason:
+                    readjust[symbol] = self._reset(symbol, period, count, reason)
+            if readjust:
+                for symbol, df in fetcher(readjust).items():
+                    self._store(symbol, period, df, readjust[symbol])
+
+        return {symbol: self.load(symbol, period, count) for symbol in symbols}
+
+    def clear(self, symbol: Optional[str] = None):
+        """清除缓存 (不指定 symbol 时清空全部)"""
+        with self._lock, self._connect() as conn:
+            if symbol:
+                for table in ('bars', 'refresh_log', 'history_start'):
+                    conn.execute(f"DELETE FROM {table} WHERE symbol = ?", (symbol,))
+            else:
+                for table in ('bars', 'refresh_log', 'history_start'):
+                    conn.execute(f"DELETE FROM {table}")
+
+    def stats(self) -> Dict:
+        """缓存统计"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT symbol, period, COUNT(*), MIN(ts), MAX(ts) FROM bars "
+                "GROUP BY symbol, period ORDER BY symbol, period"
+            ).fetchall()
+        return {
+            f"{symbol}:{period}": {
+                'bars': n,
+                'first': pd.Timestamp(first, unit='s').strftime('%Y-%m-%d %H:%M'),
+                'last': pd.Timestamp(last, unit='s').strftime('%Y-%m-%d %H:%M'),
+            }
+            for symbol, period, n, first, last in rows
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地K线缓存管理')
+    parser.add_argument('--path', help='缓存文件路径 (默认 investment/data/bar_cache.sqlite)')
+    parser.add_argument('--stats', action='store_true', help='显示缓存统计')
+    parser.add_argument('--show', metavar='SYMBOL', help='显示指定标的的缓存K线')
+    parser.add_argument('--period', default='1d', help='K线周期 (默认: 1d)')
+    parser.add_argument('--count', type=int, default=10, help='显示K线数量 (默认: 10)')
+    parser.add_argument('--clear', nargs='?', const='', metavar='SYMBOL',
+                        help='清除缓存 (不指定标的时清空全部)')
+
+    args = parser.parse_args()
+    store = BarStore(args.path)
+
+    if args.clear is not None:
+        store.clear(args.clear or None)
+        print(f"🗑️  已清除缓存: {args.clear or '全部'}")
+    elif args.show:
+        df = store.load(args.show, args.period, args.count)
+        print(df.to_string(index=False) if not df.empty else f"⚠️  {args.show} 无缓存数据")
+    elif args.stats:
+        stats = store.stats()
+        print(f"📦 缓存文件: {store.path}")
+        for key, info in stats.items():
+            print(f"   {key:<20} {info['bars']:>6} 根  {info['first']} ~ {info['last']}")
+        if not stats:
+            print("   (空)")
+    else:
+        parser.print_help()
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
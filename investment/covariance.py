@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+协方差估计 - Covariance Estimators
+样本协方差在标的数接近或超过样本天数时噪声很大 (甚至不可逆)，提供更稳健的估计:
+
+- sample:      样本协方差 (ddof=1)
+- ledoit_wolf: Ledoit-Wolf 收缩，向 μ·I 收缩，收缩强度按解析公式估计
+- ewma:        RiskMetrics 指数加权 (λ=0.94，零均值)，近期波动权重更高
+- pca:         PCA 因子模型 Σ = B·B' + diag(特质方差)，前 k 个主成分作为因子
+
+每种估计都是对收益率矩阵的一次矩阵运算 (X'X / SVD)，没有逐对标的的循环；
+结果按 (标的集合, 窗口, 截止日期, 收益率内容摘要, 方法, 参数) 缓存，同一进程内重复请求直接返回；
+键中包含内容摘要，盘中刷新只改动最后一根K线 (日期与长度不变) 时也会重新计算。
+
+用法:
+    cov = estimate(returns, 'ledoit_wolf')
+    cov = cached_estimate(panel.symbols, panel.returns, as_of='2026-02-19', method='ewma', window=126)
+    corr = to_correlation(cov)
+"""
+
+import sys
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+from result_cache import digest_array
+
+METHODS = ['sample', 'ledoit_wolf', 'ewma', 'pca']
+
+# RiskMetrics 日度衰减因子
+EWMA_LAMBDA = 0.94
+
+# PCA 默认因子数
+DEFAULT_FACTORS = 5
+
+
+def _complete_rows(returns: np.ndarray) -> np.ndarray:
+    """只保留所有标的都有收益率的日期"""
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.ndim == 1:
+        returns = returns[:, None]
+    return returns[~np.isnan(returns).any(axis=1)]
+
+
+def sample_cov(returns: np.ndarray) -> np.ndarray:
+    """样本协方差 (ddof=1)"""
+    x = returns - returns.mean(axis=0)
+    return x.T @ x / (len(x) - 1)
+
+
+def ledoit_wolf(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Ledoit-Wolf 收缩估计 (Ledoit & Wolf 2004, 目标为 μ·I)
+
+    Returns:
+        (协方差, 收缩强度 δ)
+    """
+    x = returns - returns.mean(axis=0)
+    t, n = x.shape
+    s = x.T @ x / t
+    mu = np.trace(s) / n
+    target_dist = np.sum((s - mu * np.eye(n)) ** 2)
+    if target_dist <= 0:
+        return s, 0.0
+    # Σ_t |x_t x_t' - S|² = Σ_t |x_t|⁴ - T·|S|²
+    row_norms = np.einsum('ij,ij->i', x, x)
+    b2 = (np.sum(row_norms ** 2) / t - np.sum(s ** 2)) / t
+    delta = float(min(max(b2, 0.0), target_dist) / target_dist)
+    return delta * mu * np.eye(n) + (1.0 - delta) * s, delta
+
+
+def ewma_cov(returns: np.ndarray, lam: float = EWMA_LAMBDA) -> np.ndarray:
+    """RiskMetrics EWMA 协方差 (零均值，权重归一化)"""
+    t = len(returns)
+    weights = (1.0 - lam) * lam ** np.arange(t - 1, -1, -1, dtype=np.float64)
+    weights /= weights.sum()
+    return (returns * weights[:, None]).T @ returns
+
+
+def pca_cov(returns: np.ndarray, n_factors: int = DEFAULT_FACTORS) -> Tuple[np.ndarray, float]:
+    """
+    PCA 因子模型协方差
+
+    对去均值的收益率矩阵做一次 SVD (T×N，标的数多于天数时同样适用)，
+    前 k 个主成分构成因子暴露 B，剩余部分只保留对角线 (特质方差)
+
+    Returns:
+        (协方差, 因子解释的方差占比)
+    """
+    x = returns - returns.mean(axis=0)
+    t, n = x.shape
+    _, sv, vt = np.linalg.svd(x, full_matrices=False)
+    k = max(1, min(n_factors, len(sv)))
+    eigvals = sv ** 2 / (t - 1)
+    loadings = vt[:k].T * np.sqrt(eigvals[:k])
+    factor = loadings @ loadings.T
+    total_var = np.einsum('ij,ij->j', x, x) / (t - 1)
+    specific = np.maximum(total_var - np.diag(factor), 0.0)
+    explained = float(eigvals[:k].sum() / eigvals.sum()) if eigvals.sum() > 0 else 0.0
+    return factor + np.diag(specific), explained
+
+
+def estimate(returns: np.ndarray, method: str = 'sample', lam: float = EWMA_LAMBDA,
+             n_factors: int = DEFAULT_FACTORS) -> np.ndarray:
+    """
+    估计日收益率协方差
+
+    Args:
+        returns: 日收益率矩阵 (T, N)，含缺失值的日期会被跳过
+        method: 'sample' / 'ledoit_wolf' / 'ewma' / 'pca'
+        lam: EWMA 衰减因子
+        n_factors: PCA 因子数
+    """
+    if method not in METHODS:
+        raise ValueError(f"method 必须是 {METHODS} 之一")
+    x = _complete_rows(returns)
+    if len(x) < 2:
+        raise ValueError("有效收益率样本不足")
+    if method == 'sample':
+        return sample_cov(x)
+    if method == 'ledoit_wolf':
+        return ledoit_wolf(x)[0]
+    if method == 'ewma':
+        return ewma_cov(x, lam)
+    return pca_cov(x, n_factors)[0]
+
+
+def to_correlation(cov: np.ndarray) -> np.ndarray:
+    """协方差转相关系数 (零方差的标的相关系数为 NaN)"""
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+    return corr
+
+
+class CovarianceCache:
+    """按 (标的集合, 窗口, 截止日期, 方法, 参数) 缓存的 LRU"""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._items: 'OrderedDict[Hashable, np.ndarray]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        if key in self._items:
+            self._items.move_to_end(key)
+            self.hits += 1
+            return self._items[key]
+        self.misses += 1
+        value = compute()
+        value.setflags(write=False)  # 共享结果，防止调用方原地修改
+        self._items[key] = value
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'size': len(self._items), 'hits': self.hits, 'misses': self.misses}
+
+
+_default_cache: Optional[CovarianceCache] = None
+
+
+def get_cache() -> CovarianceCache:
+    """进程内共享的协方差缓存"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CovarianceCache()
+    return _default_cache
+
+
+def cached_estimate(symbols: Sequence[str], returns: np.ndarray, as_of, method: str = 'sample',
+                    window: Optional[int] = None, cache: Optional[CovarianceCache] = None,
+                    **params) -> np.ndarray:
+    """
+    带缓存的协方差估计
+
+    Args:
+        symbols: 与 returns 列对应的标的
+        returns: 日收益率矩阵 (T, N)
+        as_of: 截止日期 (最后一行收益率的日期)
+        window: 只使用最近 window 天 (None 表示全部)
+        cache: 缓存实例 (默认进程内共享缓存)
+        params: 传给 estimate 的参数 (lam / n_factors)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if window is not None:
+        returns = returns[-window:]
+    as_of = as_of.strftime('%Y-%m-%d') if hasattr(as_of, 'strftime') else str(as_of)
+    key = (tuple(symbols), len(returns), as_of, digest_array(returns), method,
+           tuple(sorted(params.items())))
+    cache = cache or get_cache()
+    return cache.get_or_compute(key, lambda: estimate(returns, method, **params))
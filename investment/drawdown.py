@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+回撤分析 - Drawdown Analytics
+一次向量化扫描得到回撤序列、最大回撤、最长水下天数、平均回撤和完整的回撤区间表，
+供 investment/portfolio_risk.py 与 skills 下的风险脚本共用 (risk_metrics 的回撤指标也来自本模块)
+
+回撤区间 (episode): 从前高 (peak) 开始跌破，经过谷底 (trough)，到重新站上前高 (recovery) 结束；
+数据末尾仍未收复的区间 recovery 为 None
+
+用法:
+    result = analyze_drawdowns(prices, dates)
+    result.max_drawdown, result.max_duration
+    max_dd, duration, avg_dd = drawdown_stats(price_matrix)   # (T, N) 按列计算
+    for ep in result.worst(5): print(ep.to_dict())
+"""
+
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+
+@dataclass
+class DrawdownEpisode:
+    """单个回撤区间 (索引为价格序列中的位置，日期在提供 dates 时填充)"""
+    peak_index: int
+    trough_index: int
+    recovery_index: Optional[int]  # 未收复为 None
+    depth: float  # 回撤深度 (负值)
+    length: int  # 前高到收复 (未收复时到最后一根) 的K线数
+    peak_to_trough: int  # 前高到谷底的K线数
+    time_to_recover: Optional[int]  # 谷底到收复的K线数，未收复为 None
+    peak_date: Optional[str] = None
+    trough_date: Optional[str] = None
+    recovery_date: Optional[str] = None
+
+    @property
+    def recovered(self) -> bool:
+        return self.recovery_index is not None
+
+    def to_dict(self) -> Dict:
+        d = asdict(self)
+        d['depth'] = round(self.depth, 4)
+        return d
+
+
+@dataclass
+class DrawdownAnalysis:
+    """回撤分析结果"""
+    drawdown: np.ndarray  # 每根K线相对前高的回撤 (<= 0)
+    max_drawdown: float  # 最大回撤 (负值)
+    max_duration: int  # 最长连续水下K线数
+    avg_drawdown: float  # 水下K线的平均回撤
+    episodes: List[DrawdownEpisode]  # 按时间顺序
+
+    def worst(self, n: int = 5) -> List[DrawdownEpisode]:
+        """最深的 n 个回撤区间"""
+        return sorted(self.episodes, key=lambda ep: ep.depth)[:n]
+
+    @property
+    def max_episode(self) -> Optional[DrawdownEpisode]:
+        """最大回撤所在区间"""
+        return min(self.episodes, key=lambda ep: ep.depth) if self.episodes else None
+
+
+def drawdown_series(prices: np.ndarray) -> np.ndarray:
+    """相对历史最高点的回撤序列 (矩阵输入时按列计算)"""
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) == 0:
+        return prices
+    return prices / np.maximum.accumulate(prices, axis=0) - 1.0
+
+
+def _summarize(dd: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """回撤序列 -> (最大回撤, 最长连续水下K线数, 水下平均回撤)，沿时间轴按列计算"""
+    under = dd < 0
+    # 每个位置距最近一次站上前高的K线数即当前水下长度
+    idx = np.arange(len(dd)).reshape((-1,) + (1,) * (dd.ndim - 1))
+    last_peak = np.maximum.accumulate(np.where(under, 0, idx), axis=0)
+    duration = (idx - last_peak).max(axis=0)
+    count = under.sum(axis=0)
+    with np.errstate(invalid='ignore'):
+        avg = np.where(count > 0, np.where(under, dd, 0.0).sum(axis=0) / count, 0.0)
+    return dd.min(axis=0), duration, avg
+
+
+def drawdown_stats(prices) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    最大回撤、最长水下K线数与水下平均回撤 (每列一次扫描)
+
+    Args:
+        prices: 价格/净值序列 (T,) 或矩阵 (T, N)
+
+    Returns:
+        (最大回撤 (负值), 最长连续水下K线数, 平均回撤)，一维输入为标量
+    """
+    return _summarize(drawdown_series(prices))
+
+
+def _format_date(value) -> str:
+    return value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else str(value)
+
+
+def analyze_drawdowns(prices: Sequence[float], dates: Optional[Sequence] = None) -> DrawdownAnalysis:
+    """
+    回撤分析
+
+    Args:
+        prices: 价格或净值序列 (按时间升序)
+        dates: 与 prices 等长的日期 (可选，用于填充区间日期)
+
+    Returns:
+        DrawdownAnalysis
+    """
+    dd = drawdown_series(prices)
+    n = len(dd)
+    under = dd < 0
+    max_dd, max_duration, avg_dd = _summarize(dd)
+    if not under.any():
+        return DrawdownAnalysis(dd, 0.0, 0, 0.0, [])
+
+    # 水下区间的起止位置 (end 为开区间，即收复位置)
+    edges = np.diff(np.concatenate(([0], under.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # 每个区间的最深回撤与谷底位置 (区间内第一个达到最深值的位置)
+    depths = np.minimum.reduceat(dd, starts)
+    segment = np.cumsum(edges[:-1] == 1) - 1
+    is_trough = under & (dd == depths[segment])
+    _, first = np.unique(segment[is_trough], return_index=True)
+    troughs = np.flatnonzero(is_trough)[first]
+
+    peaks = starts - 1  # dd[0] 恒为 0，水下区间不会从第一根开始
+    recovered = ends < n
+    last = np.where(recovered, ends, n - 1)
+
+    if dates is not None:
+        labels = [_format_date(d) for d in dates]
+    episodes = []
+    for peak, trough, end, rec, depth, stop in zip(peaks.tolist(), troughs.tolist(), ends.tolist(),
+                                                   recovered.tolist(), depths.tolist(), last.tolist()):
+        episodes.append(DrawdownEpisode(
+            peak_index=peak,
+            trough_index=trough,
+            recovery_index=end if rec else None,
+            depth=depth,
+            length=stop - peak,
+            peak_to_trough=trough - peak,
+            time_to_recover=end - trough if rec else None,
+            peak_date=labels[peak] if dates is not None else None,
+            trough_date=labels[trough] if dates is not None else None,
+            recovery_date=labels[end] if dates is not None and rec else None,
+        ))
+
+    return DrawdownAnalysis(
+        drawdown=dd,
+        max_drawdown=float(max_dd),
+        max_duration=int(max_duration),
+        avg_drawdown=float(avg_dd),
+        episodes=episodes,
+    )
+
+
+def format_episode_table(episodes: List[DrawdownEpisode]) -> str:
+    """回撤区间表 (文本)"""
+    lines = [f"{'前高':<12} {'谷底':<12} {'收复':<12} {'深度':>8} {'下跌':>6} {'修复':>6} {'总长':>6}",
+             '-' * 68]
+    for ep in episodes:
+        peak = ep.peak_date or str(ep.peak_index)
+        trough = ep.trough_date or str(ep.trough_index)
+        recovery = (ep.recovery_date or str(ep.recovery_index)) if ep.recovered else '未收复'
+        recover = str(ep.time_to_recover) if ep.recovered else '-'
+        lines.append(f"{peak:<12} {trough:<12} {recovery:<12} {ep.depth*100:>7.2f}% "
+                     f"{ep.peak_to_trough:>6} {recover:>6} {ep.length:>6}")
+    return '\n'.join(lines)
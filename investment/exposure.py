@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+基准暴露分析 - Benchmark & Factor Exposure
+对每个持仓和整个组合相对多个基准 (默认 SPY、QQQ、恒生指数、GLD、BTC) 计算
+Beta、Alpha、R²、跟踪误差、信息比率，以及它们的滚动序列
+
+实现:
+- 单基准回归: 一次矩阵乘法得到所有 (标的, 基准) 组合的协方差，Beta/R²/跟踪误差都由协方差推出
+- 多因子回归: 设计矩阵 [1, 基准收益] 对全部标的的收益率一次最小二乘求解 (lstsq 多列右端项)
+- 滚动: 前缀和相减得到每个窗口的一、二阶矩，O(T·N·K)，不对每个窗口重新回归
+- Alpha 为年化截距 (日截距 × 252，未扣除无风险利率)；跟踪误差与信息比率基于主动收益 r - b
+- 缺失值 (NaN，如上市前的日期) 不按 0 收益参与回归: 一元回归按 (标的, 基准) 成对完整样本计算，
+  多元回归只用该标的与全部基准都有数据的日期，滚动窗口内有缺失时该窗口为 NaN
+
+用法:
+    result = single_factor(returns, benchmarks)            # returns: (T, N), benchmarks: (T, K)
+    result['beta'][i, k]
+
+    python exposure.py --portfolio-file data/portfolio.json
+    python exposure.py -p data/portfolio.json --benchmarks SPY QQQ HSI.HK --window 126 --output json
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rolling_risk import rolling_sum
+
+DEFAULT_BENCHMARKS = ['SPY', 'QQQ', 'HSI.HK', 'GLD', 'BTC']
+
+DEFAULT_WINDOW = 63
+
+# 单基准指标 (顺序即输出顺序)
+METRICS = ['beta', 'alpha', 'r_squared', 'tracking_error', 'information_ratio']
+
+PORTFOLIO = 'PORTFOLIO'
+
+
+def _from_moments(mean_y: np.ndarray, mean_x: np.ndarray, var_y: np.ndarray, var_x: np.ndarray,
+                  cov: np.ndarray, trading_days: int) -> Dict[str, np.ndarray]:
+    """由均值/方差/协方差 (..., N, K) 推出单基准指标"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = cov / var_x
+        alpha = (mean_y - beta * mean_x) * trading_days
+        r_squared = cov * cov / (var_x * var_y)
+        tracking_error = np.sqrt(np.maximum(var_y + var_x - 2 * cov, 0.0) * trading_days)
+        information_ratio = (mean_y - mean_x) * trading_days / tracking_error
+    return {
+        'beta': beta,
+        'alpha': alpha,
+        'r_squared': r_squared,
+        'tracking_error': tracking_error,
+        'information_ratio': np.where(tracking_error > 0, information_ratio, np.nan),
+    }
+
+
+def single_factor(returns: np.ndarray, benchmarks: np.ndarray,
+                  trading_days: int = 252) -> Dict[str, np.ndarray]:
+    """
+    每个标的分别对每个基准做一元回归
+
+    Args:
+        returns: 标的日收益率 (T, N)
+        benchmarks: 基准日收益率 (T, K)，与 returns 按日期对齐
+
+    Returns:
+        Dict: 指标名 -> (N, K) 数组
+    """
+    y = np.asarray(returns, dtype=np.float64)
+    x = np.asarray(benchmarks, dtype=np.float64)
+    valid_y, valid_x = ~np.isnan(y), ~np.isnan(x)
+    if valid_y.all() and valid_x.all():
+        t = len(y)
+        mean_y, mean_x = y.mean(axis=0), x.mean(axis=0)
+        dy, dx = y - mean_y, x - mean_x
+        cov = dy.T @ dx / (t - 1)
+        var_y = np.einsum('ij,ij->j', dy, dy) / (t - 1)
+        var_x = np.einsum('ij,ij->j', dx, dx) / (t - 1)
+        return _from_moments(mean_y[:, None], mean_x[None, :], var_y[:, None], var_x[None, :],
+                             cov, trading_days)
+
+    # 有缺失值: 每个 (标的, 基准) 只用两者都有数据的日期 (先减去各列均值，减小舍入误差)
+    dy = np.where(valid_y, y - np.nanmean(y, axis=0), 0.0)
+    dx = np.where(valid_x, x - np.nanmean(x, axis=0), 0.0)
+    m_y, m_x = valid_y.astype(np.float64), valid_x.astype(np.float64)
+    n = m_y.T @ m_x                       # 共同观测数 (N, K)
+    sy, sx = dy.T @ m_x, m_y.T @ dx       # 共同日期上的一阶矩
+    syy, sxx = (dy * dy).T @ m_x, m_y.T @ (dx * dx)
+    sxy = dy.T @ dx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_y, mean_x = sy / n, sx / n
+        var_y = (syy - sy * mean_y) / (n - 1)
+        var_x = (sxx - sx * mean_x) / (n - 1)
+        cov = (sxy - sy * mean_x) / (n - 1)
+    shift_y = np.nanmean(y, axis=0)[:, None]
+    shift_x = np.nanmean(x, axis=0)[None, :]
+    result = _from_moments(mean_y + shift_y, mean_x + shift_x, var_y, var_x, cov, trading_days)
+    too_few = n < 3
+    for values in result.values():
+        values[too_few] = np.nan
+    return result
+
+
+def multi_factor(returns: np.ndarray, benchmarks: np.ndarray,
+                 trading_days: int = 252) -> Dict[str, np.ndarray]:
+    """
+    所有标的同时对全部基准做多元回归 r = α + Σ β_k·b_k + ε (一次最小二乘求解)
+
+    Returns:
+        Dict: beta (N, K)、alpha (N,)、r_squared (N,)、residual_volatility (N,, 年化)
+    """
+    y = np.asarray(returns, dtype=np.float64)
+    x = np.asarray(benchmarks, dtype=np.float64)
+    valid = ~np.isnan(y)
+    rows_x = ~np.isnan(x).any(axis=1)
+    if not (valid.all() and rows_x.all()):
+        # 有缺失值: 按有效日期的模式分组，每组只用标的与全部基准都有数据的日期
+        n, k = y.shape[1], x.shape[1]
+        result = {'beta': np.full((n, k), np.nan), 'alpha': np.full(n, np.nan),
+                  'r_squared': np.full(n, np.nan), 'residual_volatility': np.full(n, np.nan)}
+        patterns, group = np.unique(valid.T, axis=0, return_inverse=True)
+        for g, pattern in enumerate(patterns):
+            rows = pattern & rows_x
+            if rows.sum() <= k + 1:
+                continue
+            cols = np.flatnonzero(group.ravel() == g)
+            part = multi_factor(y[np.ix_(rows, cols)], x[rows], trading_days)
+            for name, values in part.items():
+                result[name][cols] = values
+        return result
+
+    t, k = x.shape
+    design = np.column_stack((np.ones(t), x))
+    coef, _, _, _ = np.linalg.lstsq(design, y, rcond=None)
+    resid = y - design @ coef
+    ss_res = np.einsum('ij,ij->j', resid, resid)
+    dy = y - y.mean(axis=0)
+    ss_tot = np.einsum('ij,ij->j', dy, dy)
+    dof = max(t - k - 1, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_squared = np.where(ss_tot > 0, 1.0 - ss_res / ss_tot, np.nan)
+    return {
+        'beta': coef[1:].T,
+        'alpha': coef[0] * trading_days,
+        'r_squared': r_squared,
+        'residual_volatility': np.sqrt(ss_res / dof * trading_days),
+    }
+
+
+def rolling_single_factor(returns: np.ndarray, benchmarks: np.ndarray, window: int,
+                          trading_days: int = 252) -> Dict[str, np.ndarray]:
+    """
+    滚动一元回归
+
+    Returns:
+        Dict: 指标名 -> (T, N, K) 数组，前 window-1 个位置为 NaN
+    """
+    y = np.asarray(returns, dtype=np.float64)
+    x = np.asarray(benchmarks, dtype=np.float64)
+    w = float(window)
+    # 先减去全样本均值，减小前缀和相减的舍入误差；缺失值先置 0，含缺失值的窗口最后置为 NaN
+    missing_y, missing_x = np.isnan(y), np.isnan(x)
+    shift_y, shift_x = np.nanmean(y, axis=0), np.nanmean(x, axis=0)
+    dy = np.where(missing_y, 0.0, y - shift_y)
+    dx = np.where(missing_x, 0.0, x - shift_x)
+    sy = rolling_sum(dy, window)[:, :, None]
+    sx = rolling_sum(dx, window)[:, None, :]
+    syy = rolling_sum(dy * dy, window)[:, :, None]
+    sxx = rolling_sum(dx * dx, window)[:, None, :]
+    sxy = rolling_sum(dy[:, :, None] * dx[:, None, :], window)
+    mean_y = sy / w + shift_y[:, None]
+    mean_x = sx / w + shift_x[None, :]
+    var_y = (syy - sy * sy / w) / (w - 1)
+    var_x = (sxx - sx * sx / w) / (w - 1)
+    cov = (sxy - sy * sx / w) / (w - 1)
+    result = _from_moments(mean_y, mean_x, var_y, var_x, cov, trading_days)
+    if missing_y.any() or missing_x.any():
+        gaps = ((rolling_sum(missing_y.astype(np.float64), window) > 0)[:, :, None]
+                | (rolling_sum(missing_x.astype(np.float64), window) > 0)[:, None, :])
+        for values in result.values():
+            values[gaps] = np.nan
+    return result
+
+
+def _value(v) -> Optional[float]:
+    """NaN/inf 转为 None，便于 JSON 输出"""
+    return round(float(v), 4) if np.isfinite(v) else None
+
+
+def exposure_report(dates: Sequence, returns: np.ndarray, symbols: List[str],
+                    benchmark_returns: np.ndarray, benchmarks: List[str],
+                    weights: Optional[np.ndarray] = None, window: int = DEFAULT_WINDOW,
+                    trading_days: int = 252) -> Dict:
+    """
+    组合暴露报告
+
+    Args:
+        dates: 与收益率行对齐的日期
+        returns: 持仓日收益率 (T, N)，缺失值为 NaN
+        benchmark_returns: 基准日收益率 (T, K)，缺失值为 NaN
+        weights: 持仓权重，提供时追加组合 (PORTFOLIO) 一行
+        window: 滚动窗口
+
+    Returns:
+        Dict: single (一元回归)、multi (多元回归)、rolling (滚动序列)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    subjects = list(symbols)
+    if weights is not None:
+        # 组合收益中缺失的持仓按现金 (0 收益) 计，与 ReturnsPanel.portfolio_returns 一致
+        portfolio = np.nan_to_num(returns) @ np.asarray(weights, dtype=np.float64)
+        returns = np.column_stack((returns, portfolio))
+        subjects.append(PORTFOLIO)
+
+    single = single_factor(returns, benchmark_returns, trading_days)
+    multi = multi_factor(returns, benchmark_returns, trading_days)
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'start_date': dates[0].strftime('%Y-%m-%d'),
+        'end_date': dates[-1].strftime('%Y-%m-%d'),
+        'observations': len(returns),
+        'benchmarks': list(benchmarks),
+        'single': {
+            subject: {
+                bench: {name: _value(single[name][i, k]) for name in METRICS}
+                for k, bench in enumerate(benchmarks)
+            }
+            for i, subject in enumerate(subjects)
+        },
+        'multi': {
+            subject: {
+                'beta': {bench: _value(multi['beta'][i, k]) for k, bench in enumerate(benchmarks)},
+                'alpha': _value(multi['alpha'][i]),
+                'r_squared': _value(multi['r_squared'][i]),
+                'residual_volatility': _value(multi['residual_volatility'][i]),
+            }
+            for i, subject in enumerate(subjects)
+        },
+    }
+
+    if len(returns) >= window:
+        rolling = rolling_single_factor(returns, benchmark_returns, window, trading_days)
+        report['rolling'] = {
+            'window': window,
+            'dates': [d.strftime('%Y-%m-%d') for d in dates],
+            'series': {
+                subject: {
+                    bench: {name: [_value(v) for v in rolling[name][:, i, k]] for name in METRICS}
+                    for k, bench in enumerate(benchmarks)
+                }
+                for i, subject in enumerate(subjects)
+            },
+        }
+    return report
+
+
+def print_exposure_report(report: Dict):
+    """打印暴露报告 (一元回归 Beta/R² 表、组合各基准指标、多元回归 Beta)"""
+    benchmarks = report['benchmarks']
+    width = 10 + 14 * len(benchmarks)
+
+    def fmt(v, spec):
+        return f"{'-':>14}" if v is None else f"{v:>14{spec}}"
+
+    print(f"\n{'='*width}")
+    print(f"📐 基准暴露 ({report['start_date']} 至 {report['end_date']}，{report['observations']} 个交易日)")
+    print(f"{'='*width}")
+    print("一元回归 Beta (R²)")
+    print(f"{'标的':<10}" + ''.join(f"{b:>14}" for b in benchmarks))
+    print('-' * width)
+    for subject, rows in report['single'].items():
+        cells = ''
+        for b in benchmarks:
+            beta, r2 = rows[b]['beta'], rows[b]['r_squared']
+            cells += f"{'-':>14}" if beta is None else f"{f'{beta:.2f} ({r2:.2f})':>14}"
+        print(f"{subject:<10}{cells}")
+
+    if PORTFOLIO in report['single']:
+        print(f"\n组合相对各基准")
+        print(f"{'指标':<10}" + ''.join(f"{b:>14}" for b in benchmarks))
+        print('-' * width)
+        rows = report['single'][PORTFOLIO]
+        labels = {'beta': 'Beta', 'alpha': 'Alpha', 'r_squared': 'R²',
+                  'tracking_error': '跟踪误差', 'information_ratio': '信息比率'}
+        for name in METRICS:
+            spec = '.2%' if name in ('alpha', 'tracking_error') else '.3f'
+            print(f"{labels[name]:<10}" + ''.join(fmt(rows[b][name], spec) for b in benchmarks))
+
+        if 'rolling' in report:
+            series = report['rolling']['series'][PORTFOLIO]
+            print(f"\n组合滚动 {report['rolling']['window']} 日 Beta (最新)")
+            print(f"{'':<10}" + ''.join(fmt(series[b]['beta'][-1], '.3f') for b in benchmarks))
+
+    print(f"\n多元回归 (全部基准同时回归)")
+    print(f"{'标的':<10}" + ''.join(f"{b:>14}" for b in benchmarks) + f"{'Alpha':>10}{'R²':>8}")
+    print('-' * (width + 18))
+    for subject, row in report['multi'].items():
+        alpha = f"{row['alpha']:>10.2%}" if row['alpha'] is not None else f"{'-':>10}"
+        r2 = f"{row['r_squared']:>8.2f}" if row['r_squared'] is not None else f"{'-':>8}"
+        print(f"{subject:<10}" + ''.join(fmt(row['beta'][b], '.3f') for b in benchmarks) + alpha + r2)
+    print(f"{'='*(width + 18)}\n")
+
+
+def main():
+    # 延迟导入，避免作为库使用时引入数据源依赖
+    from portfolio_risk import RiskAnalyzer
+
+    parser = argparse.ArgumentParser(description='基准暴露分析 (Beta / Alpha / R² / 跟踪误差 / 信息比率)')
+    parser.add_argument('--portfolio-file', '-p', help='投资组合 JSON 文件路径')
+    parser.add_argument('--symbols', '-s', nargs='+', help='直接指定标的 (等权，不计算组合)')
+    parser.add_argument('--benchmarks', '-b', nargs='+', default=DEFAULT_BENCHMARKS,
+                        help='基准 (默认 SPY QQQ HSI.HK GLD BTC)')
+    parser.add_argument('--days', '-d', type=int, default=252, help='历史数据天数 (默认252)')
+    parser.add_argument('--window', '-w', type=int, default=DEFAULT_WINDOW, help='滚动窗口 (默认63)')
+    parser.add_argument('--demo', action='store_true', help='使用演示数据')
+    parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+    parser.add_argument('--save', help='保存 JSON 到文件 (含滚动序列)')
+
+    args = parser.parse_args()
+
+    if not args.portfolio_file and not args.symbols:
+        parser.print_help()
+        return 1
+
+    analyzer = RiskAnalyzer(use_demo=args.demo)
+    if args.portfolio_file:
+        symbols, weights, _, _ = analyzer.load_positions(args.portfolio_file)
+    else:
+        symbols, weights = args.symbols, None
+
+    fetch = symbols + [b for b in args.benchmarks if b not in symbols]
+    panel = analyzer.returns_panel(fetch, args.days)
+    if len(panel.returns) < 30:
+        print(f"❌ 对齐后只有 {len(panel.returns)} 个交易日，数据不足")
+        return 1
+
+    holdings = [s for s in symbols if s in panel.symbols]
+    benchmarks = [b for b in args.benchmarks if b in panel.symbols]
+    returns = panel.select(holdings).returns
+    benchmark_returns = panel.select(benchmarks).returns
+    if weights is not None:
+        w = np.array([weights[symbols.index(s)] for s in holdings])
+        weights = w / w.sum()
+
+    report = exposure_report(panel.dates[1:], returns, holdings, benchmark_returns, benchmarks,
+                             weights, args.window)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, ensure_ascii=False)
+        print(f"✅ 已保存到 {args.save}")
+
+    if args.output == 'json':
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_exposure_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+指标计算内核 - Indicator Kernels
+Wilder 平滑的 RSI / ATR 共享实现，供 TechnicalAnalyzer、面板指标和比特币策略共用
+
+Wilder 平滑 (即 alpha = 1/period 的递归滤波):
+    avg[seed] = mean(前 period 个有效值)
+    avg[t]    = avg[t-1] + (x[t] - avg[t-1]) / period
+
+安装 scipy 时用 scipy.signal.lfilter 做递归滤波，否则退化为预分配输出的紧凑循环。
+支持一维序列和二维面板 (沿最后一维计算，每行可以有不同长度的前导 NaN)。
+
+缺失值 (NaN) 不参与平滑: 种子取前 period 个有效值的均值，之后跳过中间的 NaN，
+缺失位置沿用上一个平滑值，单根缺失K线不会使之后的 RSI/ATR 全部变为 NaN。
+"""
+
+import sys
+from typing import Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+# scipy 为可选依赖，仅用于加速递归滤波
+SCIPY_AVAILABLE = False
+try:
+    from scipy.signal import lfilter
+    SCIPY_AVAILABLE = True
+except ImportError:
+    pass
+
+
+def _wilder_row(x: np.ndarray, period: int, out: np.ndarray):
+    """对单行 (可含前导或中间的 NaN) 做 Wilder 平滑，结果写入 out"""
+    valid = np.flatnonzero(~np.isnan(x))
+    if len(valid) < period:
+        return
+    seed_at = valid[period - 1]
+    seed = x[valid[:period]].mean()
+    out[seed_at] = seed
+
+    rest = valid[period:]
+    gapless = len(rest) == len(x) - seed_at - 1
+    tail = x[seed_at + 1:] if gapless else x[rest]
+    smoothed = np.empty(len(tail))
+    if len(tail):
+        alpha = 1.0 / period
+        if SCIPY_AVAILABLE:
+            # y[n] = alpha * x[n] + (1 - alpha) * y[n-1]，初始状态取种子值
+            smoothed, _ = lfilter([alpha], [1.0, alpha - 1.0], tail, zi=[(1.0 - alpha) * seed])
+        else:
+            prev = seed
+            for i, value in enumerate(tail.tolist()):
+                prev += (value - prev) * alpha
+                smoothed[i] = prev
+
+    if gapless:
+        out[seed_at + 1:] = smoothed
+    else:
+        # 缺失位置沿用上一个有效位置的平滑值
+        last = np.searchsorted(rest, np.arange(seed_at + 1, len(x)), side='right')
+        out[seed_at + 1:] = np.concatenate(([seed], smoothed))[last]
+
+
+def wilder_smooth(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder 平滑
+
+    Args:
+        values: 一维序列或二维面板 (沿最后一维平滑)
+        period: 平滑周期
+
+    Returns:
+        与输入同形状的 float64 数组，种子之前为 NaN，之后的缺失位置沿用上一个平滑值
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.ndim == 1:
+        _wilder_row(values, period, out)
+    else:
+        for row in range(values.shape[0]):
+            _wilder_row(values[row], period, out[row])
+    return out
+
+
+def _diff(values: np.ndarray) -> np.ndarray:
+    """沿最后一维一阶差分，首位补 NaN"""
+    delta = np.full(values.shape, np.nan)
+    delta[..., 1:] = values[..., 1:] - values[..., :-1]
+    return delta
+
+
+def wilder_averages(close: np.ndarray, period: int = 14) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilder 平均涨幅与平均跌幅"""
+    close = np.asarray(close, dtype=np.float64)
+    delta = _diff(close)
+    missing = np.isnan(delta)
+    gain = np.where(missing, np.nan, np.maximum(delta, 0.0))
+    loss = np.where(missing, np.nan, np.maximum(-delta, 0.0))
+    return wilder_smooth(gain, period), wilder_smooth(loss, period)
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Wilder RSI
+
+    RSI = 100 - 100 / (1 + 平均涨幅 / 平均跌幅)
+    平均跌幅为 0 时 RSI = 100；价格完全不动时 RSI = 50
+    """
+    avg_gain, avg_loss = wilder_averages(close, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    flat_loss = avg_loss == 0
+    out[flat_loss & (avg_gain > 0)] = 100.0
+    out[flat_loss & (avg_gain == 0)] = 50.0
+    return out
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """真实波幅，第一根K线取 high - low"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[..., 1:] = close[..., :-1]
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder ATR (真实波幅的 Wilder 平滑)"""
+    return wilder_smooth(true_range(high, low, close), period)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+指标周期优化器 - Indicator Period Optimizer
+在进程池中网格/随机搜索 MA、RSI、MACD、布林带周期参数，并做滚动前推 (walk-forward) 验证
+
+- 每个标的的 high/low/close 只写一次 .npy 文件，工作进程以内存映射方式只读共享，
+  任务中只传递文件路径和参数组合，不在进程间序列化 DataFrame
+- 每组参数在全区间计算一次逐K线策略收益 (指标均为因果计算，无未来函数)，
+  再按前推窗口切分训练/测试段评估
+- 每个前推窗口用训练段选出最优参数，在紧随其后的测试段评估样本外表现
+- 推荐参数取最后一个窗口 (训练数据最多) 的训练段最优参数；全区间最优只作为样本内诊断输出
+
+用法:
+    python indicator_optimizer.py --symbols MSFT AAPL --days 1500 --demo
+    python indicator_optimizer.py --symbols-file watchlist.txt --random 500 --workers 8
+    python indicator_optimizer.py --symbols MSFT --demo --folds 5 --output json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+import panel_indicators
+from signal_backtest import sharpe_ratio, strategy_returns
+from technical_analysis import TechnicalAnalyzer, load_symbols_file
+
+# 参数搜索空间
+SEARCH_SPACE = {
+    'ma_fast': [5, 10, 15, 20],
+    'ma_slow': [20, 30, 50, 60, 100],
+    'rsi_period': [7, 9, 14, 21],
+    'macd': [(8, 21, 5), (12, 26, 9), (5, 35, 5), (19, 39, 9)],
+    'bb_period': [10, 20, 30],
+    'bb_std': [1.5, 2.0, 2.5],
+}
+
+# TechnicalAnalyzer 当前使用的默认参数
+DEFAULT_CONFIG = {
+    'ma_fast': 5,
+    'ma_slow': 20,
+    'rsi_period': 14,
+    'macd': (12, 26, 9),
+    'bb_period': 20,
+    'bb_std': 2.0,
+}
+
+# 最长指标周期，前推验证从此之后开始切分 (预热期不参与评估)
+WARMUP_BARS = 100
+
+
+def build_configs(n_random: Optional[int] = None, seed: int = 42) -> List[Dict]:
+    """
+    生成参数组合
+
+    Args:
+        n_random: 为 None 时返回完整网格，否则从网格中随机抽取 n_random 组
+    """
+    names = list(SEARCH_SPACE)
+    configs = [
+        dict(zip(names, values))
+        for values in itertools.product(*(SEARCH_SPACE[name] for name in names))
+    ]
+    configs = [c for c in configs if c['ma_fast'] < c['ma_slow']]
+    if n_random is not None and n_random < len(configs):
+        configs = random.Random(seed).sample(configs, n_random)
+    # 默认参数总是参与评估，作为基准
+    if DEFAULT_CONFIG not in configs:
+        configs.append(dict(DEFAULT_CONFIG))
+    return configs
+
+
+def walk_forward_slices(n_bars: int, folds: int, warmup: int = WARMUP_BARS) -> List[Tuple[slice, slice]]:
+    """
+    锚定式前推窗口: 预热期之后等分为 folds+1 段，
+    第 i 个窗口用前 i+1 段训练，第 i+2 段测试
+    """
+    usable = n_bars - warmup
+    seg = usable // (folds + 1)
+    if seg < 20:
+        raise ValueError(f"K线数量不足以做 {folds} 折前推验证 (需要 > {warmup + 20 * (folds + 1)} 根)")
+    bounds = [warmup + seg * i for i in range(folds + 2)]
+    bounds[-1] = n_bars
+    return [(slice(warmup, bounds[i + 1]), slice(bounds[i + 1], bounds[i + 2]))
+            for i in range(folds)]
+
+
+def evaluate_configs(task: Tuple) -> Dict[str, np.ndarray]:
+    """
+    工作进程: 对一批参数组合计算每个前推窗口的训练/测试夏普比率
+
+    Args:
+        task: (内存映射文件路径, 参数组合列表, 交易成本, 前推窗口数)
+
+    Returns:
+        Dict: train / test / full 夏普矩阵，形状 (组合数, 窗口数) 或 (组合数,)
+    """
+    path, configs, cost, folds = task
+    prices = np.load(path, mmap_mode='r')
+    high, low, close = (np.asarray(prices[i])[None, :] for i in range(3))
+    slices = walk_forward_slices(close.shape[1], folds)
+
+    train = np.zeros((len(configs), folds))
+    test = np.zeros((len(configs), folds))
+    full = np.zeros(len(configs))
+
+    for k, config in enumerate(configs):
+        fast, slow, signal = config['macd']
+        panel = panel_indicators.compute_panel(
+            high, low, close,
+            ma_periods=[config['ma_fast'], config['ma_slow']], ema_periods=[],
+            rsi_period=config['rsi_period'],
+            macd_fast=fast, macd_slow=slow, macd_signal=signal,
+            bb_period=config['bb_period'], bb_std=config['bb_std']
+        )
+        score, _ = panel_indicators.composite_score(
+            close, panel[f"MA{config['ma_fast']}"], panel[f"MA{config['ma_slow']}"],
+            panel['RSI'], panel['MACD'], panel['MACD_Signal'], panel['BB_Percent']
+        )
+        state = panel_indicators.classify_score(score)
+        net = strategy_returns(close[0], state, cost)['net'][0]
+
+        for f, (train_slice, test_slice) in enumerate(slices):
+            train[k, f] = sharpe_ratio(net[train_slice])
+            test[k, f] = sharpe_ratio(net[test_slice])
+        full[k] = sharpe_ratio(net[WARMUP_BARS:])
+
+    return {'train': train, 'test': test, 'full': full}
+
+
+def _config_label(config: Dict) -> str:
+    fast, slow, signal = config['macd']
+    return (f"MA {config['ma_fast']}/{config['ma_slow']}  RSI {config['rsi_period']}  "
+            f"MACD {fast}/{slow}/{signal}  BB {config['bb_period']}/{config['bb_std']}")
+
+
+def _serializable(config: Dict) -> Dict:
+    config = dict(config)
+    config['macd'] = list(config['macd'])
+    return config
+
+
+def optimize_symbol(symbol: str, path: str, configs: List[Dict], pool: ProcessPoolExecutor,
+                    cost: float, folds: int, chunk_size: int) -> Dict:
+    """对单个标的并行评估全部参数组合并汇总前推验证结果"""
+    chunks = [configs[i:i + chunk_size] for i in range(0, len(configs), chunk_size)]
+    parts = list(pool.map(evaluate_configs, [(path, chunk, cost, folds) for chunk in chunks]))
+
+    train = np.vstack([p['train'] for p in parts])
+    test = np.vstack([p['test'] for p in parts])
+    full = np.concatenate([p['full'] for p in parts])
+
+    # 每个窗口: 训练段最优参数 -> 下一段样本外表现
+    chosen = train.argmax(axis=0)
+    oos = test[chosen, np.arange(folds)]
+
+    default_idx = configs.index(DEFAULT_CONFIG)
+    # 推荐参数: 最后一个窗口的训练段最优 (样本外夏普即该窗口测试段)
+    best_idx = int(chosen[-1])
+    # 全区间最优存在过拟合，仅作诊断
+    in_sample_idx = int(full.argmax())
+
+    return {
+        'symbol': symbol,
+        'configs_evaluated': len(configs),
+        'best_config': _serializable(configs[best_idx]),
+        'best_config_test_sharpe': round(float(oos[-1]), 4),
+        'in_sample_best_config': _serializable(configs[in_sample_idx]),
+        'in_sample_best_sharpe': round(float(full[in_sample_idx]), 4),
+        'default_in_sample_sharpe': round(float(full[default_idx]), 4),
+        'walk_forward': {
+            'folds': folds,
+            'chosen_configs': [_serializable(configs[i]) for i in chosen],
+            'train_sharpe': [round(float(train[i, f]), 4) for f, i in enumerate(chosen)],
+            'test_sharpe': [round(float(x), 4) for x in oos],
+            'mean_test_sharpe': round(float(oos.mean()), 4),
+            'default_mean_test_sharpe': round(float(test[default_idx].mean()), 4),
+        },
+    }
+
+
+def run_optimizer(symbols: List[str], analyzer: TechnicalAnalyzer, days: int = 1500,
+                  n_random: Optional[int] = None, workers: Optional[int] = None,
+                  folds: int = 4, cost: float = 0.001, chunk_size: int = 64) -> List[Dict]:
+    """
+    优化多个标的的指标周期
+
+    Returns:
+        每个标的一条结果 (获取数据失败的标的包含 error 字段)
+    """
+    configs = build_configs(n_random)
+    workdir = tempfile.mkdtemp(prefix='indicator_opt_')
+    results = []
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for symbol in symbols:
+                df = analyzer.get_historical_data(symbol, count=days)
+                if df.empty or len(df) < WARMUP_BARS + 20 * (folds + 1):
+                    results.append({'symbol': symbol, 'error': '历史数据不足'})
+                    continue
+
+                # 每个标的只落盘一次，工作进程内存映射读取
+                path = os.path.join(workdir, f"{len(results)}.npy")
+                np.save(path, np.vstack([
+                    df['high'].to_numpy(dtype=np.float64),
+                    df['low'].to_numpy(dtype=np.float64),
+                    df['close'].to_numpy(dtype=np.float64),
+                ]))
+
+                start = time.perf_counter()
+                result = optimize_symbol(symbol, path, configs, pool, cost, folds, chunk_size)
+                result['bars'] = len(df)
+                result['seconds'] = round(time.perf_counter() - start, 2)
+                results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+def print_optimizer_report(results: List[Dict]):
+    """打印优化结果"""
+    for r in results:
+        print(f"\n{'='*70}")
+        print(f"🔧 指标周期优化: {r['symbol']}")
+        print(f"{'='*70}")
+        if 'error' in r:
+            print(f"❌ {r['error']}")
+            continue
+        wf = r['walk_forward']
+        print(f"K线数: {r['bars']}  参数组合: {r['configs_evaluated']}  耗时: {r['seconds']}s")
+        print(f"\n🏆 推荐参数 (前推验证): {_config_label(r['best_config'])}")
+        print(f"   最后窗口样本外夏普: {r['best_config_test_sharpe']:.3f}")
+        in_sample = dict(r['in_sample_best_config'], macd=tuple(r['in_sample_best_config']['macd']))
+        print(f"   全区间最优 (样本内诊断): {_config_label(in_sample)}  "
+              f"夏普 {r['in_sample_best_sharpe']:.3f} (默认参数 {r['default_in_sample_sharpe']:.3f})")
+        print(f"\n📅 前推验证 ({wf['folds']} 折):")
+        for i, (config, tr, te) in enumerate(zip(wf['chosen_configs'], wf['train_sharpe'], wf['test_sharpe'])):
+            label = _config_label(dict(config, macd=tuple(config['macd'])))
+            print(f"   窗口{i+1}: 训练 {tr:>6.3f} → 测试 {te:>6.3f}  {label}")
+        print(f"\n   样本外平均夏普: {wf['mean_test_sharpe']:.3f} "
+              f"(默认参数 {wf['default_mean_test_sharpe']:.3f})")
+        print(f"{'='*70}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='指标周期并行优化 (含前推验证)')
+    parser.add_argument('--symbols', nargs='+', help='股票代码列表')
+    parser.add_argument('--symbols-file', help='标的列表文件 (每行一个代码)')
+    parser.add_argument('--days', '-d', type=int, default=1500, help='历史K线数 (默认: 1500)')
+    parser.add_argument('--random', type=int, help='随机搜索的参数组数 (默认: 完整网格)')
+    parser.add_argument('--workers', type=int, help='进程数 (默认: CPU 核数)')
+    parser.add_argument('--folds', type=int, default=4, help='前推验证窗口数 (默认: 4)')
+    parser.add_argument('--cost-bps', type=float, default=10.0, help='单边交易成本 (基点，默认: 10)')
+    parser.add_argument('--demo', action='store_true', help='演示模式(使用模拟数据)')
+    parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+
+    args = parser.parse_args()
+
+    symbols = list(args.symbols or [])
+    if args.symbols_file:
+        symbols += [s for s in load_symbols_file(args.symbols_file) if s not in symbols]
+    if not symbols:
+        parser.print_help()
+        return 1
+
+    analyzer = TechnicalAnalyzer(use_demo=args.demo)
+    results = run_optimizer(symbols, analyzer, args.days, args.random, args.workers,
+                            args.folds, args.cost_bps / 10000)
+
+    if args.output == 'json':
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+    else:
+        print_optimizer_report(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
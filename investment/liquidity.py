@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+流动性风险 - Liquidity-Adjusted VaR & Position Sizing
+结合日均成交量、买卖价差代理与 portfolio.json 的持仓规模，评估每个持仓在压力下能否及时变现
+
+指标定义:
+- 变现天数: 持仓数量 / (日均成交量 × 参与率)，参与率为单日卖出量最多占成交量的比例 (默认 10%)
+- 买卖价差代理: 日内高低价的 Corwin-Schultz 估计 (不需要逐笔报价)，取窗口内逐日估计的均值与标准差
+- 流动性调整 VaR (Bangia 等, 1999): 1 日历史 VaR 按变现天数的平方根放大，
+  再加上半价差成本 0.5·(μ + z·σ)·市值；组合 LVaR 在收益率矩阵上按持仓各自的变现期放大后求分位数，保留分散化效果
+- 最大安全仓位: 在 max_days 个交易日内按参与率可以卖完的最大市值
+
+全部指标在 (T, N) 的高/低/量/收益率矩阵上按列一次计算；金额为基准货币 (人民币)，
+每股人民币价值取 持仓市值/持仓数量，不需要单独的汇率数据
+
+用法:
+    book = LiquidityBook.from_portfolio(portfolio)
+    report = book.analyze(frames, panel.returns)
+
+    python liquidity.py --portfolio-file data/portfolio.json
+    python liquidity.py -p data/portfolio.json --participation 0.05 --max-days 3 --demo
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+import risk_metrics
+
+# 单日卖出量最多占日均成交量的比例
+DEFAULT_PARTICIPATION = 0.10
+
+# 最大安全仓位对应的变现天数
+DEFAULT_MAX_DAYS = 5
+
+# 日均成交量与价差的统计窗口 (交易日)
+DEFAULT_ADV_WINDOW = 20
+
+# 组合变现进度的统计期限 (交易日)
+PROFILE_HORIZONS = (1, 5, 20)
+
+# Yahoo 的加密货币成交量是计价货币成交额而非数量，需除以收盘价
+QUOTE_VOLUME_SYMBOLS = {'BTC', 'ETH'}
+
+# Corwin-Schultz 公式常数 3 - 2√2
+_CS_DENOM = 3 - 2 * np.sqrt(2)
+
+
+def tail_matrix(frames: Dict[str, pd.DataFrame], symbols: Sequence[str], field: str,
+                window: int) -> np.ndarray:
+    """
+    各标的最近 window 根K线的某个字段，按尾部对齐为 (window, N) 矩阵
+
+    成交量与价差只做逐列统计，不需要跨标的按日期对齐；数据不足的标的顶部填 NaN
+    """
+    out = np.full((window, len(symbols)), np.nan)
+    for j, symbol in enumerate(symbols):
+        df = frames.get(symbol)
+        if df is None or df.empty or field not in df:
+            continue
+        values = df[field].to_numpy(dtype=np.float64)[-window:]
+        out[window - len(values):, j] = values
+    return out
+
+
+def corwin_schultz_spread(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """
+    Corwin-Schultz (2012) 高低价价差估计 (相邻两日一组，负值截为 0)
+
+    Args:
+        high, low: 日最高/最低价 (T, N)
+
+    Returns:
+        逐日相对价差 (T-1, N)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hl = np.log(high / low) ** 2
+        beta = hl[1:] + hl[:-1]
+        gamma = np.log(np.maximum(high[1:], high[:-1]) / np.minimum(low[1:], low[:-1])) ** 2
+        alpha = (np.sqrt(2 * beta) - np.sqrt(beta)) / _CS_DENOM - np.sqrt(gamma / _CS_DENOM)
+        spread = 2 * (np.exp(alpha) - 1) / (1 + np.exp(alpha))
+    return np.where(np.isnan(spread), np.nan, np.maximum(spread, 0.0))
+
+
+def liquidity_metrics(quantities: np.ndarray, values: np.ndarray, adv: np.ndarray,
+                      spread_mean: np.ndarray, spread_std: np.ndarray, returns: np.ndarray,
+                      participation: float = DEFAULT_PARTICIPATION,
+                      max_days: float = DEFAULT_MAX_DAYS,
+                      confidence: float = 0.95) -> Dict[str, np.ndarray]:
+    """
+    全部持仓的流动性指标 (逐列向量化)
+
+    Args:
+        quantities: 持仓数量 (N,)
+        values: 持仓市值 (N,，基准货币)
+        adv: 日均成交量 (N,，与持仓数量同单位)
+        spread_mean, spread_std: 相对买卖价差的均值与标准差 (N,)
+        returns: 日收益率 (T, N)，列顺序与持仓一致
+        participation: 单日最多占成交量的比例
+        max_days: 最大安全仓位对应的变现天数
+        confidence: VaR 与价差分位数的置信度
+
+    Returns:
+        Dict: 指标名 -> (N,) 数组，另含组合级标量 (portfolio_*)
+    """
+    z = NormalDist().inv_cdf(confidence)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = quantities / (adv * participation)
+        unit_value = values / quantities
+    days = np.where(adv > 0, days, np.inf)
+    horizon = np.sqrt(np.maximum(np.nan_to_num(days, nan=1.0, posinf=1.0), 1.0))
+
+    # 单持仓: 1 日 VaR 按变现期放大 + 价差成本
+    var_1d = -risk_metrics.historical_var(returns, confidence) * values
+    spread_cost = 0.5 * np.nan_to_num(spread_mean + z * spread_std) * values
+    lvar = var_1d * horizon + spread_cost
+
+    # 组合: 各列收益率按各自变现期放大后再加总，保留持仓间的分散化
+    pnl = returns @ values
+    scaled_pnl = (returns * horizon) @ values
+    portfolio_var = -float(risk_metrics.historical_var(pnl, confidence))
+    portfolio_lvar = -float(risk_metrics.historical_var(scaled_pnl, confidence)) + float(spread_cost.sum())
+
+    max_safe_quantity = adv * participation * max_days
+    return {
+        'days_to_liquidate': days,
+        'adv_value': adv * unit_value,
+        'adv_share': np.where(adv > 0, quantities / adv, np.inf),
+        'var_1d': var_1d,
+        'spread_cost': spread_cost,
+        'lvar': lvar,
+        'max_safe_quantity': max_safe_quantity,
+        'max_safe_value': max_safe_quantity * unit_value,
+        'portfolio_var_1d': portfolio_var,
+        'portfolio_lvar': portfolio_lvar,
+    }
+
+
+def _value(v) -> Optional[float]:
+    """JSON 数值 (保留 6 位有效数字，无穷/缺失为 None)"""
+    return float(f"{v:.6g}") if np.isfinite(v) else None
+
+
+class LiquidityBook:
+    """当前持仓的流动性评估"""
+
+    def __init__(self, symbols: List[str], quantities: Sequence[float], values: Sequence[float],
+                 categories: List[str], cash: float = 0.0):
+        """
+        Args:
+            symbols: 持仓标的
+            quantities: 持仓数量 (股/枚)
+            values: 持仓市值 (基准货币)
+            categories: 持仓所属类别 (portfolio.json allocation 的键)
+            cash: 现金 (基准货币，视为当日可变现)
+        """
+        self.symbols = list(symbols)
+        self.quantities = np.asarray(quantities, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.categories = list(categories)
+        self.cash = float(cash)
+        self.total_value = float(self.values.sum()) + self.cash
+
+    @classmethod
+    def from_portfolio(cls, portfolio: Dict) -> 'LiquidityBook':
+        """从 portfolio.json 内容构建 (持仓市值取 value 字段，与 StressEngine 一致)"""
+        symbols, quantities, values, categories = [], [], [], []
+        cash = 0.0
+        for category, data in portfolio.get('allocation', {}).items():
+            if category == 'cash':
+                cash = data.get('value', data.get('current_value', 0))
+                continue
+            for pos in data.get('positions', []):
+                if pos.get('value', 0) <= 0:
+                    continue
+                symbols.append(pos['symbol'])
+                quantities.append(pos.get('shares') or np.nan)
+                values.append(pos['value'])
+                categories.append(category)
+        return cls(symbols, quantities, values, categories, cash)
+
+    def average_volume(self, frames: Dict[str, pd.DataFrame], window: int = DEFAULT_ADV_WINDOW) -> np.ndarray:
+        """日均成交量 (持仓数量单位；加密货币的成交额换算为数量)"""
+        volume = tail_matrix(frames, self.symbols, 'volume', window)
+        quote = np.array([s in QUOTE_VOLUME_SYMBOLS for s in self.symbols])
+        if quote.any():
+            close = tail_matrix(frames, self.symbols, 'close', window)
+            volume[:, quote] /= close[:, quote]
+        with np.errstate(invalid='ignore'):
+            return np.nanmean(np.where(volume > 0, volume, np.nan), axis=0)
+
+    def spreads(self, frames: Dict[str, pd.DataFrame],
+                window: int = DEFAULT_ADV_WINDOW) -> Tuple[np.ndarray, np.ndarray]:
+        """买卖价差代理的均值与标准差 (N,)"""
+        high = tail_matrix(frames, self.symbols, 'high', window + 1)
+        low = tail_matrix(frames, self.symbols, 'low', window + 1)
+        spread = corwin_schultz_spread(high, low)
+        with np.errstate(invalid='ignore'):
+            valid = np.isfinite(spread).sum(axis=0)
+            mean = np.where(valid > 0, np.nansum(spread, axis=0) / np.maximum(valid, 1), np.nan)
+            std = np.where(valid > 1, np.sqrt(np.nansum((spread - mean) ** 2, axis=0) /
+                                              np.maximum(valid - 1, 1)), 0.0)
+        return mean, std
+
+    def analyze(self, frames: Dict[str, pd.DataFrame], returns: np.ndarray,
+                participation: float = DEFAULT_PARTICIPATION, max_days: float = DEFAULT_MAX_DAYS,
+                window: int = DEFAULT_ADV_WINDOW, confidence: float = 0.95) -> Dict:
+        """
+        生成流动性报告
+
+        Args:
+            frames: 标的 -> 日K线 (需含 high/low/close/volume)
+            returns: 日收益率 (T, N)，列顺序与 self.symbols 一致 (缺失值按 0 处理)
+
+        Returns:
+            可直接序列化为 JSON 的报告
+        """
+        adv = self.average_volume(frames, window)
+        spread_mean, spread_std = self.spreads(frames, window)
+        m = liquidity_metrics(self.quantities, self.values, adv, spread_mean, spread_std,
+                              np.nan_to_num(returns), participation, max_days, confidence)
+
+        # 组合在各期限内可变现的市值占比 (现金当日可变现)
+        days = np.nan_to_num(m['days_to_liquidate'], nan=np.inf)
+        with np.errstate(divide='ignore'):
+            fraction = np.minimum(np.asarray(PROFILE_HORIZONS, dtype=np.float64)[:, None] /
+                                  np.where(days > 0, days, 1e-12), 1.0)
+        profile = (fraction @ self.values + self.cash) / self.total_value if self.total_value > 0 \
+            else np.zeros(len(PROFILE_HORIZONS))
+
+        holdings = []
+        for i, symbol in enumerate(self.symbols):
+            holdings.append({
+                'symbol': symbol,
+                'category': self.categories[i],
+                'value': round(float(self.values[i]), 2),
+                'quantity': _value(self.quantities[i]),
+                'adv': _value(adv[i]),
+                'adv_value': _value(m['adv_value'][i]),
+                'adv_share': _value(m['adv_share'][i]),
+                'days_to_liquidate': _value(m['days_to_liquidate'][i]),
+                'spread_bps': _value(spread_mean[i] * 1e4),
+                'var_1d': _value(m['var_1d'][i]),
+                'spread_cost': _value(m['spread_cost'][i]),
+                'lvar': _value(m['lvar'][i]),
+                'lvar_pct': _value(m['lvar'][i] / self.values[i]),
+                'max_safe_value': _value(m['max_safe_value'][i]),
+                'max_safe_quantity': _value(m['max_safe_quantity'][i]),
+                'excess_value': _value(max(self.values[i] - m['max_safe_value'][i], 0.0)
+                                       if np.isfinite(m['max_safe_value'][i]) else np.nan),
+            })
+
+        return {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'participation': participation,
+            'max_days': max_days,
+            'window': window,
+            'confidence': confidence,
+            'portfolio': {
+                'total_value': round(self.total_value, 2),
+                'cash': round(self.cash, 2),
+                'var_1d': round(m['portfolio_var_1d'], 2),
+                'spread_cost': round(float(np.nansum(m['spread_cost'])), 2),
+                'lvar': round(m['portfolio_lvar'], 2),
+                'lvar_pct': round(m['portfolio_lvar'] / self.total_value, 6) if self.total_value > 0 else 0.0,
+                'max_days_to_liquidate': _value(np.nanmax(days)) if len(days) else 0.0,
+                'liquidation_profile': {f"{h}d": round(float(p), 4) for h, p in zip(PROFILE_HORIZONS, profile)},
+                'oversized': [h['symbol'] for h in holdings if (h['excess_value'] or 0) > 0],
+            },
+            'holdings': holdings,
+        }
+
+
+def print_liquidity_report(report: Dict):
+    """打印流动性报告"""
+    p = report['portfolio']
+    print(f"\n{'='*96}")
+    print(f"💧 流动性风险 (参与率 {report['participation']*100:g}% ADV，"
+          f"安全变现期 {report['max_days']:g} 天，{report['window']} 日均量，{report['confidence']*100:.0f}% 置信度)")
+    print(f"{'='*96}")
+    print(f"{'标的':<10} {'市值':>11} {'日均成交额':>13} {'占ADV':>8} {'变现天数':>8} {'价差':>7} "
+          f"{'1日VaR':>10} {'LVaR':>10} {'安全上限':>12}")
+    print('-' * 96)
+
+    def fmt(v, spec, suffix=''):
+        if v is None:
+            return '-'
+        if 0 < v < 0.01 and spec.endswith('f'):
+            return f"<0.01{suffix}"
+        return f"{v:{spec}}{suffix}"
+
+    for h in sorted(report['holdings'], key=lambda x: -(x['days_to_liquidate'] or np.inf)):
+        flag = ' ⚠️' if (h['excess_value'] or 0) > 0 or h['days_to_liquidate'] is None else ''
+        share = fmt(h['adv_share'] * 100 if h['adv_share'] is not None else None, '.2f', '%')
+        print(f"{h['symbol']:<10} {h['value']:>11,.0f} {fmt(h['adv_value'], ',.0f'):>13} {share:>8} "
+              f"{fmt(h['days_to_liquidate'], '.2f'):>8} {fmt(h['spread_bps'], '.1f', 'bp'):>7} "
+              f"{fmt(h['var_1d'], ',.0f'):>10} {fmt(h['lvar'], ',.0f'):>10} "
+              f"{fmt(h['max_safe_value'], ',.0f'):>12}{flag}")
+    print('-' * 96)
+    print(f"组合总值 ¥{p['total_value']:,.0f} (现金 ¥{p['cash']:,.0f})")
+    print(f"   1日 VaR:      ¥{p['var_1d']:,.0f}")
+    print(f"   价差成本:     ¥{p['spread_cost']:,.0f}")
+    print(f"   流动性调整VaR: ¥{p['lvar']:,.0f} ({p['lvar_pct']*100:.2f}%)")
+    print(f"   最长变现天数: {fmt(p['max_days_to_liquidate'], '.2f')}")
+    print(f"   可变现比例:   " + ', '.join(f"{h} {v*100:.1f}%" for h, v in p['liquidation_profile'].items()))
+    if p['oversized']:
+        print(f"   ⚠️ 超过安全仓位: {', '.join(p['oversized'])}")
+    print(f"{'='*96}\n")
+
+
+def main():
+    # 延迟导入，避免作为库使用时引入数据源依赖
+    from portfolio_risk import RiskAnalyzer
+    from returns_panel import ReturnsPanel
+
+    parser = argparse.ArgumentParser(description='流动性调整 VaR 与仓位上限')
+    parser.add_argument('--portfolio-file', '-p', required=True, help='投资组合 JSON 文件路径')
+    parser.add_argument('--participation', type=float, default=DEFAULT_PARTICIPATION,
+                        help=f'单日卖出量最多占日均成交量的比例 (默认 {DEFAULT_PARTICIPATION})')
+    parser.add_argument('--max-days', type=float, default=DEFAULT_MAX_DAYS,
+                        help=f'最大安全仓位对应的变现天数 (默认 {DEFAULT_MAX_DAYS})')
+    parser.add_argument('--window', type=int, default=DEFAULT_ADV_WINDOW,
+                        help=f'日均成交量与价差的统计窗口 (默认 {DEFAULT_ADV_WINDOW})')
+    parser.add_argument('--days', type=int, default=252, help='VaR 使用的历史天数 (默认252)')
+    parser.add_argument('--confidence', type=float, default=0.95, help='置信度 (默认0.95)')
+    parser.add_argument('--demo', action='store_true', help='使用演示数据')
+    parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+
+    args = parser.parse_args()
+
+    with open(args.portfolio_file, 'r') as f:
+        portfolio = json.load(f)
+    book = LiquidityBook.from_portfolio(portfolio)
+    if not book.symbols:
+        print("❌ 没有可分析的持仓")
+        return 1
+
+    analyzer = RiskAnalyzer(use_demo=args.demo)
+    frames = analyzer.get_historical_data_many(book.symbols, max(args.days, args.window + 1))
+    panel = ReturnsPanel.from_frames(frames)
+    if not all(s in panel.symbols for s in book.symbols):
+        print("❌ 部分持仓缺少收益率数据")
+        return 1
+
+    report = book.analyze(frames, panel.select(book.symbols).returns, args.participation,
+                          args.max_days, args.window, args.confidence)
+
+    if args.output == 'json':
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_liquidity_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
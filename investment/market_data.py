@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+行情数据源注册表 - Market Data Provider Registry
+统一的 LongPort → Yahoo Finance 数据源链，供技术分析、风险分析和持仓更新脚本共用
+
+- 每个后端只创建一个长连接客户端 (LongPort QuoteContext 在首次请求时惰性创建，进程内复用)
+- 批量接口: quotes() 一次请求多只标的的实时行情，candles_many() 一次请求多只标的的K线
+  (Yahoo 用 yf.download 单次批量下载；LongPort 无批量K线接口，按令牌桶限速并发请求)
+- 限速感知: 每个后端有令牌桶和并发上限；遇到限流错误时该后端进入冷却期，期间自动降级到下一个后端
+- 单次请求超时 (含排队等待) + 暂时性错误抖动退避重试；
+  candles_many(report=[...]) 记录每个标的的数据源、结果、尝试次数与耗时
+- 自动降级: 某个后端未返回的标的交给下一个后端，全部失败时由调用方决定是否使用演示数据
+
+用法:
+    registry = get_registry()
+    quotes = registry.quotes(['MSFT.US', '700.HK'])
+    df = registry.candles('MSFT', '1d', 250)
+
+    python market_data.py --quotes MSFT 700.HK
+    python market_data.py --candles MSFT AAPL --count 10
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+import timeframes
+
+# 尝试导入 LongPort SDK
+LONGPORT_AVAILABLE = False
+try:
+    from longport.openapi import QuoteContext, Config, Period, AdjustType
+    LONGPORT_AVAILABLE = True
+except ImportError:
+    pass
+
+# 尝试导入 yfinance 作为备选
+YFINANCE_AVAILABLE = False
+try:
+    import yfinance as yf
+    YFINANCE_AVAILABLE = True
+except ImportError:
+    pass
+
+# 加密货币 (LongPort 不提供，Yahoo 使用 XXX-USD 代码)
+CRYPTO_SYMBOLS = {'BTC', 'ETH'}
+
+# 指数 (LongPort 代码 -> Yahoo 代码)
+YAHOO_INDEX_SYMBOLS = {'HSI.HK': '^HSI'}
+
+# 错误信息中的限流标志 (触发冷却)；暂时性错误 (超时、连接中断、限流、网关错误) 才会重试
+RATE_LIMIT_MARKERS = ('429', 'rate limit', 'too many')
+TRANSIENT_MARKERS = RATE_LIMIT_MARKERS + ('timed out', 'timeout', 'connection', 'temporarily',
+                                          '502', '503', '504')
+
+# K线请求: 标的 -> (K线数量, 增量起始时间)
+CandleRequests = Dict[str, Tuple[int, Optional[pd.Timestamp]]]
+
+
+@dataclass
+class Quote:
+    """实时行情 (字段名与 LongPort SecurityQuote 一致)"""
+    symbol: str
+    last_done: float
+    prev_close: float
+    open: float
+    high: float
+    low: float
+    volume: int
+    timestamp: datetime
+    source: str
+
+
+@dataclass
+class FetchOutcome:
+    """单个标的在某个数据源上的K线请求结果"""
+    symbol: str
+    provider: str
+    status: str          # ok / empty / error / timeout / skipped (限流冷却中未请求)
+    attempts: int
+    latency: float       # 秒，含重试等待
+    error: str = ''
+
+
+class RateLimiter:
+    """令牌桶限速 + 并发上限 (线程安全)"""
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        阻塞直到拿到一个令牌和一个并发槽位
+
+        timeout 秒内拿不到时抛出 TimeoutError (已拿到的槽位会归还)；None 表示一直等待
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"等待并发槽位超时 ({timeout:g}s)")
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                self._slots.release()
+                raise TimeoutError(f"等待限速令牌超时 ({timeout:g}s)")
+            time.sleep(wait)
+
+    def release(self):
+        self._slots.release()
+
+
+class MarketDataProvider:
+    """数据源基类"""
+
+    name = 'base'
+    # 单次批量行情请求的最大标的数
+    quote_batch_size = 100
+    # 触发限流后暂停使用该数据源的秒数
+    cooldown_seconds = 60.0
+    # 单次K线请求超时秒数
+    request_timeout = 15.0
+    # 失败 (错误或超时) 后的重试次数与退避基数 (秒，指数增长并加 ±50% 抖动)
+    max_retries = 2
+    retry_backoff = 0.5
+    # 超时后仍未返回 (被放弃) 的请求上限 (不超过并发上限，即全部槽位被卡住)，
+    # 达到后该数据源进入冷却期并拒绝新的带超时请求
+    max_abandoned = 8
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int):
+        self.limiter = RateLimiter(rate, burst, max_concurrency)
+        self.calls = 0
+        self.errors = 0
+        self.cooldown_until = 0.0
+        # 已超时但上游仍未返回的请求数
+        self.abandoned = 0
+        self.abandon_limit = min(self.max_abandoned, max_concurrency)
+        self._stats_lock = threading.Lock()
+
+    def available(self) -> bool:
+        """后端可用且不在限流冷却期"""
+        return time.monotonic() >= self.cooldown_until
+
+    def supports(self, symbol: str) -> bool:
+        return True
+
+    def _record_error(self, error: Exception):
+        """统计失败次数，限流错误使该数据源进入冷却期"""
+        with self._stats_lock:
+            self.errors += 1
+        message = str(error).lower()
+        if any(marker in message for marker in RATE_LIMIT_MARKERS):
+            self.cooldown_until = time.monotonic() + self.cooldown_seconds
+
+    @staticmethod
+    def retryable(error: Exception) -> bool:
+        """暂时性错误才值得重试；无效代码、权限不足等永久错误重试也不会成功"""
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        message = str(error).lower()
+        return any(marker in message for marker in TRANSIENT_MARKERS)
+
+    def call(self, fn, *args, request_timeout: Optional[float] = None, **kwargs):
+        """
+        经过限速的上游调用，统计次数并识别限流错误
+
+        request_timeout 是整次调用的预算 (含等待并发槽位和令牌)，用完时抛出 TimeoutError。
+        带超时的调用在守护线程中执行，超时后调用方不再等待 (不阻塞进程退出)，
+        但槽位直到上游真正返回才归还，在途请求数始终不超过并发上限；
+        被放弃的请求数达到 max_abandoned (或占满全部槽位) 时数据源进入冷却期，新的带超时请求直接失败
+        """
+        if request_timeout is None:
+            self.limiter.acquire()
+            with self._stats_lock:
+                self.calls += 1
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                self._record_error(e)
+                raise
+            finally:
+                self.limiter.release()
+
+        deadline = time.monotonic() + request_timeout
+        if self.abandoned >= self.abandon_limit:
+            raise TimeoutError(f"{self.name} 有 {self.abandoned} 个请求超时未返回，暂停使用")
+        try:
+            self.limiter.acquire(timeout=request_timeout)
+        except TimeoutError as e:
+            with self._stats_lock:
+                self.errors += 1
+            raise TimeoutError(f"{self.name} {e}") from None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # 预算在排队时用完，不再发起请求
+            self.limiter.release()
+            with self._stats_lock:
+                self.errors += 1
+            raise TimeoutError(f"{self.name} 请求超时 ({request_timeout:g}s)")
+        with self._stats_lock:
+            self.calls += 1
+
+        future = Future()
+        # 调用方超时放弃后置为 True，请求返回时从被放弃计数中扣除
+        abandoned = [False]
+
+        def _run():
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._stats_lock:
+                    if abandoned[0]:
+                        self.abandoned -= 1
+                    abandoned[0] = None
+                self.limiter.release()
+
+        threading.Thread(target=_run, name=f"{self.name}-call", daemon=True).start()
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeout:
+            with self._stats_lock:
+                self.errors += 1
+                # None: 请求恰好在超时后返回，槽位已归还
+                if abandoned[0] is not None:
+                    abandoned[0] = True
+                    self.abandoned += 1
+                    if self.abandoned >= self.abandon_limit:
+                        self.cooldown_until = time.monotonic() + self.cooldown_seconds
+            raise TimeoutError(f"{self.name} 请求超时 ({request_timeout:g}s)")
+        except Exception as e:
+            self._record_error(e)
+            raise
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待秒数 (指数退避 + 抖动，避免并发请求同时重试)"""
+        return self.retry_backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Quote]:
+        raise NotImplementedError
+
+    def candles(self, symbol: str, period: str, count: int,
+                since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def candles_many(self, period: str, requests: CandleRequests, max_workers: int = 8,
+                     report: Optional[List[FetchOutcome]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        默认实现: 在线程池中逐个请求 (并发受 limiter 约束)，超时或暂时性错误的标的抖动退避后重试，
+        永久错误 (无效代码、权限不足等) 记录一次后不再重试
+
+        Args:
+            report: 传入列表时追加每个标的的 FetchOutcome
+        """
+        def _fetch(item):
+            symbol, (count, since) = item
+            start = time.monotonic()
+            outcome = FetchOutcome(symbol, self.name, 'skipped', 0, 0.0)
+            df = pd.DataFrame()
+            for attempt in range(self.max_retries + 1):
+                if not MarketDataProvider.available(self):
+                    # 批量过程中触发限流: 剩余标的直接交给下一个数据源
+                    break
+                if attempt:
+                    time.sleep(self.backoff(attempt))
+                outcome.attempts += 1
+                try:
+                    df = self.candles(symbol, period, count, since)
+                except TimeoutError as e:
+                    outcome.status, outcome.error = 'timeout', str(e)
+                    continue
+                except Exception as e:
+                    outcome.status, outcome.error = 'error', str(e)
+                    if self.retryable(e):
+                        continue
+                    break
+                outcome.status, outcome.error = ('empty' if df.empty else 'ok'), ''
+                break
+            outcome.latency = time.monotonic() - start
+            return symbol, df, outcome
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_fetch, requests.items()))
+        if report is not None:
+            report.extend(outcome for _, _, outcome in results)
+        return {symbol: df for symbol, df, _ in results}
+
+
+def _frame(rows: List[Dict]) -> pd.DataFrame:
+    """K线记录 -> 按时间升序的 DataFrame"""
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    df['date'] = pd.to_datetime(df['date'])
+    return df.sort_values('date').reset_index(drop=True)
+
+
+class LongPortProvider(MarketDataProvider):
+    """LongPort OpenAPI (官方限制约 10 次/秒、5 个并发)"""
+
+    name = 'longport'
+    quote_batch_size = 500
+
+    def __init__(self, rate: float = 10.0, burst: int = 10, max_concurrency: int = 5):
+        super().__init__(rate, burst, max_concurrency)
+        self._ctx = None
+        self._ctx_error = None
+        self._ctx_lock = threading.Lock()
+
+    @property
+    def ctx(self):
+        """进程内共享的 QuoteContext，首次使用时创建；配置失败后不再重试"""
+        if self._ctx is None and self._ctx_error is None:
+            with self._ctx_lock:
+                if self._ctx is None and self._ctx_error is None:
+                    try:
+                        self._ctx = QuoteContext(Config.from_env())
+                    except Exception as e:
+                        self._ctx_error = e
+                        print(f"⚠️  LongPort API 配置失败: {e}")
+                        print(f"💡 将使用备选数据源")
+        return self._ctx
+
+    def available(self) -> bool:
+        return LONGPORT_AVAILABLE and super().available() and self.ctx is not None
+
+    def supports(self, symbol: str) -> bool:
+        return symbol not in CRYPTO_SYMBOLS
+
+    @staticmethod
+    def api_symbol(symbol: str) -> str:
+        """MSFT -> MSFT.US，其余原样返回"""
+        if '.' not in symbol and symbol.isalpha():
+            return f"{symbol}.US"
+        return symbol
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Quote]:
+        api_symbols = {self.api_symbol(s): s for s in symbols}
+        names = list(api_symbols)
+        result = {}
+        for i in range(0, len(names), self.quote_batch_size):
+            for q in self.call(self.ctx.quote, names[i:i + self.quote_batch_size]):
+                symbol = api_symbols.get(q.symbol, q.symbol)
+                result[symbol] = Quote(
+                    symbol=symbol,
+                    last_done=float(q.last_done),
+                    prev_close=float(q.prev_close),
+                    open=float(q.open),
+                    high=float(q.high),
+                    low=float(q.low),
+                    volume=int(q.volume),
+                    timestamp=q.timestamp,
+                    source=self.name,
+                )
+        return result
+
+    def candles(self, symbol: str, period: str, count: int,
+                since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        period = timeframes.normalize(period)
+        lp_period = getattr(Period, timeframes.LONGPORT_PERIODS[period])
+        candles = self.call(self.ctx.candlesticks, self.api_symbol(symbol), lp_period,
+                            count, AdjustType.ForwardAdjust, request_timeout=self.request_timeout)
+        return _frame([{
+            'date': c.timestamp,
+            'open': float(c.open),
+            'high': float(c.high),
+            'low': float(c.low),
+            'close': float(c.close),
+            'volume': int(c.volume),
+        } for c in candles or []])
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance (非官方接口，保守限速)"""
+
+    name = 'yfinance'
+    quote_batch_size = 200
+    # 批量下载一次请求全部标的，超时放宽
+    request_timeout = 60.0
+
+    def __init__(self, rate: float = 2.0, burst: int = 4, max_concurrency: int = 4):
+        super().__init__(rate, burst, max_concurrency)
+
+    def available(self) -> bool:
+        return YFINANCE_AVAILABLE and super().available()
+
+    @staticmethod
+    def api_symbol(symbol: str) -> str:
+        """MSFT.US -> MSFT, 700.HK -> 0700.HK, BTC -> BTC-USD, HSI.HK -> ^HSI"""
+        if symbol in CRYPTO_SYMBOLS:
+            return f"{symbol}-USD"
+        if symbol in YAHOO_INDEX_SYMBOLS:
+            return YAHOO_INDEX_SYMBOLS[symbol]
+        if symbol.endswith('.US'):
+            return symbol[:-3]
+        code, _, market = symbol.partition('.')
+        if market == 'HK' and code.isdigit():
+            return f"{code.zfill(4)}.HK"
+        return symbol
+
+    @staticmethod
+    def _start_date(period: str, count: int, since: Optional[pd.Timestamp]) -> datetime:
+        """按K线数量估算起始日期 (多一些余量，Yahoo 小时线最多回溯 730 天)"""
+        if since is not None:
+            return since.to_pydatetime()
+        span = count * timeframes.CALENDAR_DAYS_PER_BAR[period]
+        if timeframes.is_finer(period, '1d'):
+            span = min(span, 729)
+        return datetime.now() - timedelta(days=span)
+
+    @staticmethod
+    def _history_frame(hist: pd.DataFrame, count: int) -> pd.DataFrame:
+        hist = hist.dropna(subset=['Close'])
+        if hist.empty:
+            return pd.DataFrame()
+        df = pd.DataFrame({
+            'date': pd.to_datetime(hist.index),
+            'open': hist['Open'].to_numpy(dtype=np.float64),
+            'high': hist['High'].to_numpy(dtype=np.float64),
+            'low': hist['Low'].to_numpy(dtype=np.float64),
+            'close': hist['Close'].to_numpy(dtype=np.float64),
+            'volume': hist['Volume'].fillna(0).to_numpy(dtype=np.int64),
+        })
+        df = df.sort_values('date').reset_index(drop=True)
+        return df.tail(count).reset_index(drop=True)
+
+    def _download(self, symbols: List[str], request_timeout: Optional[float] = None,
+                  **kwargs) -> Dict[str, pd.DataFrame]:
+        """一次 yf.download 批量下载，返回 原始代码 -> 历史数据"""
+        tickers = {self.api_symbol(s): s for s in symbols}
+        data = self.call(yf.download, list(tickers), group_by='ticker', auto_adjust=True,
+                         progress=False, threads=True, request_timeout=request_timeout, **kwargs)
+        if data is None or data.empty:
+            return {}
+        result = {}
+        for ticker, symbol in tickers.items():
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                result[symbol] = data[ticker]
+            else:
+                result[symbol] = data
+        return result
+
+    def quotes(self, symbols: List[str]) -> Dict[str, Quote]:
+        result = {}
+        for i in range(0, len(symbols), self.quote_batch_size):
+            batch = symbols[i:i + self.quote_batch_size]
+            for symbol, hist in self._download(batch, period='5d', interval='1d').items():
+                hist = hist.dropna(subset=['Close'])
+                if hist.empty:
+                    continue
+                last = hist.iloc[-1]
+                prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else last['Close']
+                result[symbol] = Quote(
+                    symbol=symbol,
+                    last_done=float(last['Close']),
+                    prev_close=float(prev_close),
+                    open=float(last['Open']),
+                    high=float(last['High']),
+                    low=float(last['Low']),
+                    volume=int(last['Volume']) if not np.isnan(last['Volume']) else 0,
+                    timestamp=pd.Timestamp(hist.index[-1]).to_pydatetime(),
+                    source=self.name,
+                )
+        return result
+
+    def candles(self, symbol: str, period: str, count: int,
+                since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        period = timeframes.normalize(period)
+        ticker = yf.Ticker(self.api_symbol(symbol))
+        hist = self.call(ticker.history, start=self._start_date(period, count, since),
+                         end=datetime.now(), interval=timeframes.YFINANCE_INTERVALS[period],
+                         request_timeout=self.request_timeout)
+        if hist is None or hist.empty:
+            return pd.DataFrame()
+        return self._history_frame(hist, count)
+
+    def candles_many(self, period: str, requests: CandleRequests, max_workers: int = 8,
+                     report: Optional[List[FetchOutcome]] = None) -> Dict[str, pd.DataFrame]:
+        """所有标的合并为一次下载，起始日期取各请求中最早的 (超时或暂时性错误时整批抖动退避重试)"""
+        if not requests:
+            return {}
+        period = timeframes.normalize(period)
+        start = min(self._start_date(period, count, since) for count, since in requests.values())
+        began = time.monotonic()
+        data, status, error, attempts = {}, 'skipped', '', 0
+        for attempt in range(self.max_retries + 1):
+            if not MarketDataProvider.available(self):
+                break
+            if attempt:
+                time.sleep(self.backoff(attempt))
+            attempts += 1
+            try:
+                data = self._download(list(requests), start=start, end=datetime.now(),
+                                      interval=timeframes.YFINANCE_INTERVALS[period],
+                                      request_timeout=self.request_timeout)
+            except TimeoutError as e:
+                status, error = 'timeout', str(e)
+                continue
+            except Exception as e:
+                status, error = 'error', str(e)
+                if self.retryable(e):
+                    continue
+                break
+            status, error = 'ok', ''
+            break
+
+        frames = {symbol: self._history_frame(hist, requests[symbol][0])
+                  for symbol, hist in data.items()}
+        if report is not None:
+            latency = time.monotonic() - began
+            for symbol in requests:
+                df = frames.get(symbol)
+                symbol_status = status
+                if status == 'ok' and (df is None or df.empty):
+                    symbol_status = 'empty'
+                report.append(FetchOutcome(symbol, self.name, symbol_status, attempts, latency, error))
+        return frames
+
+
+class MarketDataRegistry:
+    """按优先级排列的数据源链，逐级降级"""
+
+    def __init__(self, providers: Optional[List[MarketDataProvider]] = None):
+        self.providers = providers if providers is not None else [LongPortProvider(), YFinanceProvider()]
+
+    def _active(self) -> List[MarketDataProvider]:
+        return [p for p in self.providers if p.available()]
+
+    def quotes(self, symbols: List[str]) -> List[Quote]:
+        """
+        批量获取实时行情，每个数据源只对尚未取到的标的发起一次批量请求
+
+        Returns:
+            按输入顺序排列的 Quote 列表 (取不到的标的不包含在内)
+        """
+        pending = list(dict.fromkeys(symbols))
+        found: Dict[str, Quote] = {}
+        for provider in self._active():
+            batch = [s for s in pending if provider.supports(s)]
+            if not batch:
+                continue
+            try:
+                found.update(provider.quotes(batch))
+            except Exception as e:
+                print(f"⚠️  {provider.name} 行情获取失败: {e}")
+            pending = [s for s in pending if s not in found]
+            if not pending:
+                break
+        return [found[s] for s in symbols if s in found]
+
+    def candles(self, symbol: str, period: str = '1d', count: int = 100,
+                since: Optional[pd.Timestamp] = None, min_len: int = 1) -> pd.DataFrame:
+        """
+        获取单个标的K线，数据不足 min_len 根时降级到下一个数据源
+
+        Returns:
+            DataFrame(date, open, high, low, close, volume)，全部失败时为空
+        """
+        for provider in self._active():
+            if not provider.supports(symbol):
+                continue
+            try:
+                df = provider.candles(symbol, period, count, since)
+            except Exception:
+                continue
+            if not df.empty and len(df) >= min_len:
+                return df
+        return pd.DataFrame()
+
+    def candles_many(self, period: str, requests: CandleRequests, min_len: int = 1,
+                     max_workers: int = 8,
+                     report: Optional[List[FetchOutcome]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取K线: 每个数据源只处理上一级未取到的标的
+
+        Args:
+            period: K线周期
+            requests: 标的 -> (K线数量, 增量起始时间)
+            min_len: 全量请求 (起始时间为 None) 至少需要的K线数
+            max_workers: 逐个请求的数据源 (LongPort) 的线程数，实际并发另受各数据源限速约束
+            report: 传入列表时按请求顺序追加每个数据源对每个标的的 FetchOutcome
+
+        Returns:
+            标的 -> DataFrame，取不到的标的不包含在内
+        """
+        pending = dict(requests)
+        found: Dict[str, pd.DataFrame] = {}
+        for provider in self._active():
+            batch = {s: r for s, r in pending.items() if provider.supports(s)}
+            if not batch:
+                continue
+            for symbol, df in provider.candles_many(period, batch, max_workers, report).items():
+                required = 1 if pending[symbol][1] is not None else min_len
+                if not df.empty and len(df) >= required:
+                    found[symbol] = df
+            pending = {s: r for s, r in pending.items() if s not in found}
+            if not pending:
+                break
+        return found
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各数据源的上游请求次数与失败次数"""
+        return {p.name: {'calls': p.calls, 'errors': p.errors} for p in self.providers}
+
+
+_registry: Optional[MarketDataRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> MarketDataRegistry:
+    """进程内共享的数据源注册表"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MarketDataRegistry()
+    return _registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description='行情数据源注册表')
+    parser.add_argument('--quotes', nargs='+', metavar='SYMBOL', help='批量获取实时行情')
+    parser.add_argument('--candles', nargs='+', metavar='SYMBOL', help='批量获取K线')
+    parser.add_argument('--period', default='1d', help='K线周期 (默认: 1d)')
+    parser.add_argument('--count', type=int, default=10, help='K线数量 (默认: 10)')
+
+    args = parser.parse_args()
+    if not args.quotes and not args.candles:
+        parser.print_help()
+        return 1
+
+    registry = get_registry()
+    if args.quotes:
+        quotes = registry.quotes(args.quotes)
+        for q in quotes:
+            print(f"{q.symbol:<10} {q.last_done:>12.2f} (昨收 {q.prev_close:.2f})  [{q.source}]")
+        missing = set(args.quotes) - {q.symbol for q in quotes}
+        if missing:
+            print(f"⚠️  未取到行情: {', '.join(sorted(missing))}")
+
+    if args.candles:
+        report: List[FetchOutcome] = []
+        frames = registry.candles_many(args.period, {s: (args.count, None) for s in args.candles},
+                                       report=report)
+        for symbol in args.candles:
+            df = frames.get(symbol)
+            if df is None:
+                print(f"⚠️  {symbol}: 无数据")
+                continue
+            print(f"\n{symbol} ({len(df)} 根 {args.period} K线)")
+            print(df.to_string(index=False))
+
+        print(f"\n⏱️  请求明细:")
+        for o in report:
+            error = f"  {o.error.splitlines()[0]}" if o.error else ""
+            print(f"   {o.symbol:<10} {o.provider:<9} {o.status:<8} {o.attempts} 次 {o.latency:>6.2f}s{error}")
+
+    print(f"\n📡 上游请求: " + ", ".join(
+        f"{name} {s['calls']} 次 (失败 {s['errors']})" for name, s in registry.stats().items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
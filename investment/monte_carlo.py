@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+蒙特卡洛组合 VaR/CVaR 引擎 - Monte Carlo Portfolio VaR Engine
+在对齐后的日收益率矩阵上模拟组合未来 N 日的收益分布，计算组合 VaR/CVaR 及各持仓的边际/成分 VaR
+
+情景生成:
+- normal: 多元正态，Cholesky 分解协方差产生相关冲击
+- t:      多元 Student-t (同一情景内各资产共享卡方因子，保留尾部相关)，自由度按峰度估计
+- fhs:    过滤历史模拟，按 EWMA 波动率标准化历史残差后整行重抽样，再按当前波动率逐日递推放大
+
+实现要点:
+- 模拟对数收益率，多日按资产累加后再转为简单收益 (价格不会跌破 0)，组合按买入持有权重计算
+- 路径分块生成，每块内存不超过 max_elements 个 float64，10 万条路径 × 多日 × 多资产不会占满内存
+- 只保留组合亏损最大的尾部路径 (单遍)，成分 VaR/CVaR 用 Euler 分配:
+  成分 CVaR = 尾部路径上该持仓贡献的均值 (求和等于组合 CVaR)，
+  成分 VaR = VaR 分位附近路径上该持仓贡献的均值 (按比例缩放到组合 VaR)
+
+用法:
+    engine = MonteCarloEngine(returns, weights, method='t', paths=100000, horizon=10)
+    result = engine.run(confidences=(0.95, 0.99))
+
+    python monte_carlo.py --portfolio-file data/portfolio.json --demo --method t --horizon 10
+"""
+
+import argparse
+import math
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+from covariance import METHODS as COV_METHODS, estimate as estimate_covariance
+
+METHODS = ('normal', 't', 'fhs')
+
+# 每块路径最多占用的 float64 元素数 (约 32MB)
+DEFAULT_MAX_ELEMENTS = 4_000_000
+
+# RiskMetrics 风格的 EWMA 衰减因子
+EWMA_LAMBDA = 0.94
+
+
+def _cholesky(cov: np.ndarray) -> np.ndarray:
+    """Cholesky 分解；协方差非正定 (如成对完整样本估计) 时先把特征值截断为正"""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        floor = max(values.max(), 1e-12) * 1e-10
+        fixed = (vectors * np.maximum(values, floor)) @ vectors.T
+        return np.linalg.cholesky((fixed + fixed.T) / 2)
+
+
+def estimate_t_dof(returns: np.ndarray) -> float:
+    """
+    按超额峰度估计 Student-t 自由度 (矩估计: 超额峰度 = 6 / (ν - 4))
+
+    取各资产超额峰度的均值，结果限制在 [3, 30]
+    """
+    centered = returns - returns.mean(axis=0)
+    var = (centered ** 2).mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        excess = (centered ** 4).mean(axis=0) / var ** 2 - 3.0
+    excess = float(np.nanmean(excess)) if np.isfinite(excess).any() else 0.0
+    if excess <= 0:
+        return 30.0
+    return float(np.clip(4.0 + 6.0 / excess, 3.0, 30.0))
+
+
+def ewma_filter(returns: np.ndarray, lam: float = EWMA_LAMBDA) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    EWMA 波动率过滤
+
+    Returns:
+        (标准化残差 (T, N), 下一日方差预测 (N,))
+    """
+    centered = returns - returns.mean(axis=0)
+    var = centered.var(axis=0)
+    var = np.where(var > 0, var, 1e-12)
+    residuals = np.empty_like(centered)
+    for t in range(len(centered)):
+        residuals[t] = centered[t] / np.sqrt(var)
+        var = lam * var + (1.0 - lam) * centered[t] ** 2
+    return residuals, var
+
+
+def _suffix(confidence: float) -> str:
+    """0.95 -> '95', 0.975 -> '97.5'"""
+    return f"{confidence * 100:g}"
+
+
+class MonteCarloEngine:
+    """组合收益蒙特卡洛模拟"""
+
+    def __init__(self, returns: np.ndarray, weights: Sequence[float], method: str = 'normal',
+                 paths: int = 100_000, horizon: int = 1, seed: Optional[int] = None,
+                 dof: Optional[float] = None, max_elements: int = DEFAULT_MAX_ELEMENTS,
+                 cov_method: str = 'sample'):
+        """
+        Args:
+            returns: 日简单收益率矩阵 (T, N)，含缺失值的日期会被跳过
+            weights: 持仓权重 (N,)
+            method: 'normal' / 't' / 'fhs'
+            paths: 模拟路径数
+            horizon: 持有期 (交易日)
+            seed: 随机种子
+            dof: Student-t 自由度 (None 时按峰度估计，须大于 2 才有有限方差)
+            max_elements: 每块路径占用的 float64 元素上限
+            cov_method: normal/t 情景的协方差估计方法 (见 covariance.py)
+        """
+        if method not in METHODS:
+            raise ValueError(f"method 必须是 {METHODS} 之一")
+        if dof is not None and not dof > 2:
+            raise ValueError(f"Student-t 自由度必须大于 2 (当前 {dof})")
+        returns = np.asarray(returns, dtype=np.float64)
+        returns = returns[~np.isnan(returns).any(axis=1)]
+        if len(returns) < 2:
+            raise ValueError("有效收益率样本不足")
+
+        self.log_returns = np.ascontiguousarray(np.log1p(returns))
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.method = method
+        self.paths = int(paths)
+        self.horizon = max(int(horizon), 1)
+        self.rng = np.random.default_rng(seed)
+
+        n_assets = self.log_returns.shape[1]
+        self.chunk_size = max(1, min(self.paths, max_elements // max(n_assets, 1)))
+
+        self.mu = self.log_returns.mean(axis=0)
+        self.dof = None
+        if method in ('normal', 't'):
+            cov = estimate_covariance(self.log_returns, cov_method)
+            self.chol = _cholesky(cov)
+            if method == 't':
+                self.dof = float(dof) if dof is not None else estimate_t_dof(self.log_returns)
+        else:
+            self.residuals, self.next_var = ewma_filter(self.log_returns)
+
+    def _simulate_chunk(self, n: int) -> np.ndarray:
+        """生成 n 条路径的持有期资产简单收益 (n, N)"""
+        n_assets = len(self.mu)
+        total = np.zeros((n, n_assets))
+
+        if self.method == 'fhs':
+            var = np.broadcast_to(self.next_var, (n, n_assets)).copy()
+            for _ in range(self.horizon):
+                shocks = self.residuals[self.rng.integers(0, len(self.residuals), n)] * np.sqrt(var)
+                total += self.mu + shocks
+                var = EWMA_LAMBDA * var + (1.0 - EWMA_LAMBDA) * shocks ** 2
+        else:
+            for _ in range(self.horizon):
+                shocks = self.rng.standard_normal((n, n_assets)) @ self.chol.T
+                if self.method == 't':
+                    # 缩放后协方差仍为 Σ: E[(ν-2)/W] = 1
+                    w = self.rng.chisquare(self.dof, n)
+                    shocks *= np.sqrt((self.dof - 2.0) / w)[:, None]
+                total += self.mu + shocks
+
+        return np.expm1(total)
+
+    def run(self, confidences: Sequence[float] = (0.95, 0.99)) -> Dict:
+        """
+        运行模拟
+
+        Returns:
+            Dict: 组合 VaR/CVaR (负值表示亏损) 及各持仓的边际/成分 VaR、成分 CVaR
+        """
+        start = time.perf_counter()
+        confidences = sorted(confidences)
+        tail = int(math.ceil(self.paths * (1 - confidences[0])))
+        band = max(self.paths // 1000, 10)
+        keep = min(self.paths, tail + band)
+
+        tail_pnl = np.empty(0)
+        tail_contrib = np.empty((0, len(self.weights)))
+        total = total_sq = 0.0
+
+        done = 0
+        while done < self.paths:
+            n = min(self.chunk_size, self.paths - done)
+            contrib = self._simulate_chunk(n) * self.weights
+            pnl = contrib.sum(axis=1)
+            total += pnl.sum()
+            total_sq += (pnl * pnl).sum()
+
+            # 合并本块与已有尾部，只保留最差的 keep 条路径
+            pnl = np.concatenate([tail_pnl, pnl])
+            contrib = np.concatenate([tail_contrib, contrib])
+            if len(pnl) > keep:
+                idx = np.argpartition(pnl, keep - 1)[:keep]
+                pnl, contrib = pnl[idx], contrib[idx]
+            tail_pnl, tail_contrib = pnl, contrib
+            done += n
+
+        order = np.argsort(tail_pnl)
+        tail_pnl, tail_contrib = tail_pnl[order], tail_contrib[order]
+
+        mean = total / self.paths
+        result = {
+            'method': self.method,
+            'paths': self.paths,
+            'horizon_days': self.horizon,
+            'expected_return': round(mean, 6),
+            'volatility': round(math.sqrt(max(total_sq / self.paths - mean * mean, 0.0)), 6),
+        }
+        if self.dof is not None:
+            result['t_dof'] = round(self.dof, 2)
+
+        components: List[Dict] = [{'weight': round(float(w), 4)} for w in self.weights]
+        for confidence in confidences:
+            suffix = _suffix(confidence)
+            k = max(int(math.ceil(self.paths * (1 - confidence))), 1)
+            var = tail_pnl[k - 1]
+            cvar = tail_pnl[:k].mean()
+            result[f'var_{suffix}'] = round(float(var), 6)
+            result[f'cvar_{suffix}'] = round(float(cvar), 6)
+
+            # Euler 分配
+            near = tail_contrib[max(k - 1 - band, 0):k + band].mean(axis=0)
+            near_sum = near.sum()
+            component_var = near * (var / near_sum) if near_sum != 0 else near
+            component_cvar = tail_contrib[:k].mean(axis=0)
+            for i, comp in enumerate(components):
+                w = self.weights[i]
+                comp[f'marginal_var_{suffix}'] = round(float(component_var[i] / w), 6) if w else 0.0
+                comp[f'component_var_{suffix}'] = round(float(component_var[i]), 6)
+                comp[f'component_cvar_{suffix}'] = round(float(component_cvar[i]), 6)
+                comp[f'var_contribution_{suffix}'] = round(float(component_var[i] / var), 4) if var else 0.0
+
+        result['components'] = components
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        return result
+
+
+def print_mc_report(result: Dict, symbols: List[str], portfolio_value: float = 0):
+    """打印蒙特卡洛 VaR 报告"""
+    confidences = sorted(k[4:] for k in result if k.startswith('var_'))
+
+    print(f"\n{'='*70}")
+    print(f"🎲 蒙特卡洛组合 VaR ({result['method']}, {result['paths']:,} 条路径, "
+          f"持有期 {result['horizon_days']} 天)")
+    print(f"{'='*70}")
+    if 't_dof' in result:
+        print(f"Student-t 自由度: {result['t_dof']}")
+    print(f"预期收益: {result['expected_return']*100:>8.3f}%   波动率: {result['volatility']*100:>8.3f}%")
+    for suffix in confidences:
+        var, cvar = result[f'var_{suffix}'], result[f'cvar_{suffix}']
+        line = f"VaR ({suffix}%): {var*100:>8.3f}%   CVaR ({suffix}%): {cvar*100:>8.3f}%"
+        if portfolio_value > 0:
+            line += f"   (${abs(var) * portfolio_value:,.0f} / ${abs(cvar) * portfolio_value:,.0f})"
+        print(line)
+
+    suffix = confidences[0]
+    print(f"\n{'标的':<10} {'权重':>8} {'边际VaR':>10} {'成分VaR':>10} {'成分CVaR':>10} {'VaR占比':>8}")
+    print('-' * 62)
+    for symbol, comp in zip(symbols, result['components']):
+        print(f"{symbol:<10} {comp['weight']*100:>7.2f}% "
+              f"{comp[f'marginal_var_{suffix}']*100:>9.3f}% "
+              f"{comp[f'component_var_{suffix}']*100:>9.3f}% "
+              f"{comp[f'component_cvar_{suffix}']*100:>9.3f}% "
+              f"{comp[f'var_contribution_{suffix}']*100:>7.1f}%")
+    print(f"\n耗时: {result['seconds']:.2f}s")
+    print(f"{'='*70}\n")
+
+
+def main():
+    # 延迟导入，避免作为库使用时引入数据源依赖
+    import json
+    from portfolio_risk import RiskAnalyzer
+
+    parser = argparse.ArgumentParser(description='蒙特卡洛组合 VaR/CVaR')
+    parser.add_argument('--portfolio-file', '-p', required=True, help='投资组合 JSON 文件路径')
+    parser.add_argument('--days', '-d', type=int, default=252, help='历史数据天数 (默认252)')
+    parser.add_argument('--method', '-m', choices=METHODS, default='t', help='情景生成方法 (默认 t)')
+    parser.add_argument('--paths', type=int, default=100_000, help='模拟路径数 (默认100000)')
+    parser.add_argument('--horizon', type=int, default=1, help='持有期交易日数 (默认1)')
+    parser.add_argument('--seed', type=int, help='随机种子')
+    parser.add_argument('--cov-method', choices=COV_METHODS, default='sample',
+                        help='normal/t 情景的协方差估计方法 (默认 sample)')
+    parser.add_argument('--demo', action='store_true', help='使用演示数据')
+    parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+
+    args = parser.parse_args()
+
+    analyzer = RiskAnalyzer(use_demo=args.demo)
+    symbols, weights, _, total_value = analyzer.load_positions(args.portfolio_file)
+    if not symbols:
+        print("❌ 组合中没有可分析的持仓")
+        return 1
+
+    panel = analyzer.returns_panel(symbols, args.days)
+    weights = np.array([weights[symbols.index(s)] for s in panel.symbols])
+
+    engine = MonteCarloEngine(panel.returns, weights / weights.sum(), method=args.method,
+                              paths=args.paths, horizon=args.horizon, seed=args.seed,
+                              cov_method=args.cov_method)
+    result = engine.run()
+
+    if args.output == 'json':
+        result['components'] = dict(zip(panel.symbols, result['components']))
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        print_mc_report(result, panel.symbols, total_value)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+多标的面板指标 - Panel Technical Indicators
+在 (标的数, K线数) 的二维 NumPy 面板上一次性计算 MA/EMA/RSI/MACD/布林带/ATR
+
+面板按最新K线右对齐，历史较短的标的左侧用 NaN 填充；
+所有指标按行独立计算，与 TechnicalAnalyzer 的单标的结果一致。
+"""
+
+import sys
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+import indicator_kernels
+
+
+def stack_panel(series: List[np.ndarray], length: int = None) -> np.ndarray:
+    """
+    将多个一维序列右对齐堆叠为二维面板
+
+    Args:
+        series: 每个标的的一维数组 (按时间升序)
+        length: 面板列数，默认取最长序列长度；更长的序列只保留最近 length 个
+
+    Returns:
+        shape = (len(series), length) 的 float64 数组，缺失位置为 NaN
+    """
+    if length is None:
+        length = max((len(s) for s in series), default=0)
+    panel = np.full((len(series), length), np.nan)
+    for i, values in enumerate(series):
+        values = np.asarray(values, dtype=np.float64)[-length:]
+        if len(values):
+            panel[i, length - len(values):] = values
+    return panel
+
+
+def _rolling_sums(panel: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """滚动求和与窗口内有效值数量 (基于累加和，NaN 视为缺失)"""
+    valid = ~np.isnan(panel)
+    filled = np.where(valid, panel, 0.0)
+
+    n_rows, n_cols = panel.shape
+    csum = np.zeros((n_rows, n_cols + 1))
+    ccount = np.zeros((n_rows, n_cols + 1))
+    np.cumsum(filled, axis=1, out=csum[:, 1:])
+    np.cumsum(valid, axis=1, out=ccount[:, 1:])
+
+    sums = np.full(panel.shape, np.nan)
+    counts = np.zeros(panel.shape)
+    if window <= n_cols:
+        sums[:, window - 1:] = csum[:, window:] - csum[:, :-window]
+        counts[:, window - 1:] = ccount[:, window:] - ccount[:, :-window]
+    return sums, counts
+
+
+def rolling_mean(panel: np.ndarray, window: int) -> np.ndarray:
+    """滚动均值，窗口不完整时为 NaN"""
+    sums, counts = _rolling_sums(panel, window)
+    return np.where(counts == window, sums / window, np.nan)
+
+
+def rolling_std(panel: np.ndarray, window: int) -> np.ndarray:
+    """滚动样本标准差 (ddof=1)，窗口不完整时为 NaN"""
+    # 先减去每行均值再累加平方，避免价格量级较大时的精度损失
+    with np.errstate(all='ignore'):
+        offset = np.nanmean(panel, axis=1, keepdims=True)
+    centered = panel - np.nan_to_num(offset)
+    sums, counts = _rolling_sums(centered, window)
+    sq_sums, _ = _rolling_sums(centered * centered, window)
+    with np.errstate(invalid='ignore'):
+        var = (sq_sums - sums * sums / window) / (window - 1)
+    return np.where(counts == window, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def ema(panel: np.ndarray, span: int) -> np.ndarray:
+    """
+    指数移动平均 (adjust=False)
+
+    每行从第一个有效值开始初始化；按列交给 pandas ewm 的 C 实现一次递推全部标的
+    """
+    frame = pd.DataFrame(panel.T, copy=False)
+    return frame.ewm(span=span, adjust=False).mean().to_numpy().T
+
+
+def rsi(close: np.ndarray, period: int = 14) -> np.ndarray:
+    """Wilder RSI (见 indicator_kernels.rsi)"""
+    return indicator_kernels.rsi(close, period)
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD 线、信号线、柱状图"""
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def bollinger(close: np.ndarray, period: int = 20,
+              std_dev: float = 2.0) -> Dict[str, np.ndarray]:
+    """布林带中轨、上轨、下轨、带宽与 %B"""
+    middle = rolling_mean(close, period)
+    std = rolling_std(close, period)
+    upper = middle + std * std_dev
+    lower = middle - std * std_dev
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = (close - lower) / (upper - lower)
+    return {
+        'BB_Middle': middle,
+        'BB_Upper': upper,
+        'BB_Lower': lower,
+        'BB_Width': upper - lower,
+        'BB_Percent': percent,
+    }
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+        period: int = 14) -> np.ndarray:
+    """Wilder ATR (见 indicator_kernels.atr)"""
+    return indicator_kernels.atr(high, low, close, period)
+
+
+def composite_score(close: np.ndarray, ma_fast: np.ndarray, ma_slow: np.ndarray,
+                    rsi_values: np.ndarray, macd_line: np.ndarray,
+                    macd_signal: np.ndarray, bb_percent: np.ndarray,
+                    rsi_low: float = 30.0, rsi_high: float = 70.0,
+                    bb_low: float = 0.1, bb_high: float = 0.9) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    综合评分 (与 TechnicalAnalyzer.generate_signals 的打分规则一致)
+
+    MA、RSI、MACD、布林带各贡献 +1/0/-1，缺失指标不计入因子数。
+    适用于任意形状的数组 (单标的序列、多标的面板均可)；
+    阈值参数也可以是数组，按广播规则一次评估多组参数 (用于参数扫描)。
+
+    Returns:
+        (归一化评分, 有效因子数)，无有效因子处评分为 NaN
+    """
+    shape = np.broadcast_shapes(np.shape(close), np.shape(rsi_low), np.shape(rsi_high),
+                                np.shape(bb_low), np.shape(bb_high))
+    score = np.zeros(shape)
+    factors = np.zeros(shape)
+
+    has_ma = ~np.isnan(ma_fast) & ~np.isnan(ma_slow)
+    score += np.where(has_ma, np.where(ma_fast > ma_slow, 1.0, -1.0), 0.0)
+    factors += has_ma
+
+    has_rsi = ~np.isnan(rsi_values)
+    score += np.where(has_rsi & (rsi_values < rsi_low), 1.0, 0.0)
+    score -= np.where(has_rsi & (rsi_values > rsi_high), 1.0, 0.0)
+    factors += has_rsi
+
+    has_macd = ~np.isnan(macd_line)
+    score += np.where(has_macd, np.where(macd_line > macd_signal, 1.0, -1.0), 0.0)
+    factors += has_macd
+
+    has_bb = ~np.isnan(bb_percent)
+    score += np.where(has_bb & (bb_percent < bb_low), 1.0, 0.0)
+    score -= np.where(has_bb & (bb_percent > bb_high), 1.0, 0.0)
+    factors += has_bb
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = np.where(factors > 0, score / factors, np.nan)
+    return normalized, factors
+
+
+def classify_score(score: np.ndarray, threshold: float = 0.3) -> np.ndarray:
+    """评分 -> 信号状态: 1=BULLISH, -1=BEARISH, 0=NEUTRAL"""
+    return np.where(score > threshold, 1, np.where(score < -threshold, -1, 0)).astype(np.int8)
+
+
+def compute_panel(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                  ma_periods: List[int] = [5, 10, 20, 60],
+                  ema_periods: List[int] = [12, 26], rsi_period: int = 14,
+                  macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
+                  bb_period: int = 20, bb_std: float = 2.0,
+                  atr_period: int = 14) -> Dict[str, np.ndarray]:
+    """
+    对整个面板一次性计算全部指标
+
+    Returns:
+        Dict: 指标名 -> 与 close 同形状的二维数组
+    """
+    result = {}
+    for period in ma_periods:
+        result[f'MA{period}'] = rolling_mean(close, period)
+    for period in ema_periods:
+        result[f'EMA{period}'] = ema(close, period)
+    result['RSI'] = rsi(close, rsi_period)
+    result['MACD'], result['MACD_Signal'], result['MACD_Histogram'] = macd(
+        close, macd_fast, macd_slow, macd_signal)
+    result.update(bollinger(close, bb_period, bb_std))
+    result['ATR'] = atr(high, low, close, atr_period)
+    return result
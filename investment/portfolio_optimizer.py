@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+组合优化器 - Portfolio Optimizer
+在 RiskAnalyzer 的对齐收益率面板上求解 "大仓稳健，小仓爆发" 组合的目标权重
+
+方法:
+- mean_variance: 最大化 w'μ - λ/2 · w'Σw
+- risk_parity:   风险资产等风险贡献 (现金比例保持当前值，限制在约束允许的范围内)
+- min_cvar:      Rockafellar-Uryasev 线性规划，最小化历史情景下的 CVaR
+
+约束 (来自 portfolio.json):
+- allocation.<类别>.target_ratio   如 "40-50%"，类别内权重之和的上下限 (现金类别同样适用)
+- risk_management.max_single_core / max_single_satellite   单只核心/卫星持仓上限
+- risk_management.max_offensive   核心 + 卫星合计上限
+- 权重非负，合计为 1 (含现金)
+
+协方差及其 Cholesky 因子在构建优化器时计算一次，之后的 what-if 求解 (改区间、改风险厌恶系数、
+排除标的) 都复用同一份分解，调仓讨论时每次求解在毫秒级完成。
+
+用法:
+    optimizer = PortfolioOptimizer.from_portfolio(portfolio, panel)
+    allocation = optimizer.solve('risk_parity')
+    allocation = optimizer.solve('mean_variance', risk_aversion=5, category_bounds={'cash': (0.2, 0.25)})
+
+    python portfolio_optimizer.py --portfolio-file data/portfolio.json --method all
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from scipy.optimize import linprog, minimize
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy scipy")
+    sys.exit(1)
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from covariance import METHODS as COV_METHODS, estimate as estimate_covariance
+from returns_panel import ReturnsPanel
+
+METHODS = ['mean_variance', 'risk_parity', 'min_cvar']
+
+CASH = 'CASH'
+
+# risk_management 中的单只持仓上限 -> 类别名前缀
+SINGLE_CAPS = {
+    'max_single_core': 'core',
+    'max_single_satellite': 'satellite',
+}
+
+# max_offensive 约束涉及的类别名前缀
+OFFENSIVE_PREFIXES = ('core', 'satellite')
+
+TRADING_DAYS = 252
+
+
+def parse_ratio(text) -> Tuple[float, float]:
+    """解析 "40-50%" / "20%" / 0.2 为 (下限, 上限)；单个值视为上限"""
+    if isinstance(text, (int, float)):
+        value = float(text)
+        value = value / 100 if value > 1 else value
+        return 0.0, value
+    numbers = [float(x) / 100 for x in re.findall(r'\d+(?:\.\d+)?', str(text))]
+    if len(numbers) >= 2:
+        return numbers[0], numbers[1]
+    if len(numbers) == 1:
+        return 0.0, numbers[0]
+    raise ValueError(f"无法解析比例: {text}")
+
+
+@dataclass
+class Allocation:
+    """优化结果"""
+    method: str
+    weights: Dict[str, float]  # 标的 -> 权重 (含 CASH)
+    category_weights: Dict[str, float]
+    expected_return: float  # 年化
+    volatility: float  # 年化
+    sharpe_ratio: float
+    cvar_95: float  # 日度历史 CVaR
+    risk_contributions: Dict[str, float]  # 各标的占组合方差的比例
+    seconds: float
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class PortfolioOptimizer:
+    """带类别约束的组合优化器"""
+
+    def __init__(self, symbols: List[str], returns: np.ndarray, categories: Dict[str, str],
+                 category_bounds: Dict[str, Tuple[float, float]],
+                 single_caps: Optional[Dict[str, float]] = None,
+                 group_caps: Optional[List[Tuple[List[str], float]]] = None,
+                 current_weights: Optional[Dict[str, float]] = None,
+                 risk_free_rate: float = 0.045, cov_method: str = 'sample'):
+        """
+        Args:
+            symbols: 风险资产 (与 returns 的列对应)
+            returns: 对齐后的日收益率矩阵 (T, N)，含缺失值的日期会被跳过
+            categories: 标的 -> 类别 (现金为 CASH -> 现金类别)
+            category_bounds: 类别 -> (权重下限, 上限)
+            single_caps: 类别 -> 该类别单只持仓上限
+            group_caps: [(类别列表, 合计上限)]
+            current_weights: 当前权重 (含 CASH)，用于计算调仓量和风险平价的现金比例
+            risk_free_rate: 年化无风险利率 (现金收益)
+            cov_method: 协方差估计方法 (见 covariance.py)
+        """
+        returns = np.asarray(returns, dtype=np.float64)
+        returns = returns[~np.isnan(returns).any(axis=1)]
+        if len(returns) < 2:
+            raise ValueError("有效收益率样本不足")
+
+        self.symbols = list(symbols)
+        self.has_cash = CASH in categories
+        self.assets = self.symbols + ([CASH] if self.has_cash else [])
+        self.categories = categories
+        self.category_bounds = dict(category_bounds)
+        self.single_caps = single_caps or {}
+        self.group_caps = group_caps or []
+        self.current_weights = current_weights or {}
+        self.risk_free_rate = risk_free_rate
+
+        # 情景 (含现金) 与年化参数，只计算一次
+        daily_cash = risk_free_rate / TRADING_DAYS
+        if self.has_cash:
+            returns = np.column_stack([returns, np.full(len(returns), daily_cash)])
+        self.scenarios = np.ascontiguousarray(returns)
+        self.mu = returns.mean(axis=0) * TRADING_DAYS
+
+        n_risky = len(self.symbols)
+        cov = np.zeros((len(self.assets), len(self.assets)))
+        cov[:n_risky, :n_risky] = estimate_covariance(returns[:, :n_risky], cov_method) * TRADING_DAYS
+        self.cov = cov
+        self.chol = self._factorize(cov[:n_risky, :n_risky])
+
+    @staticmethod
+    def _factorize(cov: np.ndarray) -> np.ndarray:
+        """风险资产协方差的 Cholesky 因子 (非正定时加微小对角项)"""
+        jitter = 0.0
+        scale = max(np.trace(cov) / max(len(cov), 1), 1e-12)
+        for _ in range(6):
+            try:
+                return np.linalg.cholesky(cov + np.eye(len(cov)) * jitter)
+            except np.linalg.LinAlgError:
+                jitter = scale * 1e-10 if jitter == 0 else jitter * 100
+        raise ValueError("协方差矩阵无法分解")
+
+    @classmethod
+    def from_portfolio(cls, portfolio: Dict, panel: ReturnsPanel, risk_free_rate: float = 0.045,
+                       cov_method: str = 'sample') -> 'PortfolioOptimizer':
+        """从 portfolio.json 内容与收益率面板构建 (面板中没有的持仓不参与优化)"""
+        categories = {}
+        category_bounds = {}
+        values = {}
+        for category, data in portfolio.get('allocation', {}).items():
+            if 'target_ratio' in data:
+                category_bounds[category] = parse_ratio(data['target_ratio'])
+            if category == 'cash':
+                categories[CASH] = category
+                values[CASH] = data.get('value', data.get('current_value', 0))
+                continue
+            for pos in data.get('positions', []):
+                if pos['symbol'] in panel.symbols:
+                    categories[pos['symbol']] = category
+                    values[pos['symbol']] = pos.get('value', 0)
+
+        rules = portfolio.get('risk_management', {})
+        single_caps = {}
+        for key, prefix in SINGLE_CAPS.items():
+            if key in rules:
+                for category in category_bounds:
+                    if category.startswith(prefix):
+                        single_caps[category] = parse_ratio(rules[key])[1]
+        group_caps = []
+        if 'max_offensive' in rules:
+            offensive = [c for c in category_bounds if c.startswith(OFFENSIVE_PREFIXES)]
+            group_caps.append((offensive, parse_ratio(rules['max_offensive'])[1]))
+
+        total = sum(values.values())
+        current = {s: v / total for s, v in values.items()} if total > 0 else {}
+        symbols = [s for s in panel.symbols if s in categories]
+        returns = panel.select(symbols).returns
+        return cls(symbols, returns, categories, category_bounds, single_caps, group_caps,
+                   current, risk_free_rate, cov_method)
+
+    # ------------------------------------------------------------------
+    # 约束
+    # ------------------------------------------------------------------
+
+    def _constraints(self, category_bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+                     max_weight: Optional[float] = None,
+                     exclude: Sequence[str] = ()) -> Tuple[np.ndarray, np.ndarray, List[Tuple[float, float]]]:
+        """
+        线性约束 A_ub @ w <= b_ub 与逐个标的的上下界 (合计为 1 的等式约束单独处理)
+        """
+        bounds_by_category = dict(self.category_bounds)
+        bounds_by_category.update(category_bounds or {})
+
+        rows, rhs = [], []
+        for category, (low, high) in bounds_by_category.items():
+            member = np.array([1.0 if self.categories.get(a) == category else 0.0 for a in self.assets])
+            if not member.any():
+                continue
+            rows.append(member)
+            rhs.append(high)
+            rows.append(-member)
+            rhs.append(-low)
+        for categories, cap in self.group_caps:
+            member = np.array([1.0 if self.categories.get(a) in categories else 0.0 for a in self.assets])
+            rows.append(member)
+            rhs.append(cap)
+
+        bounds = []
+        for asset in self.assets:
+            high = 1.0
+            if asset in exclude:
+                high = 0.0
+            elif asset != CASH:
+                high = self.single_caps.get(self.categories.get(asset), 1.0)
+                if max_weight is not None:
+                    high = min(high, max_weight)
+            bounds.append((0.0, high))
+
+        a_ub = np.array(rows) if rows else np.zeros((0, len(self.assets)))
+        return a_ub, np.array(rhs), bounds
+
+    def _initial(self, bounds: List[Tuple[float, float]]) -> np.ndarray:
+        """起点: 当前权重 (截断到上下界后归一化)"""
+        w = np.array([self.current_weights.get(a, 1.0 / len(self.assets)) for a in self.assets])
+        w = np.clip(w, [b[0] for b in bounds], [b[1] for b in bounds])
+        return w / w.sum() if w.sum() > 0 else np.full(len(w), 1.0 / len(w))
+
+    # ------------------------------------------------------------------
+    # 求解
+    # ------------------------------------------------------------------
+
+    def _variance(self, w: np.ndarray) -> Tuple[float, np.ndarray]:
+        """组合年化方差及梯度 (复用 Cholesky 因子: w'Σw = |L'w|²)"""
+        n = len(self.symbols)
+        v = self.chol.T @ w[:n]
+        grad = np.zeros_like(w)
+        grad[:n] = 2.0 * (self.chol @ v)
+        return float(v @ v), grad
+
+    def _slsqp(self, objective, w0, a_ub, b_ub, bounds) -> np.ndarray:
+        constraints = [{'type': 'eq', 'fun': lambda w: w.sum() - 1.0, 'jac': lambda w: np.ones_like(w)}]
+        if len(a_ub):
+            constraints.append({'type': 'ineq', 'fun': lambda w: b_ub - a_ub @ w, 'jac': lambda w: -a_ub})
+        result = minimize(objective, w0, jac=True, method='SLSQP', bounds=bounds,
+                          constraints=constraints, options={'maxiter': 500, 'ftol': 1e-12})
+        if not result.success:
+            raise ValueError(f"优化失败: {result.message}")
+        return result.x
+
+    def _mean_variance(self, a_ub, b_ub, bounds, risk_aversion: float) -> np.ndarray:
+        def objective(w):
+            var, grad = self._variance(w)
+            return -(w @ self.mu) + 0.5 * risk_aversion * var, -self.mu + 0.5 * risk_aversion * grad
+        return self._slsqp(objective, self._initial(bounds), a_ub, b_ub, bounds)
+
+    def _feasible_range(self, i: int, a_ub, b_ub, bounds) -> Tuple[float, float]:
+        """约束下第 i 个资产权重的可行范围"""
+        a_eq = np.ones((1, len(self.assets)))
+        limits = []
+        for sign in (1.0, -1.0):
+            c = np.zeros(len(self.assets))
+            c[i] = sign
+            result = linprog(c, A_ub=a_ub if len(a_ub) else None, b_ub=b_ub if len(a_ub) else None,
+                             A_eq=a_eq, b_eq=[1.0], bounds=bounds, method='highs')
+            if not result.success:
+                raise ValueError(f"约束无可行解: {result.message}")
+            limits.append(float(result.x[i]))
+        return limits[0], limits[1]
+
+    def _interior_point(self, a_ub, b_ub, bounds, positive: np.ndarray) -> np.ndarray:
+        """可行域内部的权重: 线性规划最大化 positive 标的中最小的权重"""
+        m = len(self.assets)
+        # 变量 [w (m), t]: max t，w_i >= t (positive 标的)
+        c = np.zeros(m + 1)
+        c[-1] = -1.0
+        rows = [np.hstack([a_ub, np.zeros((len(a_ub), 1))])] if len(a_ub) else []
+        rhs = [b_ub] if len(a_ub) else []
+        idx = np.flatnonzero(positive)
+        floor = np.zeros((len(idx), m + 1))
+        floor[np.arange(len(idx)), idx] = -1.0
+        floor[:, -1] = 1.0
+        rows.append(floor)
+        rhs.append(np.zeros(len(idx)))
+        a_eq = np.concatenate([np.ones(m), [0.0]])[None, :]
+        result = linprog(c, A_ub=np.vstack(rows), b_ub=np.concatenate(rhs), A_eq=a_eq, b_eq=[1.0],
+                         bounds=list(bounds) + [(0, None)], method='highs')
+        if not result.success:
+            raise ValueError(f"约束无可行解: {result.message}")
+        return result.x[:m]
+
+    def _risk_parity(self, a_ub, b_ub, bounds) -> np.ndarray:
+        """
+        风险资产等风险贡献；现金比例取当前值并限制在约束允许的范围内
+
+        风险预算的凸问题 min ½ y'Σy - Σ b_i·log(y_i) 令 y = t·w 并对 t 求极小后，
+        等价于在原约束 (合计为 1、类别区间、单只上限) 下求解
+            min ½·log(w'Σw) - Σ b_i·log(w_i)
+        约束不起作用时解即为精确的等风险贡献，起作用时为带约束的风险预算
+        """
+        n = len(self.symbols)
+        m = len(self.assets)
+        highs = np.array([b[1] for b in bounds])
+
+        # 被排除 (上界为 0) 的标的不参与风险预算
+        budget = np.zeros(m)
+        active = highs[:n] > 0
+        budget[:n][active] = 1.0 / active.sum()
+        sigma = self.cov[:n, :n]
+
+        bounds = [(1e-8, high) if budget[j] > 0 else (low, high) for j, (low, high) in enumerate(bounds)]
+        if self.has_cash:
+            # 现金取当前比例，限制在全部约束允许的范围内
+            i = self.assets.index(CASH)
+            low, high = self._feasible_range(i, a_ub, b_ub, bounds)
+            cash = float(np.clip(self.current_weights.get(CASH, low), low, high))
+            bounds[i] = (cash, cash)
+
+        def objective(w):
+            w = np.maximum(w, 1e-12)  # SLSQP 线搜索可能略微越过下界
+            sw = sigma @ w[:n]
+            var = max(float(w[:n] @ sw), 1e-18)
+            logs = np.log(w, out=np.zeros_like(w), where=budget > 0)
+            grad = -np.divide(budget, w, out=np.zeros_like(w), where=budget > 0)
+            grad[:n] += sw / var
+            return 0.5 * np.log(var) - float(budget @ logs), grad
+
+        w0 = self._interior_point(a_ub, b_ub, bounds, budget > 0)
+        return self._slsqp(objective, w0, a_ub, b_ub, bounds)
+
+    def _min_cvar(self, a_ub, b_ub, bounds, alpha: float,
+                  target_return: Optional[float]) -> np.ndarray:
+        """变量 [w (n), ζ, u (T)]: min ζ + Σu / ((1-α)T)，u_t >= -r_t'w - ζ，u >= 0"""
+        scenarios = self.scenarios
+        t, n = scenarios.shape
+        c = np.concatenate([np.zeros(n), [1.0], np.full(t, 1.0 / ((1 - alpha) * t))])
+
+        loss_rows = np.hstack([-scenarios, -np.ones((t, 1)), -np.eye(t)])
+        rows = [loss_rows]
+        rhs = [np.zeros(t)]
+        if len(a_ub):
+            rows.append(np.hstack([a_ub, np.zeros((len(a_ub), 1 + t))]))
+            rhs.append(b_ub)
+        if target_return is not None:
+            rows.append(np.concatenate([-self.mu, np.zeros(1 + t)])[None, :])
+            rhs.append([-target_return])
+        a_eq = np.concatenate([np.ones(n), np.zeros(1 + t)])[None, :]
+
+        result = linprog(c, A_ub=np.vstack(rows), b_ub=np.concatenate(rhs), A_eq=a_eq, b_eq=[1.0],
+                         bounds=list(bounds) + [(None, None)] + [(0, None)] * t, method='highs')
+        if not result.success:
+            raise ValueError(f"优化失败: {result.message}")
+        return result.x[:n]
+
+    def solve(self, method: str = 'mean_variance', risk_aversion: float = 3.0,
+              category_bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+              max_weight: Optional[float] = None, exclude: Sequence[str] = (),
+              alpha: float = 0.95, target_return: Optional[float] = None) -> Allocation:
+        """
+        求解目标权重
+
+        Args:
+            method: 'mean_variance' / 'risk_parity' / 'min_cvar'
+            risk_aversion: 均值方差的风险厌恶系数 λ
+            category_bounds: 覆盖 target_ratio 的类别区间 (what-if)
+            max_weight: 额外的单只风险资产上限
+            exclude: 不持有的标的
+            alpha: min_cvar 的置信度
+            target_return: min_cvar 要求的最低年化预期收益
+        """
+        if method not in METHODS:
+            raise ValueError(f"method 必须是 {METHODS} 之一")
+        start = time.perf_counter()
+        a_ub, b_ub, bounds = self._constraints(category_bounds, max_weight, exclude)
+
+        if method == 'mean_variance':
+            w = self._mean_variance(a_ub, b_ub, bounds, risk_aversion)
+        elif method == 'risk_parity':
+            w = self._risk_parity(a_ub, b_ub, bounds)
+        else:
+            w = self._min_cvar(a_ub, b_ub, bounds, alpha, target_return)
+
+        w = np.where(w < 1e-8, 0.0, w)
+        w = w / w.sum()
+        return self._describe(method, w, time.perf_counter() - start)
+
+    def evaluate(self, weights: Dict[str, float], label: str = 'current') -> Allocation:
+        """评估给定权重 (如当前持仓)"""
+        w = np.array([weights.get(a, 0.0) for a in self.assets])
+        return self._describe(label, w / w.sum() if w.sum() > 0 else w, 0.0)
+
+    def _describe(self, method: str, w: np.ndarray, seconds: float) -> Allocation:
+        var, _ = self._variance(w)
+        vol = float(np.sqrt(max(var, 0.0)))
+        expected = float(w @ self.mu)
+
+        daily = self.scenarios @ w
+        threshold = np.percentile(daily, 5)
+        cvar = float(daily[daily <= threshold].mean())
+
+        n = len(self.symbols)
+        rc = w[:n] * (self.cov[:n, :n] @ w[:n])
+        rc = rc / rc.sum() if rc.sum() > 0 else rc
+
+        category_weights: Dict[str, float] = {}
+        for asset, weight in zip(self.assets, w):
+            category = self.categories.get(asset, 'other')
+            category_weights[category] = category_weights.get(category, 0.0) + float(weight)
+
+        return Allocation(
+            method=method,
+            weights={a: round(float(x), 4) for a, x in zip(self.assets, w)},
+            category_weights={c: round(x, 4) for c, x in category_weights.items()},
+            expected_return=round(expected, 4),
+            volatility=round(vol, 4),
+            sharpe_ratio=round((expected - self.risk_free_rate) / vol, 4) if vol > 0 else 0.0,
+            cvar_95=round(cvar, 6),
+            risk_contributions={s: round(float(x), 4) for s, x in zip(self.symbols, rc)},
+            seconds=round(seconds, 4),
+        )
+
+
+def print_allocations(allocations: List[Allocation], total_value: float = 0):
+    """并排打印多个方案的权重与指标"""
+    assets = list(allocations[0].weights)
+    header = f"{'标的':<10}" + ''.join(f"{a.method:>15}" for a in allocations)
+
+    print(f"\n{'='*len(header)}")
+    print(f"⚖️  组合优化")
+    print(f"{'='*len(header)}")
+    print(header)
+    print('-' * len(header))
+    for asset in assets:
+        print(f"{asset:<10}" + ''.join(f"{a.weights[asset]*100:>14.2f}%" for a in allocations))
+    print('-' * len(header))
+    for category in allocations[0].category_weights:
+        print(f"{category:<10}" + ''.join(f"{a.category_weights.get(category, 0)*100:>14.2f}%" for a in allocations))
+    print('-' * len(header))
+    print(f"{'年化收益':<8}" + ''.join(f"{a.expected_return*100:>14.2f}%" for a in allocations))
+    print(f"{'年化波动':<8}" + ''.join(f"{a.volatility*100:>14.2f}%" for a in allocations))
+    print(f"{'夏普比率':<8}" + ''.join(f"{a.sharpe_ratio:>15.3f}" for a in allocations))
+    print(f"{'CVaR95':<10}" + ''.join(f"{a.cvar_95*100:>14.3f}%" for a in allocations))
+    print(f"{'耗时':<10}" + ''.join(f"{a.seconds*1000:>13.1f}ms" for a in allocations))
+
+    if total_value > 0 and len(allocations) > 1:
+        current = allocations[0]
+        print(f"\n💱 调仓金额 (相对 {current.method}，总资产 ¥{total_value:,.0f})")
+        for asset in assets:
+            deltas = [(a.weights[asset] - current.weights[asset]) * total_value for a in allocations[1:]]
+            print(f"{asset:<10}{'':>15}" + ''.join(f"{d:>+15,.0f}" for d in deltas))
+    print(f"{'='*len(header)}\n")
+
+
+def main():
+    # 延迟导入，避免作为库使用时引入数据源依赖
+    from portfolio_risk import RiskAnalyzer
+
+    parser = argparse.ArgumentParser(description='组合优化 (均值方差 / 风险平价 / 最小 CVaR)')
+    parser.add_argument('--portfolio-file', '-p', required=True, help='投资组合 JSON 文件路径')
+    parser.add_argument('--method', '-m', choices=METHODS + ['all'], default='all', help='优化方法 (默认 all)')
+    parser.add_argument('--days', '-d', type=int, default=252, help='历史数据天数 (默认252)')
+    parser.add_argument('--risk-aversion', type=float, default=3.0, help='均值方差风险厌恶系数 (默认3)')
+    parser.add_argument('--target-return', type=float, help='min_cvar 最低年化预期收益 (如 0.1)')
+    parser.add_argument('--max-weight', type=float, help='单只风险资产权重上限 (如 0.15)')
+    parser.add_argument('--exclude', nargs='+', default=[], help='排除的标的')
+    parser.add_argument('--set', nargs='+', default=[], metavar='CATEGORY=RANGE',
+                        help='覆盖类别目标区间，如 cash=20-25%% core_large=45-50%%')
+    parser.add_argument('--risk-free-rate', '-r', type=float, default=0.045, help='无风险利率 (默认4.5%%)')
+    parser.add_argument('--cov-method', choices=COV_METHODS, default='sample',
+                        help='协方差估计方法 (sample/ledoit_wolf/ewma/pca，默认 sample)')
+    parser.add_argument('--demo', action='store_true', help='使用演示数据')
+    parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+
+    args = parser.parse_args()
+
+    with open(args.portfolio_file) as f:
+        portfolio = json.load(f)
+
+    analyzer = RiskAnalyzer(use_demo=args.demo, risk_free_rate=args.risk_free_rate)
+    symbols, _, _, _ = analyzer.load_positions(args.portfolio_file)
+    panel = analyzer.returns_panel(symbols, args.days)
+
+    optimizer = PortfolioOptimizer.from_portfolio(portfolio, panel, args.risk_free_rate, args.cov_method)
+    overrides = {}
+    for item in args.set:
+        category, _, ratio = item.partition('=')
+        overrides[category] = parse_ratio(ratio)
+
+    methods = METHODS if args.method == 'all' else [args.method]
+    allocations = [optimizer.evaluate(optimizer.current_weights)]
+    try:
+        for method in methods:
+            allocations.append(optimizer.solve(
+                method, risk_aversion=args.risk_aversion, category_bounds=overrides,
+                max_weight=args.max_weight, exclude=args.exclude, target_return=args.target_return
+            ))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.output == 'json':
+        print(json.dumps([a.to_dict() for a in allocations], indent=2, ensure_ascii=False))
+    else:
+        total_value = sum(p.get('value', 0) for d in portfolio.get('allocation', {}).values()
+                          for p in d.get('positions', []))
+        total_value += portfolio.get('allocation', {}).get('cash', {}).get('value', 0)
+        print_allocations(allocations, total_value)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -16,33 +16,28 @@ import os
 import math
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass, asdict
 from collections import defaultdict
 
 try:
     import numpy as np
     import pandas as pd
-    from scipy import stats
 except ImportError:
-    print("❌ 需要安装依赖: pip3 install pandas numpy scipy")
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
     sys.exit(1)
 
-# 尝试导入 LongPort SDK
-LONGPORT_AVAILABLE = False
-try:
-    from longport.openapi import QuoteContext, Config, Period
-    LONGPORT_AVAILABLE = True
-except ImportError:
-    pass
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
 
-# 尝试导入 yfinance 作为备选
-YFINANCE_AVAILABLE = False
-try:
-    import yfinance as yf
-    YFINANCE_AVAILABLE = True
-except ImportError:
-    pass
+from bar_store import BarStore
+from covariance import METHODS as COV_METHODS, cached_estimate, to_correlation
+from drawdown import DrawdownAnalysis, DrawdownEpisode, analyze_drawdowns, format_episode_table
+from market_data import MarketDataRegistry, get_registry
+from monte_carlo import METHODS as MC_METHODS, MonteCarloEngine
+from result_cache import ResultCache, digest_array
+from returns_panel import ReturnsPanel
+import risk_metrics
 
 
 @dataclass
@@ -110,36 +105,32 @@ class RiskAnalyzer:
     # 一年交易天数
     TRADING_DAYS = 252
     
-    def __init__(self, use_demo: bool = False, risk_free_rate: Optional[float] = None):
+    def __init__(self, use_demo: bool = False, risk_free_rate: Optional[float] = None,
+                 bar_store: Optional[BarStore] = None,
+                 market_data: Optional[MarketDataRegistry] = None,
+                 result_cache: Optional[ResultCache] = None):
         self.use_demo = use_demo
-        self.ctx = None
+        self.bar_store = bar_store
+        # 结果缓存: 持仓与行情未变时复用组合结果，部分标的行情更新时只重算这些标的
+        self.result_cache = result_cache
         self.risk_free_rate = risk_free_rate or self.RISK_FREE_RATE
-        
-        if not use_demo and LONGPORT_AVAILABLE:
-            try:
-                self.config = Config.from_env()
-                self.ctx = QuoteContext(self.config)
-            except Exception as e:
-                print(f"⚠️  LongPort API 配置失败: {e}")
-                self.ctx = None
+        # 共享的数据源注册表 (LongPort 客户端在首次请求时创建，进程内复用)
+        self.market_data = market_data or get_registry()
     
     def get_historical_data(self, symbol: str, days: int = 252) -> pd.DataFrame:
-        """获取历史价格数据"""
-        # 转换 symbol 格式
-        api_symbol = symbol
-        if '.' not in symbol and not symbol.endswith('.US'):
-            if symbol.isalpha():
-                api_symbol = f"{symbol}.US"
-        
-        # 尝试 LongPort API
-        if self.ctx and LONGPORT_AVAILABLE and not self.use_demo:
-            df = self._get_longport_data(api_symbol, days)
-            if not df.empty and len(df) >= days * 0.8:
-                return df
+        """
+        获取历史价格数据
         
-        # 尝试 Yahoo Finance
-        if YFINANCE_AVAILABLE and not self.use_demo:
-            df = self._get_yfinance_data(symbol, days)
+        配置 bar_store 时优先读本地K线缓存，只下载缺失的K线
+        """
+        if not self.use_demo:
+            if self.bar_store is not None:
+                df = self.bar_store.get_bars(
+                    symbol, '1d', days,
+                    lambda n, since: self._fetch_remote(symbol, n, since)
+                )
+            else:
+                df = self._fetch_remote(symbol, days)
             if not df.empty and len(df) >= days * 0.8:
                 return df
         
@@ -147,70 +138,46 @@ class RiskAnalyzer:
         print(f"📊 使用演示模式生成 {symbol} 的模拟数据...")
         return self._generate_demo_data(symbol, days)
     
-    def _get_longport_data(self, symbol: str, count: int) -> pd.DataFrame:
-        """从 LongPort API 获取数据"""
-        try:
-            candles = self.ctx.history_candles(symbol, period=Period.Day, count=count)
-        except Exception as e:
-            return pd.DataFrame()
-        
-        if not candles:
-            return pd.DataFrame()
-        
-        data = []
-        for candle in candles:
-            data.append({
-                'date': candle.timestamp,
-                'open': float(candle.open),
-                'high': float(candle.high),
-                'low': float(candle.low),
-                'close': float(candle.close),
-                'volume': int(candle.volume)
-            })
-        
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date').reset_index(drop=True)
+    def get_historical_data_many(self, symbols: List[str], days: int = 252) -> Dict[str, pd.DataFrame]:
+        """
+        一次性获取多个标的的历史价格
         
-        return df
-    
-    def _get_yfinance_data(self, symbol: str, days: int) -> pd.DataFrame:
-        """从 Yahoo Finance 获取数据"""
-        yf_symbol = symbol
-        if symbol.endswith('.HK'):
-            yf_symbol = symbol
-        elif '.' not in symbol and not symbol.isdigit():
-            pass  # 美股直接使用
-        
-        try:
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days * 2)
-            
-            ticker = yf.Ticker(yf_symbol)
-            hist = ticker.history(start=start_date, end=end_date, interval='1d')
-            
-            if hist.empty:
-                return pd.DataFrame()
-            
-            df = pd.DataFrame({
-                'date': hist.index,
-                'open': hist['Open'].values,
-                'high': hist['High'].values,
-                'low': hist['Low'].values,
-                'close': hist['Close'].values,
-                'volume': hist['Volume'].values
-            })
-            
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.sort_values('date').reset_index(drop=True)
-            
-            # 限制数据量
-            if len(df) > days:
-                df = df.tail(days).reset_index(drop=True)
-            
-            return df
-        except Exception as e:
-            return pd.DataFrame()
+        通过数据源注册表批量/并发请求 (配置 bar_store 时只下载缺失的K线)，
+        网络数据不足的标的依次使用模拟数据
+        """
+        frames = {}
+        if not self.use_demo:
+            fetch = lambda requests: self.market_data.candles_many('1d', requests, min_len=days * 0.8)
+            if self.bar_store is not None:
+                frames = self.bar_store.get_bars_many(symbols, '1d', days, fetch)
+            else:
+                frames = fetch({symbol: (days, None) for symbol in symbols})
+        
+        result = {}
+        for symbol in symbols:
+            df = frames.get(symbol)
+            if df is None or df.empty or len(df) < days * 0.8:
+                print(f"📊 使用演示模式生成 {symbol} 的模拟数据...")
+                df = self._generate_demo_data(symbol, days)
+            result[symbol] = df
+        return result
+    
+    def returns_panel(self, symbols: List[str], days: int = 252, fill: str = 'ffill',
+                      drop: str = 'any', min_coverage: float = 0.5) -> ReturnsPanel:
+        """一次性获取多个标的并构建日期对齐的收益率面板 (见 ReturnsPanel.from_frames)"""
+        frames = self.get_historical_data_many(symbols, days)
+        return ReturnsPanel.from_frames(frames, fill=fill, drop=drop, min_coverage=min_coverage)
+    
+    def _fetch_remote(self, symbol: str, days: int,
+                      since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        从数据源注册表获取日K线 (LongPort -> Yahoo Finance 自动降级)
+        
+        Args:
+            since: 增量刷新时的起始时间 (None 表示全量，需满足 80% 数据量)
+        """
+        min_len = 1 if since is not None else days * 0.8
+        return self.market_data.candles(symbol, '1d', days, since, min_len=min_len)
     
     def _generate_demo_data(self, symbol: str, days: int, 
                            annual_return: float = 0.10,
@@ -269,7 +236,7 @@ class RiskAnalyzer:
         Returns:
             VaR 值 (负值表示损失)
         """
-        return np.percentile(returns, (1 - confidence) * 100)
+        return float(risk_metrics.historical_var(returns, confidence))
     
     def calculate_var_parametric(self, returns: pd.Series, confidence: float = 0.95) -> float:
         """
@@ -278,38 +245,21 @@ class RiskAnalyzer:
         VaR = μ - z * σ
         其中 z 是标准正态分布的分位数
         """
-        mean = returns.mean()
-        std = returns.std()
-        z_score = stats.norm.ppf(1 - confidence)
-        return mean + z_score * std
+        return float(risk_metrics.parametric_var(returns, confidence))
     
     def calculate_var_cornish_fisher(self, returns: pd.Series, confidence: float = 0.95) -> float:
         """
         计算 Cornish-Fisher VaR
         修正正态分布假设，考虑偏度和峰度
         """
-        mean = returns.mean()
-        std = returns.std()
-        skew = returns.skew()
-        kurt = returns.kurtosis()
-        
-        z_score = stats.norm.ppf(1 - confidence)
-        
-        # Cornish-Fisher 修正
-        z_cf = (z_score + 
-                (z_score**2 - 1) * skew / 6 +
-                (z_score**3 - 3 * z_score) * kurt / 24 -
-                (2 * z_score**3 - 5 * z_score) * skew**2 / 36)
-        
-        return mean + z_cf * std
+        return float(risk_metrics.cornish_fisher_var(returns, confidence))
     
     def calculate_cvar(self, returns: pd.Series, confidence: float = 0.95) -> float:
         """
         计算 CVaR (条件VaR / 预期亏损)
         CVaR 是超过 VaR 阈值的平均损失
         """
-        var = self.calculate_var_historical(returns, confidence)
-        return returns[returns <= var].mean()
+        return float(risk_metrics.historical_cvar(returns, confidence))
     
     def calculate_max_drawdown(self, prices: pd.Series) -> Tuple[float, int]:
         """
@@ -318,140 +268,117 @@ class RiskAnalyzer:
         Returns:
             (最大回撤值, 最大回撤持续天数)
         """
-        # 计算累计收益
-        cumulative = (1 + prices.pct_change().fillna(0)).cumprod()
-        
-        # 计算历史最高点
-        running_max = cumulative.expanding().max()
-        
-        # 计算回撤
-        drawdown = (cumulative - running_max) / running_max
-        
-        # 最大回撤
-        max_dd = drawdown.min()
-        
-        # 计算最大回撤持续天数
-        is_in_drawdown = drawdown < 0
-        max_duration = 0
-        current_duration = 0
-        
-        for in_dd in is_in_drawdown:
-            if in_dd:
-                current_duration += 1
-                max_duration = max(max_duration, current_duration)
-            else:
-                current_duration = 0
-        
-        return max_dd, max_duration
+        max_dd, duration, _ = risk_metrics.drawdown_stats(prices)
+        return float(max_dd), int(duration)
+    
+    def calculate_drawdowns(self, df: pd.DataFrame) -> DrawdownAnalysis:
+        """回撤分析 (含完整的回撤区间表)"""
+        return analyze_drawdowns(df['close'].to_numpy(), df['date'])
     
     def calculate_downside_volatility(self, returns: pd.Series) -> float:
         """
         计算下行波动率 (只考虑负收益)
         """
-        downside_returns = returns[returns < 0]
-        if len(downside_returns) == 0:
-            return 0
-        return downside_returns.std()
+        return float(risk_metrics.downside_volatility(returns))
     
-    def analyze_symbol(self, symbol: str, days: int = 252) -> RiskMetrics:
+    def analyze_symbol(self, symbol: str, days: int = 252,
+                       df: Optional[pd.DataFrame] = None) -> RiskMetrics:
         """
         分析单个资产的风险指标
+        
+        Args:
+            df: 已获取的价格数据 (至少包含 date, close 列)，为 None 时自动获取
         """
         # 获取数据
-        df = self.get_historical_data(symbol, days)
+        if df is None:
+            df = self.get_historical_data(symbol, days)
         
         if df.empty or len(df) < 30:
             raise ValueError(f"无法获取 {symbol} 的足够历史数据")
         
-        # 计算收益率
-        returns = self.calculate_returns(df)
-        prices = df['close']
-        
-        # 基础统计
-        trading_days = len(returns)
-        total_return = (prices.iloc[-1] / prices.iloc[0]) - 1
-        daily_mean = returns.mean()
-        annualized_return = (1 + daily_mean) ** self.TRADING_DAYS - 1
-        
-        # 波动率
-        daily_vol = returns.std()
-        annualized_vol = daily_vol * math.sqrt(self.TRADING_DAYS)
-        downside_vol = self.calculate_downside_volatility(returns)
-        
-        # 调整收益指标
-        excess_return = annualized_return - self.risk_free_rate
-        sharpe = excess_return / annualized_vol if annualized_vol > 0 else 0
-        
-        downside_vol_annual = downside_vol * math.sqrt(self.TRADING_DAYS)
-        sortino = excess_return / downside_vol_annual if downside_vol_annual > 0 else 0
-        
-        # 回撤
-        max_dd, max_dd_duration = self.calculate_max_drawdown(prices)
-        
-        # 计算所有回撤
-        cumulative = (1 + returns).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdowns = (cumulative - running_max) / running_max
-        avg_dd = drawdowns[drawdowns < 0].mean() if (drawdowns < 0).any() else 0
-        
-        calmar = annualized_return / abs(max_dd) if max_dd != 0 else 0
-        
-        # VaR 计算
-        var_95 = self.calculate_var_historical(returns, 0.95)
-        var_99 = self.calculate_var_historical(returns, 0.99)
-        cvar_95 = self.calculate_cvar(returns, 0.95)
-        cvar_99 = self.calculate_cvar(returns, 0.99)
-        
-        # 参数法 VaR
-        var_parametric = self.calculate_var_parametric(returns, 0.95)
-        var_cf = self.calculate_var_cornish_fisher(returns, 0.95)
-        
-        # 分布特征
-        skew = returns.skew()
-        kurt = returns.kurtosis()
-        
-        # Jarque-Bera 正态性检验
-        jb_stat = len(returns) / 6 * (skew**2 + (kurt**2) / 4)
-        jb_pvalue = 1 - stats.chi2.cdf(jb_stat, 2)
-        is_normal = jb_pvalue > 0.05
+        metrics = risk_metrics.compute_metrics(df['close'].to_numpy(), self.risk_free_rate,
+                                               self.TRADING_DAYS)
+        return self._to_risk_metrics(symbol, pd.DatetimeIndex(df['date']), metrics)
+    
+    def analyze_panel(self, panel: ReturnsPanel) -> Dict[str, RiskMetrics]:
+        """
+        一次性计算面板中所有标的的风险指标
         
+        面板无缺失值时整块价格矩阵只做一次向量化计算，否则逐列去掉缺失日期后计算
+        (数据不足的标的打印警告并跳过)。配置 result_cache 时，价格列内容未变的标的直接读缓存
+        """
+        keys = {}
+        cached = {}
+        if self.result_cache is not None:
+            dates = digest_array(panel.dates.asi8)
+            keys = {symbol: ResultCache.key('symbol', symbol=symbol, dates=dates,
+                                            prices=digest_array(panel.prices[:, j]),
+                                            risk_free_rate=self.risk_free_rate)
+                    for j, symbol in enumerate(panel.symbols)}
+            cached = {s: RiskMetrics(**d) for s, d in self.result_cache.get_many(keys).items()}
+        
+        pending = [s for s in panel.symbols if s not in cached]
+        results = {}
+        if pending and panel.complete and len(panel) >= 30:
+            sub = panel.select(pending)
+            metrics = risk_metrics.compute_metrics(sub.prices, self.risk_free_rate, self.TRADING_DAYS)
+            results = {symbol: self._to_risk_metrics(symbol, sub.dates, metrics, j)
+                       for j, symbol in enumerate(pending)}
+        else:
+            for symbol in pending:
+                try:
+                    results[symbol] = self.analyze_symbol(symbol, df=panel.column(symbol))
+                except Exception as e:
+                    print(f"⚠️ 分析 {symbol} 失败: {e}")
+        
+        if keys and results:
+            self.result_cache.put_many({keys[s]: m.to_dict() for s, m in results.items()})
+        results.update(cached)
+        return {s: results[s] for s in panel.symbols if s in results}
+    
+    def _to_risk_metrics(self, symbol: str, dates: Sequence, metrics: Dict,
+                         column: Optional[int] = None) -> RiskMetrics:
+        """由 risk_metrics.compute_metrics 的结果 (第 column 列) 构建 RiskMetrics"""
+        m = {k: (v if column is None or np.ndim(v) == 0 else v[column]) for k, v in metrics.items()}
         return RiskMetrics(
             symbol=symbol,
-            start_date=df['date'].iloc[0].strftime('%Y-%m-%d'),
-            end_date=df['date'].iloc[-1].strftime('%Y-%m-%d'),
-            trading_days=trading_days,
-            total_return=round(total_return, 4),
-            annualized_return=round(annualized_return, 4),
-            daily_mean_return=round(daily_mean, 6),
-            daily_volatility=round(daily_vol, 6),
-            annualized_volatility=round(annualized_vol, 4),
-            downside_volatility=round(downside_vol, 6),
-            sharpe_ratio=round(sharpe, 4),
-            sortino_ratio=round(sortino, 4),
-            calmar_ratio=round(calmar, 4),
-            max_drawdown=round(max_dd, 4),
-            max_drawdown_duration=max_dd_duration,
-            avg_drawdown=round(avg_dd, 4),
-            var_95=round(var_95, 6),
-            var_99=round(var_99, 6),
-            cvar_95=round(cvar_95, 6),
-            cvar_99=round(cvar_99, 6),
-            skewness=round(skew, 4),
-            kurtosis=round(kurt, 4),
-            jarque_bera_pvalue=round(jb_pvalue, 6),
-            is_normal=is_normal,
-            var_parametric_95=round(var_parametric, 6),
-            var_cornish_fisher_95=round(var_cf, 6)
+            start_date=dates[0].strftime('%Y-%m-%d'),
+            end_date=dates[-1].strftime('%Y-%m-%d'),
+            trading_days=int(m['trading_days']),
+            total_return=round(float(m['total_return']), 4),
+            annualized_return=round(float(m['annualized_return']), 4),
+            daily_mean_return=round(float(m['daily_mean_return']), 6),
+            daily_volatility=round(float(m['daily_volatility']), 6),
+            annualized_volatility=round(float(m['annualized_volatility']), 4),
+            downside_volatility=round(float(m['downside_volatility']), 6),
+            sharpe_ratio=round(float(m['sharpe_ratio']), 4),
+            sortino_ratio=round(float(m['sortino_ratio']), 4),
+            calmar_ratio=round(float(m['calmar_ratio']), 4),
+            max_drawdown=round(float(m['max_drawdown']), 4),
+            max_drawdown_duration=int(m['max_drawdown_duration']),
+            avg_drawdown=round(float(m['avg_drawdown']), 4),
+            var_95=round(float(m['var_95']), 6),
+            var_99=round(float(m['var_99']), 6),
+            cvar_95=round(float(m['cvar_95']), 6),
+            cvar_99=round(float(m['cvar_99']), 6),
+            skewness=round(float(m['skewness']), 4),
+            kurtosis=round(float(m['kurtosis']), 4),
+            jarque_bera_pvalue=round(float(m['jarque_bera_pvalue']), 6),
+            is_normal=bool(m['jarque_bera_pvalue'] > 0.05),
+            var_parametric_95=round(float(m['var_parametric_95']), 6),
+            var_cornish_fisher_95=round(float(m['var_cornish_fisher_95']), 6)
         )
     
-    def analyze_portfolio(self, portfolio_file: str, days: int = 252) -> Dict:
+    def load_positions(self, portfolio_file: str) -> Tuple[List[str], List[float], List[Dict], float]:
         """
-        分析整个投资组合的风险
+        读取组合持仓 (不含现金)
+        
+        Returns:
+            (标的列表, 归一化权重, 持仓记录, 组合总市值)
         """
         with open(portfolio_file, 'r') as f:
             portfolio = json.load(f)
         
-        results = []
         symbols = []
         weights = []
         positions = []
@@ -475,26 +402,55 @@ class RiskAnalyzer:
         if total_weight > 0:
             weights = [w / total_weight for w in weights]
         
-        # 获取每个资产的风险指标
-        returns_matrix = []
-        valid_symbols = []
-        valid_weights = []
-        valid_positions = []
+        return symbols, weights, positions, total_value
+    
+    def analyze_portfolio(self, portfolio_file: str, days: int = 252, fill: str = 'ffill',
+                          drop: str = 'any', min_coverage: float = 0.5,
+                          mc_paths: int = 0, mc_method: str = 't', mc_horizon: int = 1,
+                          cov_method: str = 'sample') -> Dict:
+        """
+        分析整个投资组合的风险
+        
+        Args:
+            fill, drop, min_coverage: 收益率面板的日期对齐策略 (见 ReturnsPanel.from_frames)
+            mc_paths: 蒙特卡洛 VaR 路径数 (0 表示不模拟)
+            mc_method: 蒙特卡洛情景生成方法 (normal/t/fhs)
+            mc_horizon: 蒙特卡洛持有期 (交易日)
+            cov_method: 相关性矩阵与事前波动率的协方差估计方法 (见 covariance.py)
+        """
+        symbols, weights, positions, _ = self.load_positions(portfolio_file)
         
+        # 一次性获取全部持仓的历史数据，按日期外连接构建收益率面板
+        frames = self.get_historical_data_many(symbols, days)
+        fetched = []
         for i, symbol in enumerate(symbols):
-            try:
-                metrics = self.analyze_symbol(symbol, days)
-                results.append(metrics)
-                valid_symbols.append(symbol)
-                valid_weights.append(weights[i])
-                valid_positions.append(positions[i])
-                
-                # 获取收益率序列用于组合计算
-                df = self.get_historical_data(symbol, days)
-                returns = self.calculate_returns(df)
-                returns_matrix.append(returns.values)
-            except Exception as e:
-                print(f"⚠️ 分析 {symbol} 失败: {e}")
+            if len(frames[symbol]) >= 30:
+                fetched.append(i)
+            else:
+                print(f"⚠️ 分析 {symbol} 失败: 无法获取 {symbol} 的足够历史数据")
+        panel = ReturnsPanel.from_frames({symbols[i]: frames[symbols[i]] for i in fetched},
+                                         fill=fill, drop=drop, min_coverage=min_coverage)
+        
+        # 持仓快照与对齐后的行情都没有变化时直接返回上次的结果
+        cache_key = None
+        if self.result_cache is not None and len(panel):
+            cache_key = ResultCache.key(
+                'portfolio', holdings=list(zip(symbols, weights)), as_of=panel.dates[-1],
+                dates=digest_array(panel.dates.asi8), prices=digest_array(panel.prices),
+                params={'days': days, 'fill': fill, 'drop': drop, 'min_coverage': min_coverage,
+                        'mc_paths': mc_paths, 'mc_method': mc_method, 'mc_horizon': mc_horizon,
+                        'cov_method': cov_method, 'risk_free_rate': self.risk_free_rate})
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                print(f"♻️ 持仓与行情 (截至 {panel.dates[-1]:%Y-%m-%d}) 未变化，使用缓存结果")
+                return cached
+        
+        # 单资产指标与组合指标使用同一份对齐后的价格矩阵
+        analyzed = self.analyze_panel(panel)
+        valid = [i for i in fetched if symbols[i] in analyzed]
+        valid_symbols = [symbols[i] for i in valid]
+        valid_weights = [weights[i] for i in valid]
+        results = [analyzed[symbol] for symbol in valid_symbols]
         
         # 重新归一化有效权重
         total_valid_weight = sum(valid_weights)
@@ -502,48 +458,61 @@ class RiskAnalyzer:
             valid_weights = [w / total_valid_weight for w in valid_weights]
         
         # 计算组合风险
+        panel = panel.select(valid_symbols)
         portfolio_metrics = self._calculate_portfolio_metrics(
-            valid_symbols, valid_weights, returns_matrix, results
+            valid_symbols, valid_weights, panel, results, cov_method
         )
         
-        return {
+        # 蒙特卡洛 VaR (与历史法使用同一块对齐收益率)
+        if mc_paths > 0 and portfolio_metrics:
+            engine = MonteCarloEngine(panel.returns, valid_weights, method=mc_method,
+                                      paths=mc_paths, horizon=mc_horizon, cov_method=cov_method)
+            mc = engine.run()
+            mc['components'] = dict(zip(valid_symbols, mc['components']))
+            portfolio_metrics['monte_carlo'] = mc
+        
+        result = {
             'individual': [r.to_dict() for r in results],
             'portfolio': portfolio_metrics
         }
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result)
+        return result
     
     def _calculate_portfolio_metrics(self, symbols: List[str], weights: List[float],
-                                     returns_matrix: List[np.ndarray],
-                                     individual_metrics: List[RiskMetrics]) -> Dict:
-        """计算组合层面的风险指标"""
+                                     panel: ReturnsPanel,
+                                     individual_metrics: List[RiskMetrics],
+                                     cov_method: str = 'sample') -> Dict:
+        """计算组合层面的风险指标 (所有指标基于同一块对齐后的收益率矩阵)"""
         
-        if not returns_matrix or len(returns_matrix) < 2:
+        if len(symbols) < 2 or len(panel.returns) < 2:
             return {}
         
-        # 构建收益率矩阵
-        min_len = min(len(r) for r in returns_matrix)
-        aligned_returns = np.array([r[-min_len:] for r in returns_matrix])
-        
         # 计算加权组合收益率
         weights_array = np.array(weights)
-        portfolio_returns = np.dot(weights_array, aligned_returns)
+        portfolio_returns = panel.portfolio_returns(weights_array)
         
-        # 组合波动率
-        portfolio_vol = np.std(portfolio_returns) * math.sqrt(self.TRADING_DAYS)
-        
-        # 组合年化收益
-        portfolio_annual_return = np.mean(portfolio_returns) * self.TRADING_DAYS
-        
-        # 组合夏普比率
-        excess_return = portfolio_annual_return - self.risk_free_rate
-        portfolio_sharpe = excess_return / portfolio_vol if portfolio_vol > 0 else 0
+        # 组合波动率、年化收益与夏普比率 (与单资产指标定义一致)
+        portfolio_vol = float(risk_metrics.volatility(portfolio_returns, self.TRADING_DAYS))
+        portfolio_annual_return = float(risk_metrics.annualized_return(portfolio_returns, self.TRADING_DAYS))
+        portfolio_sharpe = float(risk_metrics.sharpe_ratio(portfolio_returns, self.risk_free_rate,
+                                                           self.TRADING_DAYS))
         
         # 组合 VaR
-        portfolio_var_95 = np.percentile(portfolio_returns, 5)
-        portfolio_var_99 = np.percentile(portfolio_returns, 1)
-        portfolio_cvar_95 = portfolio_returns[portfolio_returns <= portfolio_var_95].mean()
+        portfolio_var_95 = float(risk_metrics.historical_var(portfolio_returns, 0.95))
+        portfolio_var_99 = float(risk_metrics.historical_var(portfolio_returns, 0.99))
+        portfolio_cvar_95 = float(risk_metrics.historical_cvar(portfolio_returns, 0.95, portfolio_var_95))
+        
+        # 相关性矩阵: 样本法有缺失值时按成对完整样本计算，其余估计方法使用完整日期
+        if cov_method == 'sample':
+            corr_matrix = panel.correlation()
+            cov = panel.covariance()
+        else:
+            cov = cached_estimate(symbols, panel.returns, panel.dates[-1], cov_method)
+            corr_matrix = to_correlation(cov)
         
-        # 相关性矩阵
-        corr_matrix = np.corrcoef(aligned_returns)
+        # 事前波动率 (由协方差矩阵得到)
+        ex_ante_vol = math.sqrt(max(float(weights_array @ cov @ weights_array), 0.0) * self.TRADING_DAYS)
         
         # 分散化效益
         weighted_vol = sum(w * m.annualized_volatility for w, m in zip(weights, individual_metrics))
@@ -557,6 +526,9 @@ class RiskAnalyzer:
             'var_99_daily': round(portfolio_var_99, 6),
             'cvar_95_daily': round(portfolio_cvar_95, 6),
             'diversification_benefit': round(diversification_benefit, 4),
+            'ex_ante_volatility': round(ex_ante_vol, 4),
+            'covariance_method': cov_method,
+            'observations': len(portfolio_returns),
             'correlation_matrix': {
                 symbols[i]: {symbols[j]: round(corr_matrix[i][j], 4) 
                            for j in range(len(symbols))}
@@ -565,8 +537,9 @@ class RiskAnalyzer:
         }
 
 
-def print_risk_report(metrics: RiskMetrics, format: str = 'table'):
-    """打印风险分析报告"""
+def print_risk_report(metrics: RiskMetrics, format: str = 'table',
+                      episodes: Optional[List[DrawdownEpisode]] = None):
+    """打印风险分析报告 (episodes 为要展示的回撤区间)"""
     
     if format == 'json':
         print(metrics.to_json())
@@ -612,6 +585,11 @@ def print_risk_report(metrics: RiskMetrics, format: str = 'table'):
     print(f"  峰度:            {metrics.kurtosis:>8.3f} {'(肥尾⚠️)' if metrics.kurtosis > 1 else '(正常)'}")
     print(f"  JB检验p值:       {metrics.jarque_bera_pvalue:>8.6f} {'(正态)' if metrics.is_normal else '(非正态)'}")
     
+    if episodes:
+        print(f"\n📉 最大的 {len(episodes)} 次回撤")
+        for line in format_episode_table(episodes).splitlines():
+            print(f"  {line}")
+    
     # 风险评级
     risk_score = calculate_risk_score(metrics)
     print(f"\n🏷️  综合风险评级: {risk_score}")
@@ -656,6 +634,24 @@ def main():
     parser.add_argument('--risk-free-rate', '-r', type=float, default=0.045, help='无风险利率 (默认4.5%%)')
     parser.add_argument('--demo', action='store_true', help='使用演示数据')
     parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+    parser.add_argument('--episodes', type=int, default=5, help='单资产报告展示的最大回撤区间数 (默认5，0 不展示)')
+    parser.add_argument('--bar-cache', help='本地K线缓存文件 (默认 data/bar_cache.sqlite)')
+    parser.add_argument('--no-cache', action='store_true', help='禁用本地K线缓存，每次全量下载')
+    parser.add_argument('--result-cache', help='组合分析结果缓存文件 (默认 data/risk_cache.sqlite)')
+    parser.add_argument('--no-result-cache', action='store_true', help='禁用结果缓存，每次重新计算全部指标')
+    parser.add_argument('--fill', choices=['ffill', 'none'], default='ffill',
+                        help='休市日价格填充策略 (默认 ffill: 沿用上一收盘价)')
+    parser.add_argument('--drop', choices=['any', 'all'], default='any',
+                        help='缺失日期删除策略 (默认 any: 删除仍有缺失的日期; all: 保留并按成对完整样本计算)')
+    parser.add_argument('--min-coverage', type=float, default=0.5,
+                        help='保留日期的实际交易标的占比须严格大于该值 (默认0.5，即过半数)')
+    parser.add_argument('--mc-paths', type=int, default=0,
+                        help='组合分析时追加蒙特卡洛 VaR 的路径数 (默认0: 不模拟)')
+    parser.add_argument('--mc-method', choices=MC_METHODS, default='t',
+                        help='蒙特卡洛情景生成方法 (默认 t)')
+    parser.add_argument('--horizon', type=int, default=1, help='蒙特卡洛持有期交易日数 (默认1)')
+    parser.add_argument('--cov-method', choices=COV_METHODS, default='sample',
+                        help='协方差估计方法 (sample/ledoit_wolf/ewma/pca，默认 sample)')
     
     args = parser.parse_args()
     
@@ -663,15 +659,23 @@ def main():
         parser.print_help()
         sys.exit(1)
     
-    analyzer = RiskAnalyzer(use_demo=args.demo, risk_free_rate=args.risk_free_rate)
+    bar_store = None if (args.demo or args.no_cache) else BarStore(args.bar_cache)
+    result_cache = None if (args.demo or args.no_result_cache) else ResultCache(args.result_cache)
+    analyzer = RiskAnalyzer(use_demo=args.demo, risk_free_rate=args.risk_free_rate,
+                            bar_store=bar_store, result_cache=result_cache)
     
     try:
         if args.portfolio_file:
-            result = analyzer.analyze_portfolio(args.portfolio_file, args.days)
+            result = analyzer.analyze_portfolio(args.portfolio_file, args.days, fill=args.fill,
+                                                drop=args.drop, min_coverage=args.min_coverage,
+                                                mc_paths=args.mc_paths, mc_method=args.mc_method,
+                                                mc_horizon=args.horizon, cov_method=args.cov_method)
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
-            metrics = analyzer.analyze_symbol(args.symbol, args.days)
-            print_risk_report(metrics, args.output)
+            df = analyzer.get_historical_data(args.symbol, args.days)
+            metrics = analyzer.analyze_symbol(args.symbol, args.days, df=df)
+            episodes = analyzer.calculate_drawdowns(df).worst(args.episodes) if args.episodes > 0 else None
+            print_risk_report(metrics, args.output, episodes)
     
     except Exception as e:
         print(f"❌ 分析失败: {e}")
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+风险结果缓存 - Content-Addressed Risk Result Cache
+基于 SQLite 的磁盘缓存，键为 (持仓快照哈希, 数据截止日期, 数据内容摘要, 参数) 的 SHA-256
+
+- 组合级: portfolio.json 持仓与行情都没变时 (如两次 cron 之间)，直接返回上次的完整分析结果
+- 标的级: 只有部分标的的价格更新时，其余标的的单资产指标从缓存读取，只重算失效的标的
+- 超过 max_entries 条时按最近访问时间淘汰 (LRU)
+
+键中包含数据内容摘要，行情修订 (如复权调整) 也会使缓存失效，不会返回过期结果。
+
+用法:
+    cache = ResultCache()
+    key = cache.key('portfolio', holdings=[('MSFT', 0.2)], as_of='2026-02-19', days=252)
+    result = cache.get(key)
+
+    python result_cache.py --stats
+    python result_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+# 默认缓存文件位置
+DEFAULT_RESULT_CACHE = Path(__file__).parent / 'data' / 'risk_cache.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at);
+"""
+
+
+def digest_array(values: np.ndarray) -> str:
+    """数组内容摘要 (形状 + 原始字节，NaN 的位模式固定)"""
+    values = np.ascontiguousarray(values)
+    h = hashlib.sha256(str(values.shape).encode())
+    h.update(str(values.dtype).encode())
+    h.update(values.tobytes())
+    return h.hexdigest()
+
+
+def _canonical(value):
+    """转换为可稳定序列化的结构 (浮点数统一保留 10 位小数)"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), 10)
+    if isinstance(value, (np.integer, np.bool_)):
+        return value.item()
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+class ResultCache:
+    """SQLite 结果缓存 (LRU)"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 2000):
+        """
+        Args:
+            path: SQLite 文件路径 (默认 investment/data/risk_cache.sqlite)
+            max_entries: 最多保留的条目数，超出时淘汰最久未访问的
+        """
+        self.path = Path(path) if path else DEFAULT_RESULT_CACHE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """每次操作使用独立连接，可在线程池中安全使用"""
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def key(kind: str, **parts) -> str:
+        """由结果类型与任意组成部分 (持仓、截止日期、摘要、参数) 生成内容寻址键"""
+        payload = json.dumps({'kind': kind, **_canonical(parts)}, sort_keys=True, ensure_ascii=False)
+        return f"{kind}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """读取缓存 (命中时更新访问时间)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def get_many(self, keys: Dict[str, str]) -> Dict[str, Dict]:
+        """
+        批量读取
+
+        Args:
+            keys: 名称 (如标的) -> 缓存键
+
+        Returns:
+            名称 -> 缓存值，未命中的名称不包含在内
+        """
+        if not keys:
+            return {}
+        by_key = {k: name for name, k in keys.items()}
+        placeholders = ','.join('?' * len(by_key))
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT key, value FROM results WHERE key IN ({placeholders})",
+                                list(by_key)).fetchall()
+        if rows:
+            with self._lock, self._connect() as conn:
+                conn.executemany("UPDATE results SET accessed_at = ? WHERE key = ?",
+                                 [(time.time(), k) for k, _ in rows])
+        self.hits += len(rows)
+        self.misses += len(keys) - len(rows)
+        return {by_key[k]: json.loads(v) for k, v in rows}
+
+    def put(self, key: str, value: Dict):
+        """写入缓存，超出容量时按 LRU 淘汰"""
+        self.put_many({key: value})
+
+    def put_many(self, items: Dict[str, Dict]):
+        """批量写入 (键 -> 值)"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(k, k.split(':', 1)[0], json.dumps(v, ensure_ascii=False), now, now)
+                for k, v in items.items()]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (key, kind, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def clear(self, kind: Optional[str] = None):
+        """清除缓存 (不指定 kind 时清空全部)"""
+        with self._lock, self._connect() as conn:
+            if kind:
+                conn.execute("DELETE FROM results WHERE kind = ?", (kind,))
+            else:
+                conn.execute("DELETE FROM results")
+
+    def stats(self) -> Dict:
+        """缓存统计"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT kind, COUNT(*), SUM(LENGTH(value)), MAX(accessed_at) FROM results "
+                "GROUP BY kind ORDER BY kind"
+            ).fetchall()
+        return {
+            kind: {
+                'entries': n,
+                'bytes': int(size or 0),
+                'last_access': time.strftime('%Y-%m-%d %H:%M', time.localtime(last)),
+            }
+            for kind, n, size, last in rows
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='风险结果缓存管理')
+    parser.add_argument('--path', help='缓存文件路径 (默认 investment/data/risk_cache.sqlite)')
+    parser.add_argument('--stats', action='store_true', help='显示缓存统计')
+    parser.add_argument('--clear', nargs='?', const='', metavar='KIND',
+                        help='清除缓存 (如 portfolio / symbol，不指定时清空全部)')
+
+    args = parser.parse_args()
+    cache = ResultCache(args.path)
+
+    if args.clear is not None:
+        cache.clear(args.clear or None)
+        print(f"🗑️  已清除结果缓存: {args.clear or '全部'}")
+    elif args.stats:
+        stats = cache.stats()
+        print(f"📦 缓存文件: {cache.path}")
+        for kind, info in stats.items():
+            print(f"   {kind:<12} {info['entries']:>6} 条  {info['bytes']/1024:>8.1f} KB  最近访问 {info['last_access']}")
+        if not stats:
+            print("   (空)")
+    else:
+        parser.print_help()
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+日期对齐的收益率面板 - Calendar-Aware Returns Panel
+把不同交易日历 (美股、港股、加密货币) 的收盘价按日期外连接为一个连续的 float64 矩阵，
+VaR、相关性、夏普等组合指标都基于同一块对齐数据计算
+
+对齐流程:
+1. 按交易所当地日期外连接 (不截尾、不丢数据)
+2. 日历过滤: 只保留实际交易标的占比严格大于 min_coverage 的日期 (默认即过半数)，
+   占比的分母只计已开始有数据的标的 (上市前的日期不算作休市)，
+   丢弃只有少数标的交易的日期 (如只有 BTC 交易的周末，两个标的时 1/2 也不保留)，
+   被丢弃日期的价格变动并入下一个保留日期的收益率
+3. 填充: 休市日沿用上一交易日收盘价 (收益率为 0)，最多连续填充 fill_limit 天
+4. 删除: 仍有缺失的日期 (某标的上市前/数据不足) 按 drop 策略处理
+5. 收益率由对齐后的价格计算；drop='all' 时保留的缺失值在协方差中按成对完整样本处理
+
+用法:
+    panel = ReturnsPanel.from_frames({'MSFT': df1, '700.HK': df2, 'BTC': df3})
+    cov = panel.covariance()
+    port = panel.portfolio_returns(weights)
+"""
+
+import sys
+from typing import Dict, List
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+FILL_POLICIES = ('ffill', 'none')
+DROP_POLICIES = ('any', 'all')
+
+
+def _trading_dates(dates: pd.Series) -> np.ndarray:
+    """统一为交易所当地日期 (去掉时区和时间部分)，返回 datetime64[D] 数组"""
+    values = np.asarray(dates)
+    if not np.issubdtype(values.dtype, np.datetime64):
+        # 字符串或带时区的日期: 先按当地时间去掉时区
+        dates = pd.to_datetime(pd.Series(dates))
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        values = dates.to_numpy()
+    return values.astype('datetime64[D]')
+
+
+class ReturnsPanel:
+    """
+    对齐后的价格与收益率矩阵
+
+    prices 形状为 (交易日数, 标的数)，returns 比 prices 少一行；
+    两者都是 C 连续的 float64 数组，缺失值为 NaN
+    """
+
+    __slots__ = ('dates', 'symbols', 'prices', 'returns')
+
+    def __init__(self, dates: pd.DatetimeIndex, symbols: List[str], prices: np.ndarray):
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.prices = np.ascontiguousarray(prices, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.returns = np.ascontiguousarray(self.prices[1:] / self.prices[:-1] - 1.0)
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], fill: str = 'ffill',
+                    drop: str = 'any', fill_limit: int = 5,
+                    min_coverage: float = 0.5) -> 'ReturnsPanel':
+        """
+        从各标的的K线构建面板
+
+        Args:
+            frames: 标的 -> DataFrame(date, close, ...)
+            fill: 'ffill' 休市日沿用上一收盘价；'none' 不填充
+            drop: 'any' 删除仍有任一标的缺失的日期；'all' 只删除全部缺失的日期
+            fill_limit: 最多连续填充的天数 (超过视为停牌/数据缺失)
+            min_coverage: 保留日期的实际交易标的占比 (分母为当日已有数据的标的) 必须严格大于该值 (0.5 即过半数)
+        """
+        if fill not in FILL_POLICIES:
+            raise ValueError(f"fill 必须是 {FILL_POLICIES} 之一")
+        if drop not in DROP_POLICIES:
+            raise ValueError(f"drop 必须是 {DROP_POLICIES} 之一")
+
+        if not frames:
+            return cls(pd.DatetimeIndex([]), [], np.empty((0, 0)))
+
+        # 1. 外连接 (所有日期的并集 + searchsorted 填入矩阵，同一日期保留最后一条)
+        symbols = list(frames)
+        dates = [_trading_dates(frames[s]['date']) for s in symbols]
+        union = np.unique(np.concatenate(dates))
+        matrix = np.full((len(union), len(symbols)), np.nan)
+        for j, symbol in enumerate(symbols):
+            close = frames[symbol]['close'].to_numpy(dtype=np.float64)
+            day, last = np.unique(dates[j][::-1], return_index=True)
+            matrix[np.searchsorted(union, day), j] = close[::-1][last]
+        table = pd.DataFrame(matrix, index=pd.DatetimeIndex(union.astype('datetime64[ns]')), columns=symbols)
+
+        # 2. 日历过滤
+        traded = table.notna().to_numpy()
+        # 上市 (首个有数据的日期) 之前的标的不计入分母，避免晚上市的标的把其他市场的交易日挤掉
+        listed = np.maximum.accumulate(traded, axis=0).sum(axis=1)
+        # 严格大于: 两个标的时一半在交易 (如 BTC + SPY 的周末) 也丢弃，避免休市标的出现虚假的 0 收益
+        table = table[traded.sum(axis=1) > min_coverage * listed]
+
+        # 3. 填充
+        if fill == 'ffill':
+            table = table.ffill(limit=fill_limit)
+
+        # 4. 删除
+        table = table.dropna(how=drop)
+
+        return cls(table.index, list(table.columns), table.to_numpy(dtype=np.float64))
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def complete(self) -> bool:
+        """收益率矩阵无缺失值"""
+        return not np.isnan(self.returns).any()
+
+    def column(self, symbol: str) -> pd.DataFrame:
+        """单个标的的对齐价格 (date, close)，供单资产指标使用"""
+        j = self.symbols.index(symbol)
+        prices = self.prices[:, j]
+        mask = ~np.isnan(prices)
+        return pd.DataFrame({'date': self.dates[mask], 'close': prices[mask]})
+
+    def select(self, symbols: List[str]) -> 'ReturnsPanel':
+        """子面板 (保持同一日期索引)"""
+        idx = [self.symbols.index(s) for s in symbols]
+        return ReturnsPanel(self.dates, symbols, self.prices[:, idx])
+
+    def _pairwise_moments(self, min_periods: int):
+        """成对完整样本的 (观测数, 协方差, 各自方差)"""
+        valid = ~np.isnan(self.returns)
+        x = np.where(valid, self.returns, 0.0)
+        m = valid.astype(np.float64)
+
+        n = m.T @ m                       # 两两共同观测数
+        sx = x.T @ m                      # sx[i, j] = 在 i、j 都有值的日期上 x_i 的和
+        sxx = (x * x).T @ m               # 同上，x_i 的平方和
+        sxy = x.T @ x                     # 共同日期上 x_i * x_j 的和
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (sxy - sx * sx.T / n) / (n - 1)
+            var = (sxx - sx * sx / n) / (n - 1)
+        too_few = n < max(min_periods, 2)
+        cov[too_few] = np.nan
+        var[too_few] = np.nan
+        return n, cov, var
+
+    def covariance(self, min_periods: int = 2) -> np.ndarray:
+        """
+        收益率协方差矩阵 (ddof=1)
+
+        无缺失值时等价于 np.cov；有缺失值时每对标的只使用两者都有数据的日期
+        """
+        if self.complete:
+            if len(self.returns) < max(min_periods, 2):
+                return np.full((len(self.symbols),) * 2, np.nan)
+            return np.atleast_2d(np.cov(self.returns, rowvar=False))
+        _, cov, _ = self._pairwise_moments(min_periods)
+        return cov
+
+    def correlation(self, min_periods: int = 2) -> np.ndarray:
+        """收益率相关系数矩阵 (缺失值按成对完整样本处理)"""
+        if self.complete:
+            cov = self.covariance(min_periods)
+            std = np.sqrt(np.diag(cov))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return cov / np.outer(std, std)
+        _, cov, var = self._pairwise_moments(min_periods)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return cov / np.sqrt(var * var.T)
+
+    def portfolio_returns(self, weights: np.ndarray) -> np.ndarray:
+        """
+        组合日收益率
+
+        某日缺失的标的按收益率 0 计入 (相当于该部分仓位持有现金)
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        return np.nan_to_num(self.returns) @ weights
+
+    def to_frame(self, returns: bool = True) -> pd.DataFrame:
+        """转换为 DataFrame (用于导出或调试)"""
+        if returns:
+            return pd.DataFrame(self.returns, index=self.dates[1:], columns=self.symbols)
+        return pd.DataFrame(self.prices, index=self.dates, columns=self.symbols)
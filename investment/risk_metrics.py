@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+风险指标库 - Vectorized Risk Metrics
+investment/portfolio_risk.py、skills/portfolio-risk 与 skills/portfolio-risk-assessment 共用的指标实现
+
+所有函数都接受价格/收益率的一维序列 (T,) 或矩阵 (T, N)，沿时间轴 (axis=0) 一次性计算每一列，
+没有逐标的的 Python 循环；一维输入返回标量，矩阵输入返回 (N,) 数组。
+指标定义:
+- 收益率: 简单收益率 p[t]/p[t-1]-1
+- 波动率: 样本标准差 (ddof=1)，年化乘 sqrt(252)
+- 年化收益: (1+日均收益)^252-1，夏普/索提诺 = (年化收益-无风险利率) / 年化(下行)波动率
+- VaR: 历史分位数 (线性插值)；CVaR: 不高于 VaR 的收益率均值
+- 偏度/峰度: 样本修正的偏度与超额峰度 (与 pandas 的 skew/kurtosis 一致)
+- 回撤: 相对历史最高点，持续天数为最长连续水下K线数 (drawdown_stats 即 drawdown.py 的实现)
+
+用法:
+    metrics = compute_metrics(prices, risk_free_rate=0.045)   # prices: (T, N)
+    metrics['sharpe_ratio'], metrics['var_95']
+
+    python risk_metrics.py --benchmark
+    python risk_metrics.py --benchmark --assets 10 100 1000 --days 756
+"""
+
+import argparse
+import math
+import sys
+import time
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+from drawdown import drawdown_stats
+
+TRADING_DAYS = 252
+
+
+def _as_float(values) -> np.ndarray:
+    """转换为 float64 数组 (已是 float64 时不复制)"""
+    return np.asarray(values, dtype=np.float64)
+
+
+def simple_returns(prices) -> np.ndarray:
+    """日收益率 (比价格少一行)"""
+    prices = _as_float(prices)
+    return prices[1:] / prices[:-1] - 1.0
+
+
+def total_return(prices):
+    """区间总收益率"""
+    prices = _as_float(prices)
+    return prices[-1] / prices[0] - 1.0
+
+
+def annualized_return(returns, trading_days: int = TRADING_DAYS):
+    """年化收益率 (1+日均收益)^trading_days-1"""
+    return (1.0 + _as_float(returns).mean(axis=0)) ** trading_days - 1.0
+
+
+def volatility(returns, trading_days: Optional[int] = None):
+    """波动率 (样本标准差)，给定 trading_days 时年化"""
+    vol = _as_float(returns).std(axis=0, ddof=1)
+    return vol * math.sqrt(trading_days) if trading_days else vol
+
+
+def downside_volatility(returns, trading_days: Optional[int] = None):
+    """下行波动率: 负收益的样本标准差 (负收益少于 2 个时为 0)"""
+    x = _as_float(returns)
+    neg = x < 0
+    count = neg.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(neg, x, 0.0).sum(axis=0) / count
+        dev = np.where(neg, x - mean, 0.0)
+        vol = np.sqrt((dev * dev).sum(axis=0) / (count - 1))
+    vol = np.where(count >= 2, vol, 0.0)
+    return vol * math.sqrt(trading_days) if trading_days else vol
+
+
+def _ratio(numerator, denominator):
+    """denominator 为 0 时取 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, 0.0)
+
+
+def sharpe_ratio(returns, risk_free_rate: float = 0.045, trading_days: int = TRADING_DAYS):
+    """夏普比率 (年化收益-无风险利率) / 年化波动率"""
+    excess = annualized_return(returns, trading_days) - risk_free_rate
+    return _ratio(excess, volatility(returns, trading_days))
+
+
+def sortino_ratio(returns, risk_free_rate: float = 0.045, trading_days: int = TRADING_DAYS):
+    """索提诺比率 (年化收益-无风险利率) / 年化下行波动率"""
+    excess = annualized_return(returns, trading_days) - risk_free_rate
+    return _ratio(excess, downside_volatility(returns, trading_days))
+
+
+def historical_var(returns, confidence: float = 0.95):
+    """历史模拟法 VaR (负值表示损失)"""
+    return np.percentile(_as_float(returns), (1 - confidence) * 100, axis=0)
+
+
+def historical_cvar(returns, confidence: float = 0.95, var=None):
+    """CVaR (条件VaR / 预期亏损): 不高于 VaR 的收益率均值"""
+    x = _as_float(returns)
+    if var is None:
+        var = historical_var(x, confidence)
+    tail = x <= var
+    return np.where(tail, x, 0.0).sum(axis=0) / tail.sum(axis=0)
+
+
+def moments(returns) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    样本偏度与超额峰度 (与 pandas Series.skew / kurtosis 的无偏修正一致)
+
+    Returns:
+        (偏度, 超额峰度)
+    """
+    x = _as_float(returns)
+    n = len(x)
+    dev = x - x.mean(axis=0)
+    dev2 = dev * dev
+    m2 = dev2.mean(axis=0)
+    m3 = (dev2 * dev).mean(axis=0)
+    m4 = (dev2 * dev2).mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skew = math.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+        kurt = (n - 1) / ((n - 2) * (n - 3)) * ((n + 1) * m4 / (m2 * m2) - 3 * (n - 1))
+    return np.where(m2 > 0, skew, 0.0), np.where(m2 > 0, kurt, 0.0)
+
+
+def parametric_var(returns, confidence: float = 0.95):
+    """参数法 VaR (假设正态分布): μ + z·σ"""
+    x = _as_float(returns)
+    z = NormalDist().inv_cdf(1 - confidence)
+    return x.mean(axis=0) + z * x.std(axis=0, ddof=1)
+
+
+def cornish_fisher_var(returns, confidence: float = 0.95, skew=None, kurt=None):
+    """Cornish-Fisher VaR (用偏度与峰度修正正态分位数)"""
+    x = _as_float(returns)
+    if skew is None or kurt is None:
+        skew, kurt = moments(x)
+    z = NormalDist().inv_cdf(1 - confidence)
+    z_cf = (z +
+            (z**2 - 1) * skew / 6 +
+            (z**3 - 3 * z) * kurt / 24 -
+            (2 * z**3 - 5 * z) * skew**2 / 36)
+    return x.mean(axis=0) + z_cf * x.std(axis=0, ddof=1)
+
+
+def jarque_bera_pvalue(returns, skew=None, kurt=None):
+    """Jarque-Bera 正态性检验 p 值 (自由度 2 的卡方分布: p = exp(-JB/2))"""
+    x = _as_float(returns)
+    if skew is None or kurt is None:
+        skew, kurt = moments(x)
+    jb = len(x) / 6 * (skew**2 + kurt**2 / 4)
+    return np.exp(-jb / 2)
+
+
+def beta(returns, benchmark):
+    """Beta = cov(r, b) / var(b)，benchmark 为与 returns 对齐的一维基准收益率"""
+    x = _as_float(returns)
+    b = _as_float(benchmark)
+    b = b - b.mean()
+    if x.ndim > 1:
+        b = b[:, None]
+    cov = ((x - x.mean(axis=0)) * b).sum(axis=0)
+    return _ratio(cov, (b * b).sum(axis=0))
+
+
+def compute_metrics(prices, risk_free_rate: float = 0.045, trading_days: int = TRADING_DAYS,
+                    benchmark=None) -> Dict[str, np.ndarray]:
+    """
+    一次性计算全部风险指标
+
+    Args:
+        prices: 价格序列 (T,) 或价格矩阵 (T, N)，不能含缺失值
+        risk_free_rate: 年化无风险利率
+        trading_days: 一年交易天数
+        benchmark: 与收益率对齐的基准日收益率 (T-1,)，提供时追加 beta
+
+    Returns:
+        Dict: 指标名 (与 RiskMetrics 字段同名) -> 标量或 (N,) 数组
+    """
+    prices = _as_float(prices)
+    returns = simple_returns(prices)
+
+    ann_return = annualized_return(returns, trading_days)
+    daily_vol = volatility(returns)
+    down_vol = downside_volatility(returns)
+    excess = ann_return - risk_free_rate
+    max_dd, max_dd_duration, avg_dd = drawdown_stats(prices)
+    skew, kurt = moments(returns)
+    var_95 = historical_var(returns, 0.95)
+    var_99 = historical_var(returns, 0.99)
+
+    metrics = {
+        'trading_days': len(returns),
+        'total_return': total_return(prices),
+        'annualized_return': ann_return,
+        'daily_mean_return': returns.mean(axis=0),
+        'daily_volatility': daily_vol,
+        'annualized_volatility': daily_vol * math.sqrt(trading_days),
+        'downside_volatility': down_vol,
+        'sharpe_ratio': _ratio(excess, daily_vol * math.sqrt(trading_days)),
+        'sortino_ratio': _ratio(excess, down_vol * math.sqrt(trading_days)),
+        'calmar_ratio': _ratio(ann_return, np.abs(max_dd)),
+        'max_drawdown': max_dd,
+        'max_drawdown_duration': max_dd_duration,
+        'avg_drawdown': avg_dd,
+        'var_95': var_95,
+        'var_99': var_99,
+        'cvar_95': historical_cvar(returns, 0.95, var_95),
+        'cvar_99': historical_cvar(returns, 0.99, var_99),
+        'skewness': skew,
+        'kurtosis': kurt,
+        'jarque_bera_pvalue': jarque_bera_pvalue(returns, skew, kurt),
+        'var_parametric_95': parametric_var(returns, 0.95),
+        'var_cornish_fisher_95': cornish_fisher_var(returns, 0.95, skew, kurt),
+    }
+    if benchmark is not None:
+        metrics['beta'] = beta(returns, benchmark)
+    return metrics
+
+
+def _synthetic_prices(days: int, assets: int, rng: np.random.Generator) -> np.ndarray:
+    """带共同因子的模拟价格矩阵 (days, assets)"""
+    market = rng.normal(0.0004, 0.01, (days, 1))
+    loadings = rng.uniform(0.5, 1.5, assets)
+    returns = market * loadings + rng.standard_t(5, (days, assets)) * 0.012
+    return 100 * np.cumprod(1 + returns, axis=0)
+
+
+def run_benchmark(asset_counts: Sequence[int], days: int = 756, repeat: int = 5) -> List[Dict]:
+    """
+    基准测试: 各指标在不同资产数的模拟组合上的耗时 (取最快一次)
+
+    Args:
+        asset_counts: 资产数量列表
+        days: 每个资产的K线数
+        repeat: 重复次数
+    """
+    rng = np.random.default_rng(42)
+    results = []
+
+    for n in asset_counts:
+        prices = _synthetic_prices(days, n, rng)
+        returns = simple_returns(prices)
+        benchmark = returns.mean(axis=1)
+        cases: Dict[str, Callable[[], object]] = {
+            'returns': lambda: simple_returns(prices),
+            'volatility': lambda: volatility(returns, TRADING_DAYS),
+            'downside_vol': lambda: downside_volatility(returns, TRADING_DAYS),
+            'sharpe': lambda: sharpe_ratio(returns),
+            'sortino': lambda: sortino_ratio(returns),
+            'var_hist': lambda: historical_var(returns),
+            'cvar_hist': lambda: historical_cvar(returns),
+            'var_cf': lambda: cornish_fisher_var(returns),
+            'drawdown': lambda: drawdown_stats(prices),
+            'beta': lambda: beta(returns, benchmark),
+            'all': lambda: compute_metrics(prices, benchmark=benchmark),
+        }
+        timings = {}
+        for name, fn in cases.items():
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+
+        # 对比: 逐标的调用 (相当于每个标的单独跑一遍分析)
+        start = time.perf_counter()
+        for j in range(n):
+            compute_metrics(prices[:, j], benchmark=benchmark)
+        timings['per_asset_loop'] = time.perf_counter() - start
+
+        results.append({'assets': n, 'days': days, 'seconds': timings})
+
+    names = list(results[0]['seconds']) if results else []
+    print(f"\n{'='*(16 + 12 * len(results))}")
+    print(f"📊 风险指标基准测试 ({days} 根日K线，耗时 ms)")
+    print(f"{'='*(16 + 12 * len(results))}")
+    print(f"{'指标':<16}" + ''.join(f"{r['assets']:>9,}资产" for r in results))
+    for name in names:
+        print(f"{name:<16}" + ''.join(f"{r['seconds'][name]*1000:>12.3f}" for r in results))
+
+    for r in results:
+        batched, loop = r['seconds']['all'], r['seconds']['per_asset_loop']
+        speedup = loop / batched if batched > 0 else float('inf')
+        print(f"\n⚡ {r['assets']:,} 资产: 批量 {batched*1000:.1f}ms, 逐标的 {loop*1000:.1f}ms, 加速 {speedup:,.1f}x")
+    print()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='向量化风险指标库')
+    parser.add_argument('--benchmark', action='store_true', help='运行基准测试')
+    parser.add_argument('--assets', type=int, nargs='+', default=[10, 100, 1000],
+                        help='基准测试的资产数 (默认: 10/100/1000)')
+    parser.add_argument('--days', type=int, default=756, help='每个资产的K线数 (默认756)')
+    parser.add_argument('--repeat', type=int, default=5, help='每个指标重复次数')
+
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return 1
+
+    run_benchmark(args.assets, args.days, args.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
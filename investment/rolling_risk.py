@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+滚动窗口风险指标 - Rolling-Window Risk Metrics
+一次性计算整段历史上每个交易日的滚动波动率、夏普、索提诺、VaR、CVaR、Beta、最大回撤，
+不对每个窗口重新调用 RiskAnalyzer.analyze_symbol
+
+实现:
+- 均值 / 波动率 / 下行波动率 / Beta: 前缀和 (cumsum) 相减得到窗口内的和与平方和，O(T)
+- VaR / CVaR: sliding_window_view 构造跨步视图 (不复制数据)，按窗口求分位数与尾部均值
+- 最大回撤: 对数净值的跨步视图上做 maximum.accumulate
+- 各指标定义与 RiskAnalyzer.analyze_symbol 一致 (样本标准差、(1+日均)^252-1 年化、历史分位 VaR)
+
+用法:
+    series = rolling_metrics(returns, window=63, benchmark=spy_returns)
+
+    python rolling_risk.py --portfolio-file data/portfolio.json --windows 63 126 252
+    python rolling_risk.py --symbol MSFT --benchmark QQQ --days 756 --save data/risk_history.json
+"""
+
+import argparse
+import json
+import math
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+DEFAULT_WINDOWS = (63, 126, 252)
+
+# 输出的指标 (顺序即 JSON 中的顺序)
+METRICS = ['volatility', 'sharpe', 'sortino', 'var_95', 'cvar_95', 'beta', 'max_drawdown']
+
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """沿时间轴 (axis=0) 滚动求和 (前 window-1 个位置为 NaN)，x 可以是多维数组"""
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        c = np.concatenate((np.zeros((1,) + x.shape[1:]), np.cumsum(x, axis=0)))
+        out[window - 1:] = c[window:] - c[:-window]
+    return out
+
+
+def _sliding(x: np.ndarray, window: int) -> np.ndarray:
+    """窗口视图 (len(x)-window+1, window)，长度不足时为空"""
+    if len(x) < window:
+        return np.empty((0, window))
+    return sliding_window_view(x, window)
+
+
+def _pad(values: np.ndarray, length: int) -> np.ndarray:
+    """在前面补 NaN，使结果与输入序列等长"""
+    out = np.full(length, np.nan)
+    if len(values):
+        out[length - len(values):] = values
+    return out
+
+
+def rolling_metrics(returns: np.ndarray, window: int, benchmark: Optional[np.ndarray] = None,
+                    risk_free_rate: float = 0.045, trading_days: int = 252) -> Dict[str, np.ndarray]:
+    """
+    计算滚动风险指标
+
+    Args:
+        returns: 日收益率序列 (T,)
+        window: 窗口长度 (交易日)
+        benchmark: 与 returns 对齐的基准日收益率 (用于 Beta)，None 时不计算 Beta
+        risk_free_rate: 年化无风险利率
+        trading_days: 一年交易天数
+
+    Returns:
+        Dict: 指标名 -> 与 returns 等长的数组，前 window-1 个值为 NaN
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    n = len(x)
+    w = float(window)
+
+    # 均值与波动率 (先减去全样本均值，减小前缀和相减的舍入误差)
+    shift = x.mean() if n else 0.0
+    d = x - shift
+    s1 = rolling_sum(d, window)
+    s2 = rolling_sum(d * d, window)
+    mean = s1 / w + shift
+    with np.errstate(invalid='ignore'):
+        daily_vol = np.sqrt(np.maximum((s2 - s1 * s1 / w) / (w - 1), 0.0))
+    ann_vol = daily_vol * math.sqrt(trading_days)
+    ann_return = (1 + mean) ** trading_days - 1
+    excess = ann_return - risk_free_rate
+
+    # 下行波动率: 窗口内负收益的样本标准差
+    neg = np.minimum(x, 0.0)
+    n_neg = rolling_sum((x < 0).astype(np.float64), window)
+    neg1 = rolling_sum(neg, window)
+    neg2 = rolling_sum(neg * neg, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        down_vol = np.sqrt(np.maximum((neg2 - neg1 * neg1 / n_neg) / (n_neg - 1), 0.0))
+    down_vol = np.where(n_neg >= 2, down_vol, 0.0) * math.sqrt(trading_days)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(ann_vol > 0, excess / ann_vol, 0.0)
+        sortino = np.where(down_vol > 0, excess / down_vol, 0.0)
+    sharpe[np.isnan(mean)] = np.nan
+    sortino[np.isnan(mean)] = np.nan
+
+    # 历史 VaR / CVaR
+    view = _sliding(x, window)
+    var_95 = np.percentile(view, 5, axis=1) if len(view) else np.empty(0)
+    tail = view <= var_95[:, None]
+    cvar_95 = (view * tail).sum(axis=1) / tail.sum(axis=1) if len(view) else np.empty(0)
+
+    # 最大回撤: 窗口起点净值为 1，对数净值减去窗口内累计最高点
+    log_nav = np.concatenate(([0.0], np.cumsum(np.log1p(x))))
+    nav_view = _sliding(log_nav, window + 1)
+    if len(nav_view):
+        max_dd = np.expm1((nav_view - np.maximum.accumulate(nav_view, axis=1)).min(axis=1))
+    else:
+        max_dd = np.empty(0)
+    max_dd = _pad(max_dd, n + 1)[1:]
+
+    result = {
+        'volatility': ann_vol,
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'var_95': _pad(var_95, n),
+        'cvar_95': _pad(cvar_95, n),
+        'max_drawdown': max_dd,
+    }
+
+    # Beta = cov(r, b) / var(b)
+    if benchmark is not None:
+        b = np.asarray(benchmark, dtype=np.float64) - np.mean(benchmark)
+        sb = rolling_sum(b, window)
+        sbb = rolling_sum(b * b, window)
+        sxb = rolling_sum(d * b, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['beta'] = (sxb - s1 * sb / w) / (sbb - sb * sb / w)
+    else:
+        result['beta'] = np.full(n, np.nan)
+
+    return {name: result[name] for name in METRICS}
+
+
+def _json_values(values: np.ndarray, digits: int = 6) -> List[Optional[float]]:
+    """NaN/inf 转为 null，便于前端图表直接使用"""
+    return [round(float(v), digits) if np.isfinite(v) else None for v in values]
+
+
+def build_history(dates: Sequence, returns: np.ndarray, windows: Sequence[int] = DEFAULT_WINDOWS,
+                  benchmark: Optional[np.ndarray] = None, risk_free_rate: float = 0.045,
+                  subject: str = 'portfolio', benchmark_symbol: Optional[str] = None) -> Dict:
+    """
+    生成供仪表盘绘制净值与滚动风险曲线的 JSON 结构
+
+    Args:
+        dates: 与 returns 对齐的日期
+        returns: 日收益率序列
+        windows: 滚动窗口列表
+
+    Returns:
+        Dict: dates / nav (起点为 1) / windows -> 指标 -> 序列
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    nav = np.cumprod(1 + returns)
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'subject': subject,
+        'benchmark': benchmark_symbol,
+        'dates': [d.strftime('%Y-%m-%d') for d in dates],
+        'nav': _json_values(nav),
+        'windows': {
+            str(window): {
+                name: _json_values(values)
+                for name, values in rolling_metrics(returns, window, benchmark, risk_free_rate).items()
+            }
+            for window in windows
+        },
+    }
+
+
+def print_latest(history: Dict):
+    """打印各窗口的最新值"""
+    print(f"\n{'='*70}")
+    print(f"📈 滚动风险指标: {history['subject']} (截至 {history['dates'][-1] if history['dates'] else '-'})")
+    print(f"{'='*70}")
+    print(f"{'窗口':<8}" + ''.join(f"{name:>13}" for name in METRICS))
+    print('-' * (8 + 13 * len(METRICS)))
+    for window, series in history['windows'].items():
+        row = f"{window + 'd':<8}"
+        for name in METRICS:
+            value = series[name][-1] if series[name] else None
+            row += f"{'-':>13}" if value is None else f"{value:>13.4f}"
+        print(row)
+    print(f"{'='*70}\n")
+
+
+def main():
+    # 延迟导入，避免作为库使用时引入数据源依赖
+    from portfolio_risk import RiskAnalyzer
+
+    parser = argparse.ArgumentParser(description='滚动窗口风险指标')
+    parser.add_argument('--symbol', '-s', help='单个标的代码')
+    parser.add_argument('--portfolio-file', '-p', help='投资组合 JSON 文件路径')
+    parser.add_argument('--benchmark', '-b', default='SPY', help='Beta 基准 (默认 SPY)')
+    parser.add_argument('--days', '-d', type=int, default=504, help='历史数据天数 (默认504)')
+    parser.add_argument('--windows', '-w', type=int, nargs='+', default=list(DEFAULT_WINDOWS),
+                        help='滚动窗口 (默认 63 126 252)')
+    parser.add_argument('--risk-free-rate', '-r', type=float, default=0.045, help='无风险利率 (默认4.5%%)')
+    parser.add_argument('--demo', action='store_true', help='使用演示数据')
+    parser.add_argument('--save', help='保存 JSON 到文件 (供仪表盘读取)')
+    parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+
+    args = parser.parse_args()
+
+    if not args.symbol and not args.portfolio_file:
+        parser.print_help()
+        return 1
+
+    analyzer = RiskAnalyzer(use_demo=args.demo, risk_free_rate=args.risk_free_rate)
+    if args.portfolio_file:
+        symbols, weights, _, _ = analyzer.load_positions(args.portfolio_file)
+        subject = 'portfolio'
+    else:
+        symbols, weights, subject = [args.symbol], [1.0], args.symbol
+
+    fetch = symbols + ([args.benchmark] if args.benchmark not in symbols else [])
+    panel = analyzer.returns_panel(fetch, args.days)
+    if len(panel.returns) < min(args.windows):
+        print(f"❌ 对齐后只有 {len(panel.returns)} 个交易日，不足最短窗口 {min(args.windows)}")
+        return 1
+
+    weights = np.array([weights[symbols.index(s)] if s in symbols else 0.0 for s in panel.symbols])
+    returns = panel.portfolio_returns(weights / weights.sum())
+    benchmark = np.nan_to_num(panel.returns[:, panel.symbols.index(args.benchmark)])
+
+    history = build_history(panel.dates[1:], returns, args.windows, benchmark,
+                            args.risk_free_rate, subject, args.benchmark)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(history, f, ensure_ascii=False)
+        print(f"✅ 已保存到 {args.save}")
+
+    if args.output == 'json':
+        print(json.dumps(history, indent=2, ensure_ascii=False))
+    else:
+        print_latest(history)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
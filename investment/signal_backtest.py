@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+技术信号回测 - Vectorized Signal Backtester
+对 TechnicalAnalyzer 综合评分做逐K线向量化回测，并支持阈值参数网格扫描
+
+- 每根K线计算综合评分和 BULLISH/BEARISH/NEUTRAL 状态 (与 generate_signals 规则一致)
+- 收盘产生信号，下一根K线持仓，按换手计交易成本
+- 输出命中率、收益、夏普比率、最大回撤
+- 参数扫描时所有组合在一个 (组合数, K线数) 数组上同时计算
+
+用法:
+    python signal_backtest.py --symbol MSFT --days 1000 --demo
+    python signal_backtest.py --symbol MSFT --days 1000 --demo --long-short --cost-bps 5
+    python signal_backtest.py --symbol MSFT --days 1000 --demo --sweep --top 10
+"""
+
+import argparse
+import itertools
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install numpy")
+    sys.exit(1)
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+import panel_indicators
+from technical_analysis import IndicatorSet, TechnicalAnalyzer
+
+TRADING_DAYS = 252
+
+# 默认参数 (与 generate_signals 一致)
+DEFAULT_PARAMS = {
+    'threshold': 0.3,
+    'rsi_low': 30.0,
+    'rsi_high': 70.0,
+    'bb_low': 0.1,
+    'bb_high': 0.9,
+}
+
+# 默认扫描网格
+DEFAULT_GRID = {
+    'threshold': [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6],
+    'rsi_low': [20.0, 25.0, 30.0, 35.0, 40.0],
+    'rsi_high': [60.0, 65.0, 70.0, 75.0, 80.0],
+    'bb_low': [0.0, 0.05, 0.1, 0.2],
+    'bb_high': [0.8, 0.9, 0.95, 1.0],
+}
+
+SIGNAL_NAMES = {1: "BULLISH", -1: "BEARISH", 0: "NEUTRAL"}
+
+
+def signal_history(data: IndicatorSet, threshold=0.3, rsi_low=30.0, rsi_high=70.0,
+                   bb_low=0.1, bb_high=0.9):
+    """
+    计算每根K线的综合评分和信号状态
+
+    阈值参数可以是形如 (k, 1) 的数组，此时返回 (k, K线数) 的结果
+
+    Returns:
+        (score, state): state 取值 1=BULLISH, -1=BEARISH, 0=NEUTRAL
+    """
+    score, _ = panel_indicators.composite_score(
+        data['close'], data['MA5'], data['MA20'], data['RSI'],
+        data['MACD'], data['MACD_Signal'], data['BB_Percent'],
+        rsi_low=rsi_low, rsi_high=rsi_high, bb_low=bb_low, bb_high=bb_high
+    )
+    threshold = np.asarray(threshold, dtype=np.float64)
+    state = np.where(score > threshold, 1, np.where(score < -threshold, -1, 0)).astype(np.int8)
+    return score, state
+
+
+def strategy_returns(close: np.ndarray, state: np.ndarray, cost: float = 0.001,
+                     long_short: bool = False) -> Dict[str, np.ndarray]:
+    """
+    按信号状态计算逐K线策略收益
+
+    第 t 根收盘的信号决定第 t+1 根的持仓；换手部分按 cost 扣除成本。
+
+    Returns:
+        Dict: held (实际持仓), gross (毛收益), net (扣成本后收益), turnover (换手)，
+        均为 (k, K线数) 的二维数组
+    """
+    state = np.atleast_2d(state)
+    position = state.astype(np.float64) if long_short else (state > 0).astype(np.float64)
+
+    returns = np.zeros(len(close))
+    returns[1:] = close[1:] / close[:-1] - 1.0
+
+    # t 时刻持有的是 t-1 收盘时确定的仓位
+    held = np.zeros_like(position)
+    held[:, 1:] = position[:, :-1]
+    turnover = np.abs(np.diff(held, axis=1, prepend=0.0))
+
+    gross = held * returns
+    return {
+        'held': held,
+        'gross': gross,
+        'net': gross - turnover * cost,
+        'turnover': turnover,
+    }
+
+
+def simulate(close: np.ndarray, state: np.ndarray, cost: float = 0.001,
+             long_short: bool = False) -> Dict[str, np.ndarray]:
+    """
+    按信号状态模拟持仓并统计表现
+
+    state 可以是一维 (单组参数) 或二维 (每行一组参数)。
+
+    Args:
+        close: 收盘价
+        state: 信号状态
+        cost: 单边交易成本 (比例，如 0.001 = 10bp)
+        long_short: True 时看空做空，False 时只做多
+
+    Returns:
+        Dict: 各项指标 (每项为长度 k 的数组)
+    """
+    state = np.atleast_2d(state)
+    legs = strategy_returns(close, state, cost, long_short)
+    held, gross, net, turnover = legs['held'], legs['gross'], legs['net'], legs['turnover']
+
+    equity = np.cumprod(1.0 + net, axis=1)
+    running_max = np.maximum.accumulate(equity, axis=1)
+    max_drawdown = (equity / running_max - 1.0).min(axis=1)
+
+    n_bars = len(close)
+    total_return = equity[:, -1] - 1.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annualized_return = np.power(np.maximum(1.0 + total_return, 0.0),
+                                     TRADING_DAYS / max(n_bars - 1, 1)) - 1.0
+        sharpe = sharpe_ratio(net[:, 1:])
+
+        in_market = held != 0
+        bars_in_market = in_market.sum(axis=1)
+        hit_rate = np.where(bars_in_market > 0,
+                            (in_market & (gross > 0)).sum(axis=1) / bars_in_market, np.nan)
+
+    return {
+        'total_return': total_return,
+        'annualized_return': annualized_return,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': max_drawdown,
+        'hit_rate': hit_rate,
+        'trades': (turnover > 0).sum(axis=1),
+        'exposure': in_market.mean(axis=1),
+        'buy_and_hold': np.full(len(state), close[-1] / close[0] - 1.0),
+    }
+
+
+def sharpe_ratio(returns: np.ndarray) -> np.ndarray:
+    """按行计算年化夏普比率 (不扣无风险利率)，零波动时为 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        std = returns.std(axis=-1, ddof=1)
+        return np.where(std > 0, returns.mean(axis=-1) / std * math.sqrt(TRADING_DAYS), 0.0)
+
+
+def backtest(data: IndicatorSet, params: Optional[Dict] = None, cost: float = 0.001,
+             long_short: bool = False) -> Dict:
+    """单组参数回测"""
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    score, state = signal_history(data, **params)
+    metrics = simulate(data['close'], state, cost, long_short)
+
+    result = {name: _scalar(values[0]) for name, values in metrics.items()}
+    result['params'] = params
+    result['bars'] = len(data)
+    result['signal_counts'] = {
+        SIGNAL_NAMES[k]: int((state == k).sum()) for k in (1, 0, -1)
+    }
+    result['latest_signal'] = SIGNAL_NAMES[int(state[-1])]
+    return result
+
+
+def sweep(data: IndicatorSet, grid: Optional[Dict[str, Sequence[float]]] = None,
+          cost: float = 0.001, long_short: bool = False, chunk_size: int = 2000,
+          sort_by: str = 'sharpe_ratio') -> List[Dict]:
+    """
+    参数网格扫描
+
+    所有参数组合按 chunk_size 分块，每块在一个二维数组上一次性计算评分、持仓和指标，
+    内存占用与 chunk_size * K线数 成正比
+
+    Returns:
+        按 sort_by 降序排列的结果列表
+    """
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    names = list(DEFAULT_PARAMS)
+    combos = np.array(list(itertools.product(*(grid[name] for name in names))), dtype=np.float64)
+    # 剔除 RSI 下限不低于上限、布林下限不低于上限的组合
+    valid = (combos[:, 1] < combos[:, 2]) & (combos[:, 3] < combos[:, 4])
+    combos = combos[valid]
+
+    close = data['close']
+    collected = {}
+    for start in range(0, len(combos), chunk_size):
+        chunk = combos[start:start + chunk_size]
+        columns = {name: chunk[:, i:i + 1] for i, name in enumerate(names)}
+        _, state = signal_history(data, **columns)
+        metrics = simulate(close, state, cost, long_short)
+        for name, values in metrics.items():
+            collected.setdefault(name, []).append(values)
+
+    metrics = {name: np.concatenate(values) for name, values in collected.items()}
+    order = np.argsort(-np.nan_to_num(metrics[sort_by], nan=-np.inf))
+
+    results = []
+    for i in order:
+        record = {name: float(combos[i, j]) for j, name in enumerate(names)}
+        record.update({name: _scalar(values[i]) for name, values in metrics.items()})
+        results.append(record)
+    return results
+
+
+def _scalar(value):
+    """numpy 标量 -> Python 标量 (保留 4 位小数)"""
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
+
+
+def print_backtest_report(symbol: str, result: Dict):
+    """打印单组参数回测报告"""
+    print(f"\n{'='*60}")
+    print(f"📊 信号回测报告: {symbol}")
+    print(f"{'='*60}")
+    params = result['params']
+    print(f"K线数: {result['bars']}  阈值: ±{params['threshold']}  "
+          f"RSI: {params['rsi_low']:.0f}/{params['rsi_high']:.0f}  "
+          f"布林: {params['bb_low']}/{params['bb_high']}")
+
+    counts = result['signal_counts']
+    print(f"\n🎯 信号分布: 看多 {counts['BULLISH']}  观望 {counts['NEUTRAL']}  看空 {counts['BEARISH']}")
+    print(f"   最新信号: {result['latest_signal']}")
+
+    print(f"\n📈 策略表现")
+    print(f"  总收益率:        {result['total_return']*100:>8.2f}%")
+    print(f"  年化收益率:      {result['annualized_return']*100:>8.2f}%")
+    print(f"  夏普比率:        {result['sharpe_ratio']:>8.3f}")
+    print(f"  最大回撤:        {result['max_drawdown']*100:>8.2f}%")
+    hit = result['hit_rate']
+    print(f"  命中率:          {hit*100 if hit is not None else float('nan'):>8.2f}%")
+    print(f"  交易次数:        {result['trades']:>8}")
+    print(f"  持仓时间占比:    {result['exposure']*100:>8.2f}%")
+    print(f"  买入持有收益:    {result['buy_and_hold']*100:>8.2f}%")
+    print(f"{'='*60}\n")
+
+
+def print_sweep_report(symbol: str, results: List[Dict], top: int, seconds: float):
+    """打印参数扫描结果"""
+    print(f"\n{'='*78}")
+    print(f"🔍 参数扫描: {symbol} ({len(results)} 组参数, 耗时 {seconds*1000:.0f}ms)")
+    print(f"{'='*78}")
+    print(f"{'阈值':>6} {'RSI下':>6} {'RSI上':>6} {'布林下':>7} {'布林上':>7} "
+          f"{'收益':>9} {'夏普':>7} {'回撤':>8} {'命中率':>7} {'交易':>5}")
+    for r in results[:top]:
+        hit = f"{r['hit_rate']*100:.1f}%" if r['hit_rate'] is not None else "N/A"
+        print(f"{r['threshold']:>6.2f} {r['rsi_low']:>6.0f} {r['rsi_high']:>6.0f} "
+              f"{r['bb_low']:>7.2f} {r['bb_high']:>7.2f} "
+              f"{r['total_return']*100:>8.2f}% {r['sharpe_ratio']:>7.3f} "
+              f"{r['max_drawdown']*100:>7.2f}% {hit:>7} {r['trades']:>5}")
+    print(f"{'='*78}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='技术信号向量化回测')
+    parser.add_argument('--symbol', '-s', required=True, help='股票代码 (如 MSFT, 700.HK)')
+    parser.add_argument('--days', '-d', type=int, default=750, help='回测K线数 (默认: 750)')
+    parser.add_argument('--cost-bps', type=float, default=10.0, help='单边交易成本 (基点，默认: 10)')
+    parser.add_argument('--long-short', action='store_true', help='看空时做空 (默认只做多)')
+    parser.add_argument('--threshold', type=float, default=0.3, help='信号阈值 (默认: 0.3)')
+    parser.add_argument('--rsi-low', type=float, default=30.0, help='RSI 超卖线 (默认: 30)')
+    parser.add_argument('--rsi-high', type=float, default=70.0, help='RSI 超买线 (默认: 70)')
+    parser.add_argument('--sweep', action='store_true', help='参数网格扫描')
+    parser.add_argument('--top', type=int, default=10, help='扫描结果显示前 N 名 (默认: 10)')
+    parser.add_argument('--demo', action='store_true', help='演示模式(使用模拟数据)')
+    parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+
+    args = parser.parse_args()
+
+    analyzer = TechnicalAnalyzer(use_demo=args.demo)
+    df = analyzer.get_historical_data(args.symbol, count=args.days + 60)
+    if df.empty or len(df) < 90:
+        print(f"❌ 无法获取 {args.symbol} 的足够历史数据")
+        return 1
+
+    data = analyzer.compute_indicators(df).tail(args.days)
+    cost = args.cost_bps / 10000
+
+    if args.sweep:
+        start = time.perf_counter()
+        results = sweep(data, cost=cost, long_short=args.long_short)
+        seconds = time.perf_counter() - start
+        if args.output == 'json':
+            print(json.dumps(results[:args.top], indent=2, ensure_ascii=False))
+        else:
+            print_sweep_report(args.symbol, results, args.top, seconds)
+    else:
+        params = {'threshold': args.threshold, 'rsi_low': args.rsi_low, 'rsi_high': args.rsi_high}
+        result = backtest(data, params, cost=cost, long_short=args.long_short)
+        if args.output == 'json':
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            print_backtest_report(args.symbol, result)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+增量指标引擎 - Streaming Indicator Engine
+为每个标的维护 O(1) 的滚动状态，追加一根K线即可更新全部指标，无需重算整个窗口
+
+状态:
+- MA / 布林带: 定长 deque + 滚动求和 (布林带额外维护平方和)
+- EMA / MACD: 上一根的 EMA 值递推
+- RSI / ATR: Wilder 平滑的递推均值 (与 indicator_kernels 的批量结果一致，缺失值跳过、沿用上一个均值)
+
+用法:
+    engine = StreamingIndicatorEngine()
+    engine.warm_up('MSFT', df)                       # 用历史K线初始化状态
+    snapshot = engine.push('MSFT', bar)              # 收盘K线: 更新状态
+    snapshot = engine.preview('MSFT', high, low, px) # 盘中 tick: 只计算不更新状态
+
+    python streaming_indicators.py --symbol MSFT --demo --ticks 1000
+"""
+
+import argparse
+import math
+import sys
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+NAN = float('nan')
+
+# 滚动求和每累计多少次更新后从 deque 重新求和一次，消除浮点累积误差 (均摊 O(1))
+RESYNC_INTERVAL = 1000
+
+
+class RollingWindow:
+    """定长窗口的滚动和与平方和"""
+
+    __slots__ = ('size', 'values', 'total', 'total_sq', '_updates')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._updates = 0
+
+    def peek(self, x: float) -> Tuple[float, float, int]:
+        """追加 x 后的 (和, 平方和, 数量)，不修改状态"""
+        total = self.total + x
+        total_sq = self.total_sq + x * x
+        n = len(self.values) + 1
+        if len(self.values) == self.size:
+            oldest = self.values[0]
+            total -= oldest
+            total_sq -= oldest * oldest
+            n -= 1
+        return total, total_sq, n
+
+    def push(self, x: float):
+        self.total, self.total_sq, _ = self.peek(x)
+        self.values.append(x)
+        self._updates += 1
+        if self._updates >= RESYNC_INTERVAL:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(v * v for v in self.values)
+            self._updates = 0
+
+    def mean(self, total: float, n: int) -> float:
+        return total / n if n == self.size else NAN
+
+    def std(self, total: float, total_sq: float, n: int) -> float:
+        """样本标准差 (ddof=1)"""
+        if n != self.size or n < 2:
+            return NAN
+        var = (total_sq - total * total / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class IndicatorState:
+    """单个标的的增量指标状态"""
+
+    def __init__(self, ma_periods: Iterable[int] = (5, 10, 20, 60),
+                 ema_periods: Iterable[int] = (12, 26), rsi_period: int = 14,
+                 macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
+                 bb_period: int = 20, bb_std: float = 2.0, atr_period: int = 14):
+        self.ma_windows = {p: RollingWindow(p) for p in ma_periods}
+        self.ema_periods = list(ema_periods)
+        self.ema_values: Dict[int, float] = {}
+
+        self.rsi_period = rsi_period
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.rsi_count = 0  # 已累计的价格变动数
+
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.macd_signal_value: Optional[float] = None
+
+        self.bb_window = RollingWindow(bb_period)
+        self.bb_std = bb_std
+
+        self.atr_period = atr_period
+        self.atr_value = 0.0
+        self.atr_count = 0  # 已累计的真实波幅数
+
+        self.prev_close: Optional[float] = None
+        self.bars = 0
+        self.last: Dict[str, float] = {}
+
+    @staticmethod
+    def _ema_step(prev: Optional[float], x: float, span: int) -> float:
+        if prev is None:
+            return x
+        alpha = 2.0 / (span + 1.0)
+        return alpha * x + (1.0 - alpha) * prev
+
+    @staticmethod
+    def _wilder_step(avg: float, count: int, x: float, period: int) -> Tuple[float, int]:
+        """Wilder 平滑一步: 前 period 个值取简单均值作种子，之后递推；x 缺失 (NaN) 时保持不变"""
+        if math.isnan(x):
+            return avg, count
+        count += 1
+        if count <= period:
+            return avg + (x - avg) / count, count
+        return avg + (x - avg) / period, count
+
+    def _rsi_step(self, close: float) -> Tuple[float, float, int, float]:
+        """Wilder RSI: 前 period 个变动取简单均值作种子，之后递推平滑"""
+        if self.prev_close is None:
+            return self.avg_gain, self.avg_loss, self.rsi_count, NAN
+
+        delta = close - self.prev_close
+        if math.isnan(delta):
+            # 本根或上一根收盘价缺失: 不计入平滑
+            gain = loss = NAN
+        else:
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+        period = self.rsi_period
+        avg_gain, count = self._wilder_step(self.avg_gain, self.rsi_count, gain, period)
+        avg_loss, _ = self._wilder_step(self.avg_loss, self.rsi_count, loss, period)
+
+        if count < period:
+            value = NAN
+        elif avg_loss == 0:
+            value = 100.0 if avg_gain > 0 else 50.0
+        else:
+            value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        return avg_gain, avg_loss, count, value
+
+    def _step(self, high: float, low: float, close: float, commit: bool) -> Dict[str, float]:
+        """计算追加一根K线后的全部指标，commit=True 时更新状态"""
+        out = {'close': close}
+
+        # 移动平均线
+        for period, window in self.ma_windows.items():
+            total, _, n = window.peek(close)
+            out[f'MA{period}'] = window.mean(total, n)
+            if commit:
+                window.push(close)
+
+        # EMA (MACD 所需的快慢线与展示用的 EMA 共用状态)
+        spans = set(self.ema_periods) | {self.macd_fast, self.macd_slow}
+        ema_next = {span: self._ema_step(self.ema_values.get(span), close, span) for span in spans}
+        for span in self.ema_periods:
+            out[f'EMA{span}'] = ema_next[span]
+
+        # MACD
+        macd_line = ema_next[self.macd_fast] - ema_next[self.macd_slow]
+        signal = self._ema_step(self.macd_signal_value, macd_line, self.macd_signal)
+        out['MACD'] = macd_line
+        out['MACD_Signal'] = signal
+        out['MACD_Histogram'] = macd_line - signal
+
+        # RSI
+        avg_gain, avg_loss, rsi_count, out['RSI'] = self._rsi_step(close)
+
+        # 布林带
+        total, total_sq, n = self.bb_window.peek(close)
+        middle = self.bb_window.mean(total, n)
+        std = self.bb_window.std(total, total_sq, n)
+        upper = middle + std * self.bb_std
+        lower = middle - std * self.bb_std
+        out['BB_Middle'] = middle
+        out['BB_Upper'] = upper
+        out['BB_Lower'] = lower
+        out['BB_Width'] = upper - lower
+        out['BB_Percent'] = (close - lower) / (upper - lower) if upper > lower else NAN
+
+        # ATR
+        # 与 indicator_kernels.true_range 一致: 忽略缺失项 (第一根K线或上一根收盘价缺失时取 high - low)
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            ranges = [r for r in (high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+                      if not math.isnan(r)]
+            tr = max(ranges) if ranges else NAN
+        atr_value, atr_count = self._wilder_step(self.atr_value, self.atr_count, tr, self.atr_period)
+        out['ATR'] = atr_value if atr_count >= self.atr_period else NAN
+
+        if commit:
+            self.ema_values = ema_next
+            self.macd_signal_value = signal
+            self.avg_gain, self.avg_loss, self.rsi_count = avg_gain, avg_loss, rsi_count
+            self.bb_window.push(close)
+            self.atr_value, self.atr_count = atr_value, atr_count
+            self.prev_close = close
+            self.bars += 1
+            self.last = out
+
+        return out
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """追加一根已收盘K线，更新状态并返回最新指标"""
+        return self._step(float(high), float(low), float(close), commit=True)
+
+    def preview(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """以当前未收盘K线的最新价计算指标，不修改状态 (用于盘中 tick)"""
+        return self._step(float(high), float(low), float(close), commit=False)
+
+
+class StreamingIndicatorEngine:
+    """多标的增量指标引擎"""
+
+    def __init__(self, **indicator_params):
+        """
+        Args:
+            indicator_params: 传给 IndicatorState 的指标参数 (如 rsi_period=14)
+        """
+        self.indicator_params = indicator_params
+        self.states: Dict[str, IndicatorState] = {}
+
+    def _state(self, symbol: str) -> IndicatorState:
+        state = self.states.get(symbol)
+        if state is None:
+            state = IndicatorState(**self.indicator_params)
+            self.states[symbol] = state
+        return state
+
+    def warm_up(self, symbol: str, df: pd.DataFrame) -> Dict[str, float]:
+        """用历史K线初始化标的状态 (一次性 O(n))，返回最后一根的指标"""
+        state = IndicatorState(**self.indicator_params)
+        self.states[symbol] = state
+        for high, low, close in zip(df['high'].to_numpy(), df['low'].to_numpy(),
+                                    df['close'].to_numpy()):
+            state.update(high, low, close)
+        return state.last
+
+    def push(self, symbol: str, bar: Dict) -> Dict[str, float]:
+        """
+        追加一根已收盘K线
+
+        Args:
+            bar: 至少包含 high/low/close 的字典
+        """
+        return self._state(symbol).update(bar['high'], bar['low'], bar['close'])
+
+    def preview(self, symbol: str, high: float, low: float, close: float) -> Dict[str, float]:
+        """盘中 tick: 以未收盘K线的当前高/低/最新价计算指标，不修改状态"""
+        return self._state(symbol).preview(high, low, close)
+
+    def latest(self, symbol: str) -> Dict[str, float]:
+        """最后一根已收盘K线的指标"""
+        state = self.states.get(symbol)
+        return state.last if state else {}
+
+
+def main():
+    # 延迟导入，避免作为库使用时引入 TechnicalAnalyzer 的数据源依赖
+    from technical_analysis import TechnicalAnalyzer
+
+    parser = argparse.ArgumentParser(description='增量指标引擎演示')
+    parser.add_argument('--symbol', '-s', default='MSFT', help='股票代码 (默认: MSFT)')
+    parser.add_argument('--days', '-d', type=int, default=250, help='预热K线数 (默认: 250)')
+    parser.add_argument('--ticks', type=int, default=1000, help='模拟推送的 tick 数 (默认: 1000)')
+    parser.add_argument('--demo', action='store_true', help='演示模式(使用模拟数据)')
+
+    args = parser.parse_args()
+
+    analyzer = TechnicalAnalyzer(use_demo=args.demo)
+    df = analyzer.get_historical_data(args.symbol, count=args.days)
+    if df.empty:
+        print(f"❌ 无法获取 {args.symbol} 的数据")
+        return 1
+
+    engine = StreamingIndicatorEngine()
+    start = time.perf_counter()
+    engine.warm_up(args.symbol, df)
+    warm_seconds = time.perf_counter() - start
+
+    last_close = float(df['close'].iloc[-1])
+    high = low = last_close
+    prices: List[float] = [last_close * (1 + 0.0005 * ((i * 7919) % 21 - 10)) for i in range(args.ticks)]
+
+    start = time.perf_counter()
+    snapshot = {}
+    for price in prices:
+        high, low = max(high, price), min(low, price)
+        snapshot = engine.preview(args.symbol, high, low, price)
+    tick_seconds = time.perf_counter() - start
+
+    print(f"\n{'='*60}")
+    print(f"⚡ {args.symbol} 增量指标引擎")
+    print(f"{'='*60}")
+    print(f"预热 {len(df)} 根K线: {warm_seconds*1000:.2f}ms")
+    print(f"推送 {args.ticks} 个 tick: {tick_seconds*1000:.2f}ms "
+          f"({tick_seconds/max(args.ticks, 1)*1e6:.1f}µs/tick)")
+    print(f"\n最新指标 (未收盘K线):")
+    for key in ['close', 'MA5', 'MA20', 'EMA12', 'RSI', 'MACD', 'MACD_Signal',
+                'BB_Upper', 'BB_Lower', 'ATR']:
+        value = snapshot.get(key, NAN)
+        print(f"   {key:<12} {value:>12.4f}")
+    print(f"{'='*60}\n")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
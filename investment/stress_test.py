@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+压力测试 - Stress Testing & Historical Scenario Replay
+对 portfolio.json 的当前持仓做情景重估: 自定义冲击 ("NVDA -30%, HKD/CNY -2%, BTC -50%")
+与历史区间回放 (2020-03 新冠崩盘、2022 加息冲击、2008 金融危机)
+
+重估方式:
+- 风险因子 = 持仓标的 + 汇率 (USD/CNY、HKD/CNY)，每个情景是一行因子冲击
+- 持仓人民币市值的变化 = 市值 × ((1+标的冲击)·(1+汇率冲击) - 1)，
+  S 个情景的冲击矩阵 (S, N) 与市值向量做一次矩阵乘法得到全部情景的组合盈亏
+- 冲击未持有的标的 (如 SPY、QQQ) 时，按历史收益率多元回归的 Beta 传导到未被直接冲击的持仓
+- 历史回放取各持仓在区间起止日的收盘价涨跌；区间内没有数据的持仓 (如 2008 年的 BTC、美团)
+  使用代理 (港股 -> 恒生指数，加密货币 -> QQQ)，仍没有数据的记为未覆盖
+
+用法:
+    engine = StressEngine.from_portfolio(portfolio)
+    results = engine.run([parse_scenario("NVDA -30%, HKD/CNY -2%, BTC -50%")])
+
+    python stress_test.py --portfolio-file data/portfolio.json --shock "NVDA -30%, HKD/CNY -2%, BTC -50%"
+    python stress_test.py -p data/portfolio.json --shock "美股回调: SPY -15%" --historical covid_2020 gfc_2008
+"""
+
+import argparse
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from exposure import multi_factor
+
+BASE_CURRENCY = 'CNY'
+
+# 持仓币种 -> 汇率因子
+FX_FACTORS = {'USD': 'USD/CNY', 'HKD': 'HKD/CNY'}
+
+# 汇率因子 -> 历史数据代码 (Yahoo)
+FX_HISTORY_SYMBOLS = {'USD/CNY': 'CNY=X', 'HKD/CNY': 'HKDCNY=X'}
+
+# 历史情景: 名称 -> (起始日, 结束日, 说明)
+HISTORICAL_SCENARIOS = {
+    'covid_2020': ('2020-02-19', '2020-03-23', '2020 年新冠崩盘'),
+    'rate_shock_2022': ('2022-01-03', '2022-10-12', '2022 年加息冲击'),
+    'gfc_2008': ('2008-09-12', '2009-03-09', '2008 年金融危机'),
+}
+
+# 历史区间内没有数据时的代理标的
+PROXIES = {'BTC': 'QQQ', 'ETH': 'QQQ'}
+HK_PROXY = 'HSI.HK'
+
+# 冲击项: 代码/汇率对/类别 + 百分比，如 "NVDA -30%"、"HKD/CNY -2%"
+SHOCK_PATTERN = re.compile(r'([A-Za-z0-9_.\-/^=]+)\s*([+-]?\d+(?:\.\d+)?)\s*%')
+
+
+@dataclass
+class Scenario:
+    """一个情景: 因子 (标的/汇率对/类别/ALL) -> 冲击 (小数)"""
+    name: str
+    shocks: Dict[str, float]
+    kind: str = 'custom'  # custom / historical
+    missing: List[str] = field(default_factory=list)  # 历史回放中使用代理 (A→B) 或未覆盖的持仓
+
+
+def parse_scenario(text: str, name: Optional[str] = None) -> Scenario:
+    """
+    解析冲击描述
+
+    "NVDA -30%, HKD/CNY -2%, BTC -50%" 或带名称 "熊市: NVDA -30%, BTC -50%"
+    """
+    if ':' in text and name is None:
+        name, text = (part.strip() for part in text.split(':', 1))
+    shocks = {}
+    for symbol, pct in SHOCK_PATTERN.findall(text):
+        key = symbol.upper() if '/' in symbol or symbol.lower() == 'all' else symbol
+        shocks[key] = float(pct) / 100
+    if not shocks:
+        raise ValueError(f"无法解析冲击: {text}")
+    return Scenario(name or text.strip(), shocks)
+
+
+@dataclass
+class ScenarioResult:
+    """情景重估结果 (金额为基准货币)"""
+    name: str
+    kind: str
+    pnl: float
+    pnl_pct: float
+    positions: Dict[str, float]  # 持仓盈亏
+    missing: List[str]
+
+    def worst(self, n: int = 3) -> List[Tuple[str, float]]:
+        return sorted(self.positions.items(), key=lambda kv: kv[1])[:n]
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'pnl': round(self.pnl, 2),
+            'pnl_pct': round(self.pnl_pct, 6),
+            'positions': {s: round(v, 2) for s, v in self.positions.items()},
+            'missing': self.missing,
+        }
+
+
+class StressEngine:
+    """当前持仓的向量化情景重估"""
+
+    def __init__(self, symbols: List[str], values: Sequence[float], currencies: List[str],
+                 categories: List[str], cash: float = 0.0, fx_rates: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            symbols: 持仓标的
+            values: 持仓市值 (基准货币)
+            currencies: 持仓计价币种
+            categories: 持仓所属类别 (portfolio.json allocation 的键)
+            cash: 现金 (基准货币，不受冲击)
+            fx_rates: 当前汇率 (仅用于报告)
+        """
+        self.symbols = list(symbols)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.currencies = list(currencies)
+        self.categories = list(categories)
+        self.cash = float(cash)
+        self.fx_rates = fx_rates or {}
+        self.total_value = float(self.values.sum()) + self.cash
+
+        self.fx_factors = sorted({FX_FACTORS[c] for c in self.currencies if c in FX_FACTORS})
+        self.factors = self.symbols + self.fx_factors
+        self._index = {f: i for i, f in enumerate(self.factors)}
+        # 每个持仓对应的汇率因子列 (基准货币计价的持仓指向全零列)
+        n = len(self.symbols)
+        self._fx_column = np.array([
+            n + self.fx_factors.index(FX_FACTORS[c]) if c in FX_FACTORS else len(self.factors)
+            for c in self.currencies
+        ], dtype=np.intp)
+        # 未持有标的 -> 持仓 Beta (需 set_betas 后可用)
+        self.betas: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_portfolio(cls, portfolio: Dict) -> 'StressEngine':
+        """从 portfolio.json 内容构建 (持仓市值取 value 字段，与 RiskAnalyzer.load_positions 一致)"""
+        symbols, values, currencies, categories = [], [], [], []
+        cash = 0.0
+        for category, data in portfolio.get('allocation', {}).items():
+            if category == 'cash':
+                cash = data.get('value', data.get('current_value', 0))
+                continue
+            for pos in data.get('positions', []):
+                if pos.get('value', 0) <= 0:
+                    continue
+                symbols.append(pos['symbol'])
+                values.append(pos['value'])
+                currencies.append(pos.get('currency', BASE_CURRENCY))
+                categories.append(category)
+        fx_rates = portfolio.get('summary', {}).get('fx_rates', {})
+        return cls(symbols, values, currencies, categories, cash, fx_rates)
+
+    def set_betas(self, returns: np.ndarray, factor_returns: np.ndarray, factors: List[str]):
+        """
+        用历史日收益率估计持仓对未持有标的的多元回归 Beta，用于冲击传导
+
+        Args:
+            returns: 持仓日收益率 (T, N)，列顺序与 self.symbols 一致，缺失值为 NaN
+            factor_returns: 因子日收益率 (T, K)，缺失值为 NaN
+            factors: 因子名 (如 SPY、QQQ)
+
+        每个持仓只用它与全部因子都有数据的日期回归 (缺失值不按 0 收益计入)；
+        共同样本不足、无法估计的持仓 Beta 记为 0 (不传导冲击)
+        """
+        beta = np.nan_to_num(multi_factor(returns, factor_returns)['beta'])
+        self.betas = {f: beta[:, k] for k, f in enumerate(factors)}
+
+    def _expand(self, scenario: Scenario) -> Tuple[np.ndarray, List[str]]:
+        """
+        情景 -> 因子冲击行 (len(factors)+1,)，最后一列恒为 0 (基准货币持仓的汇率列)
+
+        优先级: 直接冲击标的 > 类别 > ALL；未持有标的的冲击按 Beta 传导到仍未被冲击的持仓
+        """
+        row = np.zeros(len(self.factors) + 1)
+        n = len(self.symbols)
+        assigned = np.zeros(n, dtype=bool)
+        categories = np.array(self.categories)
+        propagated = np.zeros(n)
+        unknown = []
+
+        for key, shock in scenario.shocks.items():
+            if key in self._index:
+                row[self._index[key]] = shock
+                if self._index[key] < n:
+                    assigned[self._index[key]] = True
+            elif key in self.betas:
+                propagated += self.betas[key] * shock
+            elif key != 'ALL' and key not in self.categories and key not in FX_FACTORS.values():
+                unknown.append(key)
+
+        # 类别冲击先于 ALL，只作用于尚未被直接冲击的持仓
+        for key in [k for k in scenario.shocks if k in self.categories] + ['ALL']:
+            if key in scenario.shocks:
+                mask = ~assigned & ((categories == key) if key != 'ALL' else True)
+                row[:n][mask] = scenario.shocks[key]
+                assigned |= mask
+
+        row[:n][~assigned] = propagated[~assigned]
+        return row, unknown
+
+    def shock_matrix(self, scenarios: Sequence[Scenario]) -> np.ndarray:
+        """全部情景的因子冲击矩阵 (S, len(factors)+1)"""
+        rows = []
+        for scenario in scenarios:
+            row, unknown = self._expand(scenario)
+            if unknown:
+                print(f"⚠️ 情景 {scenario.name}: 未知因子 {', '.join(unknown)} (未持有且没有 Beta，已忽略)")
+            rows.append(row)
+        return np.array(rows).reshape(len(rows), len(self.factors) + 1)
+
+    def revalue(self, shocks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        向量化重估
+
+        Args:
+            shocks: 因子冲击矩阵 (S, len(factors)+1)
+
+        Returns:
+            (组合盈亏 (S,), 各持仓盈亏 (S, N))
+        """
+        n = len(self.symbols)
+        multiplier = (1 + shocks[:, :n]) * (1 + shocks[:, self._fx_column]) - 1
+        return multiplier @ self.values, multiplier * self.values
+
+    def run(self, scenarios: Sequence[Scenario]) -> List[ScenarioResult]:
+        """重估全部情景 (一次矩阵乘法)"""
+        if not scenarios:
+            return []
+        pnl, positions = self.revalue(self.shock_matrix(scenarios))
+        return [
+            ScenarioResult(
+                name=s.name,
+                kind=s.kind,
+                pnl=float(pnl[i]),
+                pnl_pct=float(pnl[i] / self.total_value) if self.total_value > 0 else 0.0,
+                positions=dict(zip(self.symbols, positions[i].tolist())),
+                missing=s.missing,
+            )
+            for i, s in enumerate(scenarios)
+        ]
+
+
+def _proxy(symbol: str) -> Optional[str]:
+    if symbol in PROXIES:
+        return PROXIES[symbol]
+    if symbol.endswith('.HK'):
+        return HK_PROXY
+    return None
+
+
+def window_return(df: Optional[pd.DataFrame], start: pd.Timestamp, end: pd.Timestamp) -> Optional[float]:
+    """区间收益: 起始日 (含) 之前最后一个收盘价到结束日 (含) 之前最后一个收盘价"""
+    if df is None or df.empty:
+        return None
+    dates = pd.DatetimeIndex(pd.to_datetime(df['date']))
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    close = df['close'].to_numpy(dtype=np.float64)
+    i0 = dates.searchsorted(start, side='right') - 1
+    i1 = dates.searchsorted(end, side='right') - 1
+    # 起始日之前没有数据 (标的尚未上市) 视为未覆盖
+    if i0 < 0 or i1 <= i0:
+        return None
+    return float(close[i1] / close[i0] - 1)
+
+
+def historical_scenarios(engine: StressEngine, names: Sequence[str],
+                         frames: Dict[str, pd.DataFrame]) -> List[Scenario]:
+    """
+    由历史价格构建回放情景
+
+    Args:
+        names: HISTORICAL_SCENARIOS 中的情景名
+        frames: 代码 -> 日K线 (持仓、代理与汇率代码，需覆盖情景区间)
+    """
+    scenarios = []
+    for name in names:
+        start, end, label = HISTORICAL_SCENARIOS[name]
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        shocks, missing = {}, []
+        for symbol in engine.symbols:
+            r = window_return(frames.get(symbol), start, end)
+            proxy = _proxy(symbol)
+            if r is None and proxy is not None:
+                r = window_return(frames.get(proxy), start, end)
+                if r is not None:
+                    missing.append(f"{symbol}→{proxy}")
+            if r is None:
+                missing.append(symbol)
+                continue
+            shocks[symbol] = r
+        for factor in engine.fx_factors:
+            r = window_return(frames.get(FX_HISTORY_SYMBOLS[factor]), start, end)
+            if r is None:
+                missing.append(factor)
+            else:
+                shocks[factor] = r
+        scenarios.append(Scenario(f"{label} ({start:%Y-%m-%d}~{end:%Y-%m-%d})", shocks, 'historical', missing))
+    return scenarios
+
+
+def history_symbols(engine: StressEngine) -> List[str]:
+    """历史回放需要的全部代码 (持仓、代理、汇率)"""
+    symbols = list(engine.symbols)
+    for symbol in engine.symbols:
+        proxy = _proxy(symbol)
+        if proxy and proxy not in symbols:
+            symbols.append(proxy)
+    symbols += [FX_HISTORY_SYMBOLS[f] for f in engine.fx_factors]
+    return symbols
+
+
+def print_stress_report(engine: StressEngine, results: List[ScenarioResult], top: int = 3):
+    """打印情景盈亏表"""
+    print(f"\n{'='*78}")
+    print(f"🧪 压力测试 (组合总值 ¥{engine.total_value:,.0f}，其中现金 ¥{engine.cash:,.0f})")
+    print(f"{'='*78}")
+    print(f"{'情景':<36} {'盈亏':>14} {'占比':>9}  最大亏损持仓")
+    print('-' * 78)
+    for r in results:
+        worst = ', '.join(f"{s} {v/1000:+,.1f}k" for s, v in r.worst(top) if v < 0) or '-'
+        print(f"{r.name[:36]:<36} {r.pnl:>+14,.0f} {r.pnl_pct*100:>+8.2f}%  {worst}")
+        if r.missing:
+            print(f"{'':<4}↳ 代理/未覆盖: {', '.join(r.missing)}")
+    print(f"{'='*78}\n")
+
+
+def main():
+    # 延迟导入，避免作为库使用时引入数据源依赖
+    from portfolio_risk import RiskAnalyzer
+
+    parser = argparse.ArgumentParser(description='压力测试与历史情景回放')
+    parser.add_argument('--portfolio-file', '-p', required=True, help='投资组合 JSON 文件路径')
+    parser.add_argument('--shock', action='append', default=[],
+                        help='自定义冲击，可多次指定，如 "NVDA -30%%, HKD/CNY -2%%, BTC -50%%" '
+                             '或 "熊市: core_large -20%%" (支持标的、汇率对、类别、ALL)')
+    parser.add_argument('--scenario-file', help='情景 JSON 文件 {名称: "冲击描述" 或 {因子: 小数}}')
+    parser.add_argument('--historical', nargs='*', choices=list(HISTORICAL_SCENARIOS),
+                        help='历史回放情景 (不带参数时为全部)')
+    parser.add_argument('--beta-days', type=int, default=252,
+                        help='估计未持有标的 (如 SPY) 冲击传导 Beta 的历史天数 (默认252)')
+    parser.add_argument('--demo', action='store_true', help='使用演示数据 (只影响 Beta 估计，历史回放需要真实数据)')
+    parser.add_argument('--output', '-o', choices=['table', 'json'], default='table', help='输出格式')
+
+    args = parser.parse_args()
+
+    with open(args.portfolio_file, 'r') as f:
+        portfolio = json.load(f)
+    engine = StressEngine.from_portfolio(portfolio)
+
+    scenarios = [parse_scenario(text) for text in args.shock]
+    if args.scenario_file:
+        with open(args.scenario_file, 'r') as f:
+            for name, spec in json.load(f).items():
+                scenarios.append(parse_scenario(spec, name) if isinstance(spec, str)
+                                 else Scenario(name, {k: float(v) for k, v in spec.items()}))
+    # --historical 不带参数、或没有任何自定义情景时回放全部历史情景
+    if args.historical == [] or (args.historical is None and not scenarios):
+        historical = list(HISTORICAL_SCENARIOS)
+    else:
+        historical = args.historical or []
+
+    analyzer = RiskAnalyzer(use_demo=args.demo)
+
+    # 冲击了未持有的标的时，估计持仓对这些标的的 Beta
+    known = set(engine.factors) | set(engine.categories) | {'ALL'} | set(FX_FACTORS.values())
+    external = sorted({k for s in scenarios for k in s.shocks if k not in known})
+    if external:
+        panel = analyzer.returns_panel(engine.symbols + [s for s in external if s not in engine.symbols],
+                                       args.beta_days)
+        if all(s in panel.symbols for s in engine.symbols):
+            factors = [s for s in external if s in panel.symbols]
+            engine.set_betas(panel.select(engine.symbols).returns,
+                             panel.select(factors).returns, factors)
+
+    if historical:
+        if args.demo:
+            print("⚠️ 演示模式没有历史行情，跳过历史情景回放")
+        else:
+            earliest = min(pd.Timestamp(HISTORICAL_SCENARIOS[n][0]) for n in historical)
+            since = earliest - pd.Timedelta(days=10)
+            count = int((pd.Timestamp.now() - since).days)
+            frames = analyzer.market_data.candles_many(
+                '1d', {s: (count, since) for s in history_symbols(engine)})
+            scenarios += historical_scenarios(engine, historical, frames)
+
+    if not scenarios:
+        print("❌ 没有可计算的情景")
+        return 1
+
+    results = engine.run(scenarios)
+
+    if args.output == 'json':
+        print(json.dumps({
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'total_value': round(engine.total_value, 2),
+            'cash': round(engine.cash, 2),
+            'scenarios': [r.to_dict() for r in results],
+        }, indent=2, ensure_ascii=False))
+    else:
+        print_stress_report(engine, results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -7,13 +7,14 @@
     python technical_analysis.py --symbol MSFT --days 90
     python technical_analysis.py --symbol 700.HK --days 60 --output json
     python technical_analysis.py --symbol MSFT --demo  # 演示模式(使用模拟数据)
+    python technical_analysis.py --symbol MSFT --timeframes 1d 1w 1M  # 多周期共振
 """
 
 import argparse
 import json
 import sys
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -25,38 +26,75 @@ except ImportError:
     print("❌ 需要安装依赖: pip3 install pandas numpy")
     sys.exit(1)
 
-# 尝试导入 LongPort SDK
-LONGPORT_AVAILABLE = False
-try:
-    from longport.openapi import QuoteContext, Config, Period
-    LONGPORT_AVAILABLE = True
-except ImportError:
-    pass
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
 
-# 尝试导入 yfinance 作为备选
-YFINANCE_AVAILABLE = False
-try:
-    import yfinance as yf
-    YFINANCE_AVAILABLE = True
-except ImportError:
-    pass
+from volume_indicators import compute_volume_indicators
+import indicator_kernels
+import panel_indicators
+import timeframes
+from bar_store import BarStore
+from market_data import MarketDataRegistry, get_registry
+
+
+class IndicatorSet:
+    """
+    单标的指标计算结果
+    
+    每个指标是一条与K线等长的 float64 数组，按K线索引读取；
+    tail() 返回视图而非拷贝，适合在常驻服务中反复使用。
+    """
+    
+    __slots__ = ('dates', 'columns')
+    
+    def __init__(self, dates: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.dates = dates
+        self.columns = columns
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'IndicatorSet':
+        """从已添加指标列的 DataFrame 构造 (兼容 calculate_* 的旧用法)"""
+        columns = {
+            name: df[name].to_numpy(dtype=np.float64)
+            for name in df.columns if name != 'date'
+        }
+        dates = df['date'].to_numpy() if 'date' in df else np.arange(len(df))
+        return cls(dates, columns)
+    
+    def __len__(self) -> int:
+        return len(self.dates)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+    
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+    
+    def value(self, name: str, index: int = -1) -> float:
+        """读取指定K线的指标值，缺失指标返回 NaN"""
+        values = self.columns.get(name)
+        return float(values[index]) if values is not None else float('nan')
+    
+    def tail(self, n: int) -> 'IndicatorSet':
+        """最近 n 根K线 (数组视图，不复制)"""
+        return IndicatorSet(self.dates[-n:], {k: v[-n:] for k, v in self.columns.items()})
+    
+    def to_frame(self) -> pd.DataFrame:
+        """转换为 DataFrame (用于导出或调试)"""
+        df = pd.DataFrame(self.columns)
+        df.insert(0, 'date', self.dates)
+        return df
 
 
 class TechnicalAnalyzer:
     """技术分析指标计算器"""
     
-    def __init__(self, use_demo: bool = False):
+    def __init__(self, use_demo: bool = False, bar_store: Optional[BarStore] = None,
+                 market_data: Optional[MarketDataRegistry] = None):
         self.use_demo = use_demo
-        self.ctx = None
-        
-        if not use_demo and LONGPORT_AVAILABLE:
-            try:
-                self.config = Config.from_env()
-                self.ctx = QuoteContext(self.config)
-            except Exception as e:
-                print(f"⚠️  LongPort API 配置失败: {e}")
-                print(f"💡 将使用备选数据源或演示模式")
-                self.ctx = None
+        self.bar_store = bar_store
+        # 共享的数据源注册表 (LongPort 客户端在首次请求时创建，进程内复用)
+        self.market_data = market_data or get_registry()
     
     def get_historical_data(self, symbol: str, period: str = "1d", 
                            count: int = 100) -> pd.DataFrame:
@@ -64,128 +102,100 @@ class TechnicalAnalyzer:
         获取历史K线数据
         
         优先级:
-        1. LongPort API (如果配置正确)
-        2. Yahoo Finance (如果安装 yfinance)
-        3. 模拟数据 (演示模式)
+        1. 本地K线缓存 (配置 bar_store 时，只下载缺失的K线)
+        2. LongPort API (如果配置正确)
+        3. Yahoo Finance (如果安装 yfinance)
+        4. 模拟数据 (演示模式)
         
         Args:
             symbol: 股票代码 (如 'MSFT', '700.HK')
-            period: K线周期 ("1d", "1wk", etc.)
+            period: K线周期 ("1h", "4h", "1d", "1w", "1M"，也接受 "1wk"/"1mo")
             count: 获取的K线数量
         
         Returns:
             DataFrame with columns: date, open, high, low, close, volume
         """
-        # 尝试 LongPort API
-        if self.ctx and LONGPORT_AVAILABLE and not self.use_demo:
-            df = self._get_longport_data(symbol, count)
-            if not df.empty:
-                return df
-        
-        # 尝试 Yahoo Finance
-        if YFINANCE_AVAILABLE and not self.use_demo:
-            df = self._get_yfinance_data(symbol, period, count)
+        period = timeframes.normalize(period)
+        if period not in timeframes.NATIVE_TIMEFRAMES:
+            # 数据源不直接提供的周期: 取更细的K线重采样
+            base = timeframes.fetch_timeframe([period])
+            df = self.get_historical_data(symbol, base, timeframes.base_bars_needed(base, period, count))
+            return timeframes.resample_bars(df, period).tail(count).reset_index(drop=True)
+        
+        if not self.use_demo:
+            if self.bar_store is not None:
+                df = self.bar_store.get_bars(
+                    symbol, period, count,
+                    lambda n, since: self._fetch_remote(symbol, period, n, since)
+                )
+            else:
+                df = self._fetch_remote(symbol, period, count)
             if not df.empty:
                 return df
         
         # 使用模拟数据
         print(f"📊 使用演示模式生成 {symbol} 的模拟数据...")
-        return self._generate_demo_data(symbol, count)
+        return self._generate_demo_data(symbol, count, freq=timeframes.DEMO_FREQ[period])
     
-    def _get_longport_data(self, symbol: str, count: int) -> pd.DataFrame:
-        """从 LongPort API 获取数据"""
-        # 转换 symbol 格式
-        if '.' not in symbol and not symbol.endswith('.US'):
-            if symbol.isalpha():
-                symbol = f"{symbol}.US"
-        
-        try:
-            candles = self.ctx.history_candles(symbol, period=Period.Day, count=count)
-        except Exception as e:
-            return pd.DataFrame()
-        
-        if not candles:
-            return pd.DataFrame()
-        
-        data = []
-        for candle in candles:
-            data.append({
-                'date': candle.timestamp,
-                'open': float(candle.open),
-                'high': float(candle.high),
-                'low': float(candle.low),
-                'close': float(candle.close),
-                'volume': int(candle.volume)
-            })
-        
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['date'])
-        df = df.sort_values('date').reset_index(drop=True)
+    def get_historical_data_many(self, symbols: List[str], period: str = "1d",
+                                 count: int = 100, max_workers: int = 8) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取多个标的的K线，数据源支持时合并为一次上游请求
         
-        return df
+        Returns:
+            标的 -> DataFrame，网络数据不可用的标的使用模拟数据
+        """
+        period = timeframes.normalize(period)
+        if period not in timeframes.NATIVE_TIMEFRAMES:
+            return {s: self.get_historical_data(s, period, count) for s in symbols}
+        
+        frames = {}
+        if not self.use_demo:
+            fetch = lambda requests: self.market_data.candles_many(period, requests,
+                                                                   max_workers=max_workers)
+            if self.bar_store is not None:
+                frames = self.bar_store.get_bars_many(symbols, period, count, fetch)
+            else:
+                frames = fetch({s: (count, None) for s in symbols})
+        
+        for symbol in symbols:
+            if frames.get(symbol) is None or frames[symbol].empty:
+                print(f"📊 使用演示模式生成 {symbol} 的模拟数据...")
+                frames[symbol] = self._generate_demo_data(symbol, count,
+                                                          freq=timeframes.DEMO_FREQ[period])
+        return frames
     
-    def _get_yfinance_data(self, symbol: str, period: str, count: int) -> pd.DataFrame:
-        """从 Yahoo Finance 获取数据"""
-        # 转换 symbol 格式
-        yf_symbol = symbol
-        if symbol.endswith('.HK'):
-            yf_symbol = symbol.replace('.HK', '.HK')
-        elif '.' not in symbol:
-            # 美股
-            pass
+    def _fetch_remote(self, symbol: str, period: str, count: int,
+                      since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        从数据源注册表获取K线 (LongPort -> Yahoo Finance 自动降级)
         
-        try:
-            # 计算开始日期
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=count * 2)  # 多一些余量
-            
-            ticker = yf.Ticker(yf_symbol)
-            hist = ticker.history(start=start_date, end=end_date, interval=period)
-            
-            if hist.empty:
-                return pd.DataFrame()
-            
-            df = pd.DataFrame({
-                'date': hist.index,
-                'open': hist['Open'].values,
-                'high': hist['High'].values,
-                'low': hist['Low'].values,
-                'close': hist['Close'].values,
-                'volume': hist['Volume'].values
-            })
-            
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.sort_values('date').reset_index(drop=True)
-            
-            # 限制数量
-            if len(df) > count:
-                df = df.tail(count).reset_index(drop=True)
-            
-            return df
-            
-        except Exception as e:
-            return pd.DataFrame()
+        Args:
+            since: 增量刷新时的起始时间 (None 表示全量)
+        """
+        return self.market_data.candles(symbol, period, count, since)
     
     def _generate_demo_data(self, symbol: str, count: int, 
-                           start_price: float = 100.0) -> pd.DataFrame:
+                           start_price: float = 100.0, freq: str = 'D') -> pd.DataFrame:
         """生成模拟的股价数据用于演示"""
-        np.random.seed(hash(symbol) % 2**32)  # 使相同symbol生成相同序列
+        # 使相同symbol生成相同序列 (使用独立随机源，批量模式下多线程安全)
+        rng = np.random.RandomState(hash(symbol) % 2**32)
         
-        dates = pd.date_range(end=datetime.now(), periods=count, freq='D')
+        dates = pd.date_range(end=datetime.now(), periods=count, freq=freq)
         dates = dates[dates.dayofweek < 5]  # 只保留工作日
         
         # 生成随机游走价格
-        returns = np.random.normal(0.0005, 0.02, len(dates))  # 均值0.05%, 标准差2%
+        returns = rng.normal(0.0005, 0.02, len(dates))  # 均值0.05%, 标准差2%
         prices = start_price * np.exp(np.cumsum(returns))
         
         # 生成OHLC数据
         data = []
         for i, (date, close) in enumerate(zip(dates, prices)):
             volatility = 0.015
-            high = close * (1 + abs(np.random.normal(0, volatility)))
-            low = close * (1 - abs(np.random.normal(0, volatility)))
+            high = close * (1 + abs(rng.normal(0, volatility)))
+            low = close * (1 - abs(rng.normal(0, volatility)))
             open_price = prices[i-1] if i > 0 else close
-            volume = int(np.random.normal(10000000, 3000000))
+            volume = int(rng.normal(10000000, 3000000))
             
             data.append({
                 'date': date,
@@ -214,21 +224,9 @@ class TechnicalAnalyzer:
         """
         计算 RSI (Relative Strength Index)
         RSI = 100 - (100 / (1 + RS))
-        RS = 平均上涨 / 平均下跌
+        RS = Wilder 平滑的平均上涨 / 平均下跌
         """
-        delta = df['close'].diff()
-        
-        # 分离上涨和下跌
-        gain = delta.where(delta > 0, 0)
-        loss = (-delta).where(delta < 0, 0)
-        
-        # 计算平均上涨和平均下跌
-        avg_gain = gain.rolling(window=period).mean()
-        avg_loss = loss.rolling(window=period).mean()
-        
-        # 计算 RS 和 RSI
-        rs = avg_gain / avg_loss
-        df['RSI'] = 100 - (100 / (1 + rs))
+        df['RSI'] = indicator_kernels.rsi(df['close'].to_numpy(dtype=np.float64), period)
         
         return df
     
@@ -270,56 +268,84 @@ class TechnicalAnalyzer:
     def calculate_atr(self, df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
         """
         计算 ATR (Average True Range) - 平均真实波幅
-        用于衡量波动性
+        真实波幅的 Wilder 平滑，用于衡量波动性
         """
-        high_low = df['high'] - df['low']
-        high_close = (df['high'] - df['close'].shift()).abs()
-        low_close = (df['low'] - df['close'].shift()).abs()
-        
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        df['ATR'] = tr.rolling(window=period).mean()
+        df['ATR'] = indicator_kernels.atr(
+            df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64), period
+        )
         
         return df
     
     def calculate_volume_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        """计算成交量相关指标"""
-        # 成交量移动平均
-        df['Volume_MA20'] = df['volume'].rolling(window=20).mean()
-        
-        # 成交量比率 (当前成交量 / 20日均量)
-        df['Volume_Ratio'] = df['volume'] / df['Volume_MA20']
-        
-        # OBV (On Balance Volume)
-        obv = [0]
-        for i in range(1, len(df)):
-            if df['close'].iloc[i] > df['close'].iloc[i-1]:
-                obv.append(obv[-1] + df['volume'].iloc[i])
-            elif df['close'].iloc[i] < df['close'].iloc[i-1]:
-                obv.append(obv[-1] - df['volume'].iloc[i])
-            else:
-                obv.append(obv[-1])
-        df['OBV'] = obv
+        """
+        计算成交量相关指标
+        Volume MA20、量比、OBV、VWAP、MFI、A/D 线、Chaikin 振荡器
+        (向量化实现见 volume_indicators.py)
+        """
+        indicators = compute_volume_indicators(
+            df['high'].to_numpy(), df['low'].to_numpy(),
+            df['close'].to_numpy(), df['volume'].to_numpy()
+        )
+        for name, values in indicators.items():
+            df[name] = values
         
         return df
     
-    def generate_signals(self, df: pd.DataFrame) -> Dict:
+    def compute_indicators(self, df: pd.DataFrame) -> IndicatorSet:
+        """
+        一次性从原始K线数组计算全部指标
+        
+        与 calculate_* 系列结果相同，但不在 DataFrame 上逐列追加，
+        输出为 IndicatorSet (每个指标一条 float64 数组)
+        """
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        
+        columns = {
+            'open': df['open'].to_numpy(dtype=np.float64),
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume,
+        }
+        # 单标的视为一行面板，与批量模式共用同一套向量化实现
+        panel = panel_indicators.compute_panel(high[None, :], low[None, :], close[None, :])
+        columns.update({name: values[0] for name, values in panel.items()})
+        columns.update(compute_volume_indicators(high, low, close, volume))
+        
+        return IndicatorSet(df['date'].to_numpy(), columns)
+    
+    def generate_signals(self, data: IndicatorSet) -> Dict:
         """
         基于技术指标生成交易信号
+        
+        Args:
+            data: compute_indicators 的结果 (也兼容带指标列的 DataFrame)
         """
-        if df.empty or len(df) < 30:
+        if isinstance(data, pd.DataFrame):
+            if data.empty:
+                return {"error": "数据不足，无法生成信号"}
+            data = IndicatorSet.from_frame(data)
+        
+        if len(data) < 30:
             return {"error": "数据不足，无法生成信号"}
         
-        latest = df.iloc[-1]
-        prev = df.iloc[-2] if len(df) > 1 else latest
+        # 按索引读取最新和前一根K线的指标值
+        cur = {name: float(values[-1]) for name, values in data.columns.items()}
+        prev = {name: float(values[-2]) for name, values in data.columns.items()}
+        isnan = np.isnan
         
         signals = {
             "timestamp": datetime.now().isoformat(),
             "price": {
-                "current": round(latest['close'], 2),
-                "open": round(latest['open'], 2),
-                "high": round(latest['high'], 2),
-                "low": round(latest['low'], 2),
-                "volume": int(latest['volume'])
+                "current": round(cur['close'], 2),
+                "open": round(cur['open'], 2),
+                "high": round(cur['high'], 2),
+                "low": round(cur['low'], 2),
+                "volume": int(cur['volume'])
             },
             "moving_averages": {},
             "rsi": {},
@@ -331,25 +357,26 @@ class TechnicalAnalyzer:
         
         # 移动平均线信号
         ma_signals = []
-        if 'MA5' in latest and 'MA20' in latest:
-            signals['moving_averages']['MA5'] = round(latest['MA5'], 2)
-            signals['moving_averages']['MA20'] = round(latest['MA20'], 2)
-            signals['moving_averages']['MA60'] = round(latest.get('MA60', 0), 2)
+        if 'MA5' in cur and 'MA20' in cur:
+            signals['moving_averages']['MA5'] = round(cur['MA5'], 2)
+            signals['moving_averages']['MA20'] = round(cur['MA20'], 2)
+            signals['moving_averages']['MA60'] = round(cur.get('MA60', 0), 2)
             
-            if latest['MA5'] > latest['MA20']:
+            if cur['MA5'] > cur['MA20']:
                 ma_signals.append("BULLISH")  # 金叉趋势
             else:
                 ma_signals.append("BEARISH")  # 死叉趋势
             
             # 价格在MA上方还是下方
-            if latest['close'] > latest['MA20']:
+            if cur['close'] > cur['MA20']:
                 signals['moving_averages']['trend'] = "ABOVE_MA20"
             else:
                 signals['moving_averages']['trend'] = "BELOW_MA20"
         
         # RSI 信号
-        if 'RSI' in latest and not pd.isna(latest['RSI']):
-            rsi = latest['RSI']
+        has_rsi = 'RSI' in cur and not isnan(cur['RSI'])
+        if has_rsi:
+            rsi = cur['RSI']
             signals['rsi']['value'] = round(rsi, 2)
             
             if rsi > 70:
@@ -363,19 +390,21 @@ class TechnicalAnalyzer:
                 signals['rsi']['suggestion'] = "观望"
         
         # MACD 信号
-        if 'MACD' in latest and not pd.isna(latest['MACD']):
-            signals['macd']['macd'] = round(latest['MACD'], 4)
-            signals['macd']['signal'] = round(latest['MACD_Signal'], 4)
-            signals['macd']['histogram'] = round(latest['MACD_Histogram'], 4)
+        has_macd = 'MACD' in cur and not isnan(cur['MACD'])
+        if has_macd:
+            macd, macd_signal = cur['MACD'], cur['MACD_Signal']
+            signals['macd']['macd'] = round(macd, 4)
+            signals['macd']['signal'] = round(macd_signal, 4)
+            signals['macd']['histogram'] = round(cur['MACD_Histogram'], 4)
             
             # MACD 金叉/死叉
-            if latest['MACD'] > latest['MACD_Signal'] and prev['MACD'] <= prev['MACD_Signal']:
+            if macd > macd_signal and prev['MACD'] <= prev['MACD_Signal']:
                 signals['macd']['cross'] = "GOLDEN_CROSS"
                 signals['macd']['suggestion'] = "买入信号"
-            elif latest['MACD'] < latest['MACD_Signal'] and prev['MACD'] >= prev['MACD_Signal']:
+            elif macd < macd_signal and prev['MACD'] >= prev['MACD_Signal']:
                 signals['macd']['cross'] = "DEAD_CROSS"
                 signals['macd']['suggestion'] = "卖出信号"
-            elif latest['MACD'] > latest['MACD_Signal']:
+            elif macd > macd_signal:
                 signals['macd']['cross'] = "ABOVE_SIGNAL"
                 signals['macd']['suggestion'] = "多头趋势"
             else:
@@ -383,16 +412,16 @@ class TechnicalAnalyzer:
                 signals['macd']['suggestion'] = "空头趋势"
         
         # 布林带信号
-        if 'BB_Upper' in latest and not pd.isna(latest['BB_Upper']):
-            signals['bollinger']['upper'] = round(latest['BB_Upper'], 2)
-            signals['bollinger']['middle'] = round(latest['BB_Middle'], 2)
-            signals['bollinger']['lower'] = round(latest['BB_Lower'], 2)
-            signals['bollinger']['percent'] = round(latest['BB_Percent'] * 100, 2)
+        if 'BB_Upper' in cur and not isnan(cur['BB_Upper']):
+            signals['bollinger']['upper'] = round(cur['BB_Upper'], 2)
+            signals['bollinger']['middle'] = round(cur['BB_Middle'], 2)
+            signals['bollinger']['lower'] = round(cur['BB_Lower'], 2)
+            signals['bollinger']['percent'] = round(cur['BB_Percent'] * 100, 2)
             
-            if latest['close'] > latest['BB_Upper']:
+            if cur['close'] > cur['BB_Upper']:
                 signals['bollinger']['position'] = "ABOVE_UPPER"
                 signals['bollinger']['suggestion'] = "超买区域"
-            elif latest['close'] < latest['BB_Lower']:
+            elif cur['close'] < cur['BB_Lower']:
                 signals['bollinger']['position'] = "BELOW_LOWER"
                 signals['bollinger']['suggestion'] = "超卖区域"
             else:
@@ -409,26 +438,26 @@ class TechnicalAnalyzer:
             factors += 1
         
         # RSI 评分
-        if 'RSI' in latest and not pd.isna(latest['RSI']):
-            if latest['RSI'] < 30:
+        if has_rsi:
+            if cur['RSI'] < 30:
                 score += 1  # 超卖，可能反弹
-            elif latest['RSI'] > 70:
+            elif cur['RSI'] > 70:
                 score -= 1  # 超买，可能回调
             factors += 1
         
         # MACD 评分
-        if 'MACD' in latest and not pd.isna(latest['MACD']):
-            if latest['MACD'] > latest['MACD_Signal']:
+        if has_macd:
+            if cur['MACD'] > cur['MACD_Signal']:
                 score += 1
             else:
                 score -= 1
             factors += 1
         
         # 布林带评分
-        if 'BB_Percent' in latest and not pd.isna(latest['BB_Percent']):
-            if latest['BB_Percent'] < 0.1:
+        if 'BB_Percent' in cur and not isnan(cur['BB_Percent']):
+            if cur['BB_Percent'] < 0.1:
                 score += 1  # 接近下轨，可能反弹
-            elif latest['BB_Percent'] > 0.9:
+            elif cur['BB_Percent'] > 0.9:
                 score -= 1  # 接近上轨，可能回调
             factors += 1
         
@@ -473,19 +502,13 @@ class TechnicalAnalyzer:
         
         # 计算指标
         print("🔄 计算技术指标...")
-        df = self.calculate_ma(df)
-        df = self.calculate_ema(df)
-        df = self.calculate_rsi(df)
-        df = self.calculate_macd(df)
-        df = self.calculate_bollinger(df)
-        df = self.calculate_atr(df)
-        df = self.calculate_volume_indicators(df)
+        indicators = self.compute_indicators(df)
         
-        # 截取最近的数据
-        df_recent = df.tail(days).reset_index(drop=True)
+        # 截取最近的数据 (数组视图，不复制)
+        recent = indicators.tail(days)
         
         # 生成信号
-        signals = self.generate_signals(df_recent)
+        signals = self.generate_signals(recent)
         
         if output_format == "json":
             return json.dumps(signals, indent=2, ensure_ascii=False)
@@ -559,23 +582,293 @@ class TechnicalAnalyzer:
         output.append("=" * 65)
         
         return "\n".join(output)
+    
+    def analyze_timeframes(self, symbol: str, periods: List[str] = ['1d', '1w', '1M'],
+                           bars: int = 100) -> Dict:
+        """
+        多周期分析: 只请求一次最细周期的K线，重采样得到其余周期，
+        逐周期计算指标与信号，并合成多周期共振评分
+
+        Args:
+            symbol: 股票代码
+            periods: 分析的周期 (如 ['1h', '4h', '1d'])
+            bars: 每个周期期望的K线数量
+
+        Returns:
+            Dict: 每个周期的信号摘要与共振评分
+        """
+        periods = timeframes.ordered(periods)
+        base = timeframes.fetch_timeframe(periods)
+        count = max(timeframes.base_bars_needed(base, tf, bars) for tf in periods)
+
+        print(f"📊 正在分析 {symbol} 的多周期信号 ({', '.join(periods)})...")
+        print(f"📅 获取 {count} 根 {base} K线...")
+        df = self.get_historical_data(symbol, base, count)
+
+        result = {
+            "symbol": symbol,
+            "timestamp": datetime.now().isoformat(),
+            "base_period": base,
+            "timeframes": {},
+        }
+        if df.empty:
+            result["error"] = f"无法获取 {symbol} 的数据"
+            return result
+
+        frames = timeframes.resample_all(df, base, periods)
+        scores = {}
+        for tf in periods:
+            frame = frames[tf].tail(bars).reset_index(drop=True)
+            if len(frame) < 30:
+                result["timeframes"][tf] = {"bars": len(frame), "error": "数据不足，无法生成信号"}
+                continue
+
+            signals = self.generate_signals(self.compute_indicators(frame))
+            result["timeframes"][tf] = {
+                "bars": len(frame),
+                "date": pd.Timestamp(frame['date'].iloc[-1]).strftime('%Y-%m-%d %H:%M'),
+                "close": signals['price']['current'],
+                "rsi": signals['rsi'].get('value'),
+                "trend": signals['moving_averages'].get('trend'),
+                "macd_cross": signals['macd'].get('cross'),
+                "score": signals.get('score'),
+                "overall_signal": signals['overall_signal'],
+            }
+            if 'score' in signals:
+                scores[tf] = signals['score']
+
+        combined = timeframes.confluence(scores)
+        score = combined['score']
+        if score is None or abs(score) <= 0.3:
+            overall = "NEUTRAL"
+        else:
+            overall = "BULLISH" if score > 0 else "BEARISH"
+        result["confluence"] = {
+            "score": None if score is None else round(score, 2),
+            "aligned": None if combined['aligned'] is None else round(combined['aligned'] * 100, 1),
+            "overall_signal": overall,
+        }
+        return result
+
+    def analyze_many(self, symbols: List[str], days: int = 90,
+                     max_workers: int = 8) -> List[Dict]:
+        """
+        批量分析多个标的
+        
+        1. 批量获取K线 (Yahoo 单次批量下载；LongPort 限速并发请求)
+        2. 将收盘价/最高价/最低价堆叠为 (标的数, K线数) 面板
+        3. 在面板上一次性向量化计算 MA/EMA/RSI/MACD/布林带/ATR
+        
+        Args:
+            symbols: 股票代码列表
+            days: 分析天数
+            max_workers: 逐个请求的数据源的最大并发数
+        
+        Returns:
+            每个标的一条结果记录 (数据不足的标的包含 error 字段)
+        """
+        count = days + 60
+        print(f"📊 批量分析 {len(symbols)} 个标的 (并发数 {max_workers})...")
+        
+        fetched = self.get_historical_data_many(symbols, count=count, max_workers=max_workers)
+        frames = [fetched[s] for s in symbols]
+        
+        results = []
+        valid_symbols = []
+        valid_frames = []
+        for symbol, df in zip(symbols, frames):
+            if df.empty or len(df) < 30:
+                results.append({"symbol": symbol, "error": "数据不足，无法生成信号"})
+            else:
+                valid_symbols.append(symbol)
+                valid_frames.append(df)
+        
+        if not valid_frames:
+            return results
+        
+        print(f"✅ 获取到 {len(valid_frames)}/{len(symbols)} 个标的数据，计算技术指标...")
+        
+        close = panel_indicators.stack_panel([df['close'].to_numpy() for df in valid_frames], count)
+        high = panel_indicators.stack_panel([df['high'].to_numpy() for df in valid_frames], count)
+        low = panel_indicators.stack_panel([df['low'].to_numpy() for df in valid_frames], count)
+        
+        panel = panel_indicators.compute_panel(high, low, close)
+        score, factors = panel_indicators.composite_score(
+            close, panel['MA5'], panel['MA20'], panel['RSI'],
+            panel['MACD'], panel['MACD_Signal'], panel['BB_Percent']
+        )
+        state = panel_indicators.classify_score(score)
+        
+        signal_names = {1: "BULLISH", -1: "BEARISH", 0: "NEUTRAL"}
+        
+        def _value(name: str, row: int, digits: int = 4) -> Optional[float]:
+            value = panel[name][row, -1]
+            return None if np.isnan(value) else round(float(value), digits)
+        
+        for row, (symbol, df) in enumerate(zip(valid_symbols, valid_frames)):
+            record = {
+                "symbol": symbol,
+                "date": pd.Timestamp(df['date'].iloc[-1]).strftime('%Y-%m-%d'),
+                "close": round(float(close[row, -1]), 2),
+                "volume": int(df['volume'].iloc[-1]),
+            }
+            for name in ['MA5', 'MA10', 'MA20', 'MA60', 'EMA12', 'EMA26', 'RSI',
+                         'MACD', 'MACD_Signal', 'MACD_Histogram',
+                         'BB_Upper', 'BB_Middle', 'BB_Lower', 'BB_Percent', 'ATR']:
+                record[name] = _value(name, row)
+            
+            if factors[row, -1] > 0:
+                record["score"] = round(float(score[row, -1]), 2)
+                record["overall_signal"] = signal_names[int(state[row, -1])]
+                record["confidence"] = round(abs(float(score[row, -1])) * 100, 1)
+            else:
+                record["score"] = None
+                record["overall_signal"] = "NEUTRAL"
+                record["confidence"] = 0
+            results.append(record)
+        
+        order = {symbol: i for i, symbol in enumerate(symbols)}
+        results.sort(key=lambda r: order[r['symbol']])
+        return results
+
+
+def load_symbols_file(path: str) -> List[str]:
+    """读取标的列表文件 (每行一个代码，支持 # 注释)"""
+    symbols = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            symbol = line.split('#', 1)[0].strip()
+            if symbol and symbol not in symbols:
+                symbols.append(symbol)
+    return symbols
+
+
+def format_batch_results(results: List[Dict], output_format: str = "text") -> str:
+    """格式化批量分析结果"""
+    if output_format == "json":
+        return json.dumps(results, indent=2, ensure_ascii=False)
+    
+    signal_icon = {
+        "BULLISH": "🟢 看多",
+        "BEARISH": "🔴 看空",
+        "NEUTRAL": "⚪ 观望"
+    }
+    
+    output = []
+    output.append("=" * 65)
+    output.append(f"📈 批量技术分析 ({len(results)} 个标的)")
+    output.append("=" * 65)
+    output.append(f"{'代码':<12} {'收盘价':>10} {'RSI':>7} {'评分':>6}  信号")
+    output.append("-" * 65)
+    for r in results:
+        if 'error' in r:
+            output.append(f"{r['symbol']:<12} ❌ {r['error']}")
+            continue
+        rsi = f"{r['RSI']:.1f}" if r['RSI'] is not None else "N/A"
+        score = f"{r['score']:+.2f}" if r['score'] is not None else "N/A"
+        output.append(f"{r['symbol']:<12} {r['close']:>10.2f} {rsi:>7} {score:>6}  "
+                      f"{signal_icon.get(r['overall_signal'], r['overall_signal'])}")
+    output.append("=" * 65)
+    return "\n".join(output)
+
+
+def format_timeframe_result(result: Dict, output_format: str = "text") -> str:
+    """格式化多周期分析结果"""
+    if output_format == "json":
+        return json.dumps(result, indent=2, ensure_ascii=False)
+    if 'error' in result:
+        return f"❌ {result['error']}"
+    
+    signal_icon = {
+        "BULLISH": "🟢 看多",
+        "BEARISH": "🔴 看空",
+        "NEUTRAL": "⚪ 观望"
+    }
+    
+    output = []
+    output.append("=" * 65)
+    output.append(f"📈 {result['symbol']} 多周期分析 (基础周期 {result['base_period']})")
+    output.append("=" * 65)
+    output.append(f"{'周期':<6} {'K线数':>6} {'收盘价':>10} {'RSI':>7} {'评分':>6}  信号")
+    output.append("-" * 65)
+    for tf, r in result['timeframes'].items():
+        if 'error' in r:
+            output.append(f"{tf:<6} {r['bars']:>6}  ❌ {r['error']}")
+            continue
+        rsi = f"{r['rsi']:.1f}" if r['rsi'] is not None else "N/A"
+        score = f"{r['score']:+.2f}" if r['score'] is not None else "N/A"
+        output.append(f"{tf:<6} {r['bars']:>6} {r['close']:>10.2f} {rsi:>7} {score:>6}  "
+                      f"{signal_icon.get(r['overall_signal'], r['overall_signal'])}")
+    
+    combined = result['confluence']
+    output.append("-" * 65)
+    if combined['score'] is not None:
+        output.append(f"🎯 共振评分: {combined['score']:+.2f}  方向一致: {combined['aligned']}%  "
+                      f"{signal_icon[combined['overall_signal']]}")
+    else:
+        output.append("🎯 共振评分: N/A")
+    output.append("=" * 65)
+    return "\n".join(output)
 
 
 def main():
     parser = argparse.ArgumentParser(description='技术分析指标工具')
-    parser.add_argument('--symbol', '-s', required=True, help='股票代码 (如 MSFT, 700.HK)')
+    parser.add_argument('--symbol', '-s', help='股票代码 (如 MSFT, 700.HK)')
+    parser.add_argument('--symbols-file', help='批量模式: 标的列表文件 (每行一个代码)')
+    parser.add_argument('--workers', type=int, default=8, help='批量模式最大并发请求数 (默认: 8)')
     parser.add_argument('--days', '-d', type=int, default=90, help='分析天数 (默认: 90)')
-    parser.add_argument('--output', '-o', choices=['text', 'json'], default='text', 
-                       help='输出格式 (默认: text)')
+    parser.add_argument('--timeframes', nargs='+', metavar='PERIOD',
+                       help='多周期共振分析的周期 (如 1d 1w 1M 或 1h 4h 1d)')
+    parser.add_argument('--bars', type=int, default=100, help='多周期模式每个周期的K线数 (默认: 100)')
+    parser.add_argument('--output', '-o', choices=['text', 'json', 'parquet'], default='text', 
+                       help='输出格式 (默认: text; parquet 仅用于批量模式，需配合 --save)')
     parser.add_argument('--demo', action='store_true', 
                        help='演示模式(使用模拟数据，无需API)')
     parser.add_argument('--save', help='保存结果到文件')
+    parser.add_argument('--bar-cache', help='本地K线缓存文件 (默认 data/bar_cache.sqlite)')
+    parser.add_argument('--no-cache', action='store_true', help='禁用本地K线缓存，每次全量下载')
     
     args = parser.parse_args()
     
+    if not args.symbol and not args.symbols_file:
+        parser.print_help()
+        return 1
+    
+    if args.timeframes and args.output == 'parquet':
+        print("❌ 多周期模式不支持 parquet 输出")
+        return 1
+    
+    if args.output == 'parquet' and not (args.symbols_file and args.save):
+        print("❌ parquet 输出仅支持批量模式，且需要指定 --save")
+        return 1
+    
     # 创建分析器并执行分析
-    analyzer = TechnicalAnalyzer(use_demo=args.demo)
-    result = analyzer.analyze(args.symbol, args.days, args.output)
+    bar_store = None if (args.demo or args.no_cache) else BarStore(args.bar_cache)
+    analyzer = TechnicalAnalyzer(use_demo=args.demo, bar_store=bar_store)
+    
+    if args.symbols_file:
+        symbols = load_symbols_file(args.symbols_file)
+        results = analyzer.analyze_many(symbols, args.days, max_workers=args.workers)
+        
+        if args.output == 'parquet':
+            try:
+                pd.DataFrame(results).to_parquet(args.save, index=False)
+            except ImportError:
+                print("❌ parquet 输出需要安装依赖: pip3 install pyarrow")
+                return 1
+            print(f"\n💾 结果已保存到: {args.save}")
+            return 0
+        
+        result = format_batch_results(results, args.output)
+    elif args.timeframes:
+        try:
+            result = format_timeframe_result(
+                analyzer.analyze_timeframes(args.symbol, args.timeframes, args.bars), args.output)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+    else:
+        result = analyzer.analyze(args.symbol, args.days, args.output)
     
     print(result)
     
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+多周期K线重采样 - Multi-Timeframe Resampling
+从最细粒度的K线一次性构建更高周期 (1h → 4h → 1d → 1w → 1M)，不为每个周期单独请求网络
+
+- 每个目标周期从已构建的、能整除它的最粗周期聚合 (月线从日线聚合，不从周线聚合)
+- 聚合基于 NumPy reduceat: open 取首根、high 取最大、low 取最小、close 取末根、volume 求和
+- K线以所属区间的起始时间标记；最后一根可能是尚未走完的区间 (如本周、本月)
+
+用法:
+    frames = resample_all(hourly_df, base='1h', targets=['4h', '1d', '1w'])
+    weekly = resample_bars(daily_df, '1w')
+"""
+
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+# 支持的周期，由细到粗
+TIMEFRAMES = ['1h', '4h', '1d', '1w', '1M']
+
+# 其他写法 (yfinance / BarStore 的周期名) -> 标准周期名
+ALIASES = {
+    '60m': '1h',
+    '1wk': '1w',
+    '1mo': '1M',
+}
+
+# 各周期大致包含的交易小时数 (按美股每日约 7 根小时K线估算)，用于推算需要多少根基础K线
+TRADING_HOURS = {
+    '1h': 1,
+    '4h': 4,
+    '1d': 7,
+    '1w': 35,
+    '1M': 147,
+}
+
+# 数据源原生支持的周期；其余周期 (4h) 由更细的K线重采样得到
+NATIVE_TIMEFRAMES = {'1h', '1d', '1w', '1M'}
+
+# LongPort Period 枚举名
+LONGPORT_PERIODS = {
+    '1h': 'Min_60',
+    '1d': 'Day',
+    '1w': 'Week',
+    '1M': 'Month',
+}
+
+# Yahoo Finance interval
+YFINANCE_INTERVALS = {
+    '1h': '60m',
+    '1d': '1d',
+    '1w': '1wk',
+    '1M': '1mo',
+}
+
+# 每根K线对应的自然日跨度 (含余量)，用于计算按日期请求的起始时间
+CALENDAR_DAYS_PER_BAR = {
+    '1h': 0.5,
+    '4h': 1.5,
+    '1d': 2,
+    '1w': 10,
+    '1M': 40,
+}
+
+# 多周期共振评分中各周期的权重 (周期越长权重越高)
+CONFLUENCE_WEIGHTS = {
+    '1h': 1.0,
+    '4h': 1.5,
+    '1d': 2.0,
+    '1w': 3.0,
+    '1M': 4.0,
+}
+
+# 演示数据的 pandas 频率
+DEMO_FREQ = {
+    '1h': 'h',
+    '4h': '4h',
+    '1d': 'D',
+    '1w': 'W-FRI',
+    '1M': 'BME',
+}
+
+
+def normalize(timeframe: str) -> str:
+    """标准化周期名，不支持的周期抛出 ValueError"""
+    timeframe = ALIASES.get(timeframe, timeframe)
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"不支持的K线周期: {timeframe} (可选: {', '.join(TIMEFRAMES)})")
+    return timeframe
+
+
+def is_finer(a: str, b: str) -> bool:
+    """a 是否比 b 更细"""
+    return TIMEFRAMES.index(normalize(a)) < TIMEFRAMES.index(normalize(b))
+
+
+def nests_into(source: str, target: str) -> bool:
+    """source 周期的K线能否无跨界地聚合成 target (周线不能聚合成月线)"""
+    source, target = normalize(source), normalize(target)
+    if not is_finer(source, target):
+        return False
+    return not (source == '1w' and target == '1M')
+
+
+def base_bars_needed(base: str, target: str, target_bars: int) -> int:
+    """得到 target_bars 根 target 周期K线大约需要多少根 base 周期K线"""
+    ratio = TRADING_HOURS[normalize(target)] / TRADING_HOURS[normalize(base)]
+    return int(np.ceil(target_bars * max(ratio, 1.0)))
+
+
+def _bin_keys(dates: pd.DatetimeIndex, timeframe: str) -> Tuple[np.ndarray, pd.DatetimeIndex]:
+    """每根K线所属目标区间的起始时间 (int64 纳秒键, 时间戳)"""
+    if timeframe in ('1h', '4h'):
+        starts = dates.floor(timeframe)
+    elif timeframe == '1d':
+        starts = dates.normalize()
+    elif timeframe == '1w':
+        days = dates.normalize()
+        starts = days - pd.to_timedelta(days.dayofweek, unit='D')
+    else:
+        days = dates.normalize()
+        starts = days - pd.to_timedelta(days.day - 1, unit='D')
+    return starts.asi8, starts
+
+
+def resample_bars(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    将按时间升序排列的K线聚合为更高周期
+
+    Args:
+        df: DataFrame(date, open, high, low, close, volume)
+        timeframe: 目标周期 ('4h', '1d', '1w', '1M' 等)
+
+    Returns:
+        同样列结构的 DataFrame，date 为区间起始时间
+    """
+    timeframe = normalize(timeframe)
+    if df.empty:
+        return df.copy()
+
+    dates = pd.DatetimeIndex(df['date'])
+    keys, starts = _bin_keys(dates, timeframe)
+
+    # 数据已按时间排序，区间边界即 key 变化处
+    first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    last = np.r_[first[1:] - 1, len(keys) - 1]
+
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy()
+
+    return pd.DataFrame({
+        'date': starts[first],
+        'open': df['open'].to_numpy(dtype=np.float64)[first],
+        'high': np.maximum.reduceat(high, first),
+        'low': np.minimum.reduceat(low, first),
+        'close': df['close'].to_numpy(dtype=np.float64)[last],
+        'volume': np.add.reduceat(volume, first),
+    })
+
+
+def resample_all(df: pd.DataFrame, base: str, targets: Iterable[str]) -> Dict[str, pd.DataFrame]:
+    """
+    从基础周期K线一次构建多个更高周期
+
+    每个目标周期从已构建的、能整除它的最粗周期聚合，逐级减少需要扫描的K线数量
+
+    Args:
+        df: 基础周期K线
+        base: 基础周期
+        targets: 目标周期 (可包含 base 本身)
+
+    Returns:
+        Dict: 周期 -> K线 DataFrame
+    """
+    base = normalize(base)
+    frames = {base: df}
+    for target in ordered(targets):
+        if target == base:
+            continue
+        if not is_finer(base, target):
+            raise ValueError(f"无法从 {base} 周期构建更细的 {target} 周期")
+        source = max((tf for tf in frames if nests_into(tf, target)), key=TIMEFRAMES.index)
+        frames[target] = resample_bars(frames[source], target)
+    return frames
+
+
+def finest(timeframes: Iterable[str]) -> str:
+    """最细的周期"""
+    return min((normalize(t) for t in timeframes), key=TIMEFRAMES.index)
+
+
+def fetch_timeframe(timeframes: Iterable[str]) -> str:
+    """构建给定周期所需请求的基础周期: 含日内周期时取 1h，否则取日线"""
+    return '1h' if is_finer(finest(timeframes), '1d') else '1d'
+
+
+def ordered(timeframes: Iterable[str]) -> List[str]:
+    """去重并按由细到粗排序"""
+    return sorted({normalize(t) for t in timeframes}, key=TIMEFRAMES.index)
+
+
+def confluence(scores: Dict[str, float]) -> Dict:
+    """
+    多周期共振评分
+
+    Args:
+        scores: 周期 -> 该周期的归一化评分 (-1 ~ 1)，无评分的周期不传
+
+    Returns:
+        Dict: score (加权平均评分)、aligned (与总体方向一致的周期占比)
+    """
+    if not scores:
+        return {'score': None, 'aligned': None}
+    weights = np.array([CONFLUENCE_WEIGHTS[normalize(tf)] for tf in scores])
+    values = np.array(list(scores.values()), dtype=np.float64)
+    score = float(np.dot(weights, values) / weights.sum())
+    direction = np.sign(score)
+    aligned = float(np.mean(np.sign(values) == direction)) if direction != 0 else 0.0
+    return {'score': score, 'aligned': aligned}
@@ -17,13 +17,13 @@ import argparse
 from datetime import datetime
 from pathlib import Path
 from decimal import Decimal
-from longport.openapi import QuoteContext, Config
 
 # 添加当前目录到路径
 sys.path.insert(0, str(Path(__file__).parent))
 
 from cmc_price import get_crypto_price
 from exchange_rate import get_exchange_rates
+from market_data import get_registry
 
 # 配置
 DATA_DIR = Path('/Users/daniel/.openclaw/workspace/investment/data')
@@ -92,12 +92,10 @@ def get_symbols_from_portfolio(portfolio):
     return stock_symbols, crypto_symbols, positions_map
 
 def fetch_stock_quotes(symbols):
-    """从 LongPort API 获取股票行情"""
+    """批量获取股票行情 (共享数据源注册表: LongPort -> Yahoo Finance)"""
     if not symbols:
         return []
-    config = Config.from_env()
-    ctx = QuoteContext(config)
-    return ctx.quote(symbols)
+    return get_registry().quotes(symbols)
 
 def fetch_crypto_prices(symbols):
     """从 CMC 获取加密货币价格"""
@@ -315,12 +313,12 @@ def main():
     print(f"\n📊 发现 {len(stock_symbols)} 只股票, {len(crypto_symbols)} 个加密货币")
     
     # 获取股票行情
-    print("\n📡 连接 LongPort API...")
+    print("\n📡 获取股票行情 (LongPort / Yahoo Finance)...")
     try:
         stock_quotes = fetch_stock_quotes(stock_symbols)
         print(f"✅ 成功获取 {len(stock_quotes)} 条股票行情")
     except Exception as e:
-        print(f"❌ LongPort API 连接失败: {e}")
+        print(f"❌ 股票行情获取失败: {e}")
         return 1
     
     # 获取加密货币价格
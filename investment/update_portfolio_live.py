@@ -7,7 +7,12 @@ Friday 模拟盘实时估值脚本
 import json
 import sys
 from decimal import Decimal
-from longport.openapi import QuoteContext, Config
+from pathlib import Path
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).parent))
+
+from market_data import get_registry
 
 # 汇率（可改为实时获取）
 USD_CNY_RATE = 7.25
@@ -51,10 +56,8 @@ def get_symbols_from_portfolio(portfolio):
     return symbols, positions_map
 
 def fetch_quotes(symbols):
-    """从 LongPort API 获取实时行情"""
-    config = Config.from_env()
-    ctx = QuoteContext(config)
-    return ctx.quote(symbols)
+    """批量获取实时行情 (共享数据源注册表: LongPort -> Yahoo Finance)"""
+    return get_registry().quotes(symbols)
 
 def calculate_portfolio_value(quotes, positions_map, cash_value):
     """计算组合市值"""
@@ -185,7 +188,7 @@ def main():
     """主函数"""
     from datetime import datetime
     
-    print("📡 正在连接 LongPort API...")
+    print("📡 正在获取实时行情 (LongPort / Yahoo Finance)...")
     
     try:
         # 加载持仓
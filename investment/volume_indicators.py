@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+成交量指标引擎 - Vectorized Volume Indicators
+基于 NumPy 数组的向量化成交量指标: OBV、VWAP、MFI、A/D 线、Chaikin 振荡器、成交量分布
+
+所有指标均直接在原始数组上用 sign/cumsum 运算完成，不含逐行 Python 循环，
+计算耗时随K线数量线性增长。
+
+用法:
+    python volume_indicators.py --benchmark
+    python volume_indicators.py --benchmark --sizes 10000 100000 1000000 5000000
+"""
+
+import argparse
+import sys
+import time
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas numpy")
+    sys.exit(1)
+
+
+def _as_float(values) -> np.ndarray:
+    """转换为连续的 float64 数组 (已是 float64 时不复制)"""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _window_diff(csum: np.ndarray, window: int) -> np.ndarray:
+    """累加和的窗口差分: out[i] = csum[i] - csum[i - window]，前 window-1 个位置为 NaN"""
+    out = np.full(len(csum), np.nan)
+    out[window - 1] = csum[window - 1]
+    out[window:] = csum[window:] - csum[:-window]
+    return out
+
+
+def nan_cumsum(values: np.ndarray) -> np.ndarray:
+    """
+    跳过 NaN 的累加和 (与 pandas Series.cumsum 一致)
+
+    NaN 位置计 0 参与累加、自身输出 NaN，之后的值不受影响
+    """
+    values = _as_float(values)
+    valid = np.isfinite(values)
+    out = np.cumsum(np.where(valid, values, 0.0))
+    out[~valid] = np.nan
+    return out
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    基于累加和的滚动求和，前 window-1 个位置为 NaN
+
+    sum[i] = cumsum[i] - cumsum[i - window]
+    与 pandas rolling(window).sum() 一致: 窗口内含 NaN 时为 NaN，NaN 移出窗口后恢复
+    (NaN 先置 0 再累加，另用无效K线计数判断窗口是否完整)
+    """
+    values = _as_float(values)
+    if window <= 0 or len(values) < window:
+        return np.full(len(values), np.nan)
+    valid = np.isfinite(values)
+    out = _window_diff(np.cumsum(np.where(valid, values, 0.0)), window)
+    invalid = _window_diff(np.cumsum(~valid), window)
+    out[invalid > 0] = np.nan
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """基于累加和的滚动均值"""
+    return rolling_sum(values, window) / window
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """指数移动平均 (adjust=False，与 TechnicalAnalyzer.calculate_ema 一致)"""
+    return pd.Series(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def obv(close: np.ndarray, volume: np.ndarray) -> np.ndarray:
+    """
+    OBV (On Balance Volume) 能量潮
+
+    OBV[i] = OBV[i-1] + sign(close[i] - close[i-1]) * volume[i]，OBV[0] = 0
+    收盘价或成交量缺失的K线不改变 OBV
+    """
+    close = _as_float(close)
+    volume = _as_float(volume)
+    out = np.zeros(len(close))
+    if len(close) > 1:
+        step = np.sign(np.diff(close)) * volume[1:]
+        np.cumsum(np.where(np.isfinite(step), step, 0.0), out=out[1:])
+    return out
+
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+         window: Optional[int] = None) -> np.ndarray:
+    """
+    VWAP (成交量加权平均价)
+
+    典型价格 = (high + low + close) / 3
+    window 为 None 时计算全区间累计 VWAP，否则计算滚动 VWAP
+    """
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3.0
+    volume = _as_float(volume)
+    pv = typical * volume
+
+    if window is None:
+        # 任一输入缺失的K线不计入累计
+        valid = np.isfinite(pv)
+        num = np.cumsum(np.where(valid, pv, 0.0))
+        den = np.cumsum(np.where(valid, volume, 0.0))
+    else:
+        num = rolling_sum(pv, window)
+        den = rolling_sum(volume, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(den > 0, num / den, np.nan)
+
+
+def mfi(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray,
+        period: int = 14) -> np.ndarray:
+    """
+    MFI (Money Flow Index) 资金流量指标
+
+    典型价格上涨日的资金流计入正向，下跌日计入负向
+    MFI = 100 - 100 / (1 + 正向资金流 / 负向资金流)
+    """
+    typical = (_as_float(high) + _as_float(low) + _as_float(close)) / 3.0
+    raw_flow = typical * _as_float(volume)
+
+    direction = np.zeros(len(typical))
+    direction[1:] = np.sign(np.diff(typical))
+
+    pos_flow = rolling_sum(np.where(direction > 0, raw_flow, 0.0), period)
+    neg_flow = rolling_sum(np.where(direction < 0, raw_flow, 0.0), period)
+    # 第一根K线没有方向，滚动窗口从第二根开始才完整
+    pos_flow[:period] = np.nan
+    neg_flow[:period] = np.nan
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + pos_flow / neg_flow)
+    # 窗口内没有下跌: MFI = 100
+    out[(neg_flow == 0) & (pos_flow > 0)] = 100.0
+    out[(neg_flow == 0) & (pos_flow == 0)] = 50.0
+    return out
+
+
+def ad_line(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+            volume: np.ndarray) -> np.ndarray:
+    """
+    A/D 线 (Accumulation/Distribution Line) 累积/派发线
+
+    CLV = ((close - low) - (high - close)) / (high - low)，high == low 时取 0
+    A/D = cumsum(CLV * volume)，缺失的K线输出 NaN，之后继续累加
+    """
+    high = _as_float(high)
+    low = _as_float(low)
+    close = _as_float(close)
+    spread = high - low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        clv = np.where(spread > 0, ((close - low) - (high - close)) / spread, 0.0)
+    return nan_cumsum(clv * _as_float(volume))
+
+
+def chaikin_oscillator(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                       volume: np.ndarray, fast: int = 3, slow: int = 10,
+                       ad: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Chaikin 振荡器 = EMA(A/D, 3) - EMA(A/D, 10)
+
+    已计算过 A/D 线时可通过 ad 参数传入，避免重复计算
+    """
+    if ad is None:
+        ad = ad_line(high, low, close, volume)
+    return ema(ad, fast) - ema(ad, slow)
+
+
+def volume_profile(close: np.ndarray, volume: np.ndarray, bins: int = 24) -> Dict:
+    """
+    成交量分布 (Volume Profile)
+
+    按收盘价分箱统计成交量，返回各价格区间成交量和 POC (成交最密集价位)
+    """
+    close = _as_float(close)
+    volume = _as_float(volume)
+    if len(close) == 0:
+        return {'bin_edges': [], 'volume': [], 'poc': None}
+
+    hist, edges = np.histogram(close, bins=bins, weights=volume)
+    poc_idx = int(np.argmax(hist))
+    return {
+        'bin_edges': edges.tolist(),
+        'volume': hist.tolist(),
+        'poc': round(float((edges[poc_idx] + edges[poc_idx + 1]) / 2), 4),
+    }
+
+
+def compute_volume_indicators(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                              volume: np.ndarray, volume_ma: int = 20,
+                              mfi_period: int = 14) -> Dict[str, np.ndarray]:
+    """
+    一次性计算全部逐K线成交量指标
+
+    Returns:
+        Dict: 指标名 -> 与输入等长的 float64 数组
+    """
+    volume = _as_float(volume)
+    volume_ma_values = rolling_mean(volume, volume_ma)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ratio = volume / volume_ma_values
+
+    ad = ad_line(high, low, close, volume)
+
+    return {
+        f'Volume_MA{volume_ma}': volume_ma_values,
+        'Volume_Ratio': volume_ratio,
+        'OBV': obv(close, volume),
+        'VWAP': vwap(high, low, close, volume),
+        'MFI': mfi(high, low, close, volume, mfi_period),
+        'AD': ad,
+        'Chaikin': chaikin_oscillator(high, low, close, volume, ad=ad),
+    }
+
+
+def _obv_loop(close: np.ndarray, volume: np.ndarray) -> List[float]:
+    """旧版逐行循环 OBV，仅用于基准对比"""
+    series_close = pd.Series(close)
+    series_volume = pd.Series(volume)
+    obv_values = [0]
+    for i in range(1, len(series_close)):
+        if series_close.iloc[i] > series_close.iloc[i-1]:
+            obv_values.append(obv_values[-1] + series_volume.iloc[i])
+        elif series_close.iloc[i] < series_close.iloc[i-1]:
+            obv_values.append(obv_values[-1] - series_volume.iloc[i])
+        else:
+            obv_values.append(obv_values[-1])
+    return obv_values
+
+
+def run_benchmark(sizes: List[int], repeat: int = 3, loop_size: int = 20000) -> List[Dict]:
+    """
+    基准测试: 验证计算耗时随K线数量线性增长
+
+    Args:
+        sizes: 测试的K线数量列表
+        repeat: 每个规模重复次数 (取最快一次)
+        loop_size: 旧版循环 OBV 的对比规模 (循环版过慢，不跑大规模)
+    """
+    rng = np.random.default_rng(42)
+    results = []
+
+    for n in sizes:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        high = close * (1 + np.abs(rng.normal(0, 0.005, n)))
+        low = close * (1 - np.abs(rng.normal(0, 0.005, n)))
+        volume = rng.integers(1_000_000, 10_000_000, n).astype(np.float64)
+
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compute_volume_indicators(high, low, close, volume)
+            volume_profile(close, volume)
+            best = min(best, time.perf_counter() - start)
+
+        results.append({
+            'bars': n,
+            'seconds': best,
+            'ns_per_bar': best / n * 1e9,
+        })
+
+    # 旧版循环 OBV 对比
+    n = loop_size
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    volume = rng.integers(1_000_000, 10_000_000, n).astype(np.float64)
+    start = time.perf_counter()
+    _obv_loop(close, volume)
+    loop_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    obv(close, volume)
+    vec_seconds = time.perf_counter() - start
+
+    print(f"\n{'='*60}")
+    print("📊 成交量指标基准测试 (OBV/VWAP/MFI/AD/Chaikin/Profile)")
+    print(f"{'='*60}")
+    print(f"{'K线数':>12} {'耗时(ms)':>12} {'ns/K线':>10}")
+    for r in results:
+        print(f"{r['bars']:>12,} {r['seconds']*1000:>12.2f} {r['ns_per_bar']:>10.1f}")
+
+    if len(results) > 1:
+        first, last = results[0], results[-1]
+        scale = last['bars'] / first['bars']
+        time_scale = last['seconds'] / first['seconds'] if first['seconds'] > 0 else float('nan')
+        print(f"\n📈 规模放大 {scale:,.0f}x，耗时放大 {time_scale:,.1f}x "
+              f"(线性增长时两者接近)")
+
+    speedup = loop_seconds / vec_seconds if vec_seconds > 0 else float('inf')
+    print(f"\n⚡ OBV 对比 ({n:,} 根K线): 循环版 {loop_seconds*1000:.1f}ms, "
+          f"向量化 {vec_seconds*1000:.3f}ms, 加速 {speedup:,.0f}x")
+    print(f"{'='*60}\n")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='向量化成交量指标引擎')
+    parser.add_argument('--benchmark', action='store_true', help='运行基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10_000, 100_000, 1_000_000, 2_000_000],
+                        help='基准测试的K线数量 (默认: 1万/10万/100万/200万)')
+    parser.add_argument('--repeat', type=int, default=3, help='每个规模重复次数')
+
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        parser.print_help()
+        return 1
+
+    run_benchmark(args.sizes, args.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
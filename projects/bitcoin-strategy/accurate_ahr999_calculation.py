@@ -2,9 +2,14 @@ import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import time
+import sys
+from pathlib import Path
 from typing import Dict
 
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from btc_price_store import get_store
+
 class AccurateAHR999Calculator:
     """
     使用CoinMarketCap API精确计算AHR999指数
@@ -45,84 +50,13 @@ class AccurateAHR999Calculator:
     
     def get_btc_historical_data(self, days=500):
         """
-        获取比特币历史价格数据
+        获取比特币历史价格数据，从本地 BTC 日线存储读取 (过期时增量更新)
         """
-        try:
-            # 获取比特币ID
-            id_url = f"{self.base_url}/v1/cryptocurrency/map"
-            id_params = {'symbol': 'BTC'}
-            id_response = requests.get(id_url, params=id_params, headers=self.headers)
-            id_data = id_response.json()
-            
-            if 'data' in id_data and len(id_data['data']) > 0:
-                btc_id = id_data['data'][0]['id']
-            else:
-                print("无法获取比特币ID")
-                return None
-            
-            # 获取历史数据
-            hist_url = f"{self.base_url}/v2/cryptocurrency/quotes/historical"
-            hist_params = {
-                'id': btc_id,
-                'time_start': (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d'),
-                'time_end': datetime.now().strftime('%Y-%m-%d'),
-                'interval': '1d',
-                'convert': 'USD'
-            }
-            
-            response = requests.get(hist_url, params=hist_params, headers=self.headers)
-            data = response.json()
-            
-            if 'data' in data and 'quotes' in data['data']:
-                quotes = data['data']['quotes']
-                dates = []
-                prices = []
-                
-                for quote in quotes:
-                    date_str = quote['time_open'][:10]  # 取日期部分
-                    price = quote['quote']['USD']['price']
-                    dates.append(datetime.strptime(date_str, '%Y-%m-%d'))
-                    prices.append(price)
-                
-                df = pd.DataFrame({
-                    'timestamp': dates,
-                    'price': prices
-                })
-                
-                # 按时间排序
-                df = df.sort_values('timestamp').reset_index(drop=True)
-                return df
-            else:
-                print("无法从CoinMarketCap获取历史数据")
-                return None
-        except Exception as e:
-            print(f"获取比特币历史数据错误: {e}")
-            # 尝试替代方法
-            try:
-                # 使用CoinGecko作为备选
-                print("尝试使用备选API获取数据...")
-                gecko_url = f"https://api.coingecko.com/api/v3/coins/bitcoin/market_chart?vs_currency=usd&days={days}&interval=daily"
-                headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-                
-                response = requests.get(gecko_url, headers=headers)
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    prices = [item[1] for item in data['prices']]
-                    timestamps = [datetime.fromtimestamp(item[0]/1000) for item in data['prices']]
-                    
-                    df = pd.DataFrame({
-                        'timestamp': timestamps,
-                        'price': prices
-                    })
-                    
-                    return df
-                else:
-                    print(f"CoinGecko API也失败，状态码: {response.status_code}")
-                    return None
-            except:
-                print("备选API也失败")
-                return None
+        df = get_store().history(days)
+        if df.empty:
+            print("无法获取历史数据: 本地 BTC 日线存储为空且无法更新")
+            return None
+        return df
     
     def calculate_ahr999(self, df: pd.DataFrame, current_price: float) -> float:
         """
@@ -2,10 +2,15 @@ import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import time
 import os
+import sys
+from pathlib import Path
 from typing import Dict
 
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from btc_price_store import get_store
+
 class AlternativeAHR999Calculator:
     """
     使用其他API计算AHR999指数
@@ -44,47 +49,6 @@ class AlternativeAHR999Calculator:
             print(f"FMP: 获取比特币价格错误: {e}")
             return None
     
-    def get_btc_historical_fmp(self, symbol="BTCUSD", days=500):
-        """
-        使用FMP获取历史数据
-        """
-        if not self.fmp_api_key:
-            return None
-            
-        try:
-            # 获取历史数据
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-            
-            url = f"https://financialmodelingprep.com/api/v3/historical-price-full/{symbol}?from={start_date}&to={end_date}&apikey={self.fmp_api_key}"
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'historical' in data:
-                hist_data = data['historical']
-                dates = []
-                prices = []
-                
-                for entry in hist_data:
-                    dates.append(datetime.strptime(entry['date'], '%Y-%m-%d'))
-                    prices.append(entry['close'])
-                
-                df = pd.DataFrame({
-                    'timestamp': dates,
-                    'price': prices
-                })
-                
-                # 按时间排序
-                df = df.sort_values('timestamp').reset_index(drop=True)
-                return df
-            else:
-                print("FMP: 无法获取历史数据")
-                return None
-        except Exception as e:
-            print(f"FMP: 获取历史数据错误: {e}")
-            return None
-
     def get_btc_price_coingecko(self):
         """
         使用CoinGecko获取当前价格（无需API密钥）
@@ -100,46 +64,15 @@ class AlternativeAHR999Calculator:
             print(f"CoinGecko: 获取当前价格错误: {e}")
             return None
 
-    def get_btc_historical_coingecko(self, days=500):
+    def get_btc_historical(self, days=500):
         """
-        使用CoinGecko获取历史数据（无需API密钥）
+        获取历史数据，从本地 BTC 日线存储读取 (过期时增量更新，无需API密钥)
         """
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            
-            # 获取时间戳
-            end_timestamp = int(time.time())
-            start_timestamp = end_timestamp - (days * 24 * 3600)
-            
-            url = f"https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range"
-            params = {
-                'vs_currency': 'usd',
-                'from': start_timestamp,
-                'to': end_timestamp
-            }
-            
-            response = requests.get(url, params=params, headers=headers, timeout=60)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'prices' in data:
-                prices = [item[1] for item in data['prices']]
-                timestamps = [datetime.fromtimestamp(item[0]/1000) for item in data['prices']]
-                
-                df = pd.DataFrame({
-                    'timestamp': timestamps,
-                    'price': prices
-                })
-                
-                # 按时间排序
-                df = df.sort_values('timestamp').reset_index(drop=True)
-                return df
-            else:
-                print("CoinGecko: 无法获取历史数据")
-                return None
-        except Exception as e:
-            print(f"CoinGecko: 获取历史数据错误: {e}")
+        df = get_store().history(days)
+        if df.empty:
+            print("本地 BTC 日线存储为空且无法更新")
             return None
+        return df
 
     def calculate_ahr999(self, df: pd.DataFrame, current_price: float) -> float:
         """
@@ -233,21 +166,10 @@ def get_alternative_analysis():
     
     print(f"当前比特币价格: ${current_price:,.2f}")
     
-    # 尝试多种方式获取历史数据
-    print("\n正在尝试获取历史价格数据...")
-    df = None
-    
-    # 首先尝试FMP
-    if df is None:
-        df = calculator.get_btc_historical_fmp()
-        if df is not None:
-            print(f"通过FMP获取到 {len(df)} 天历史数据")
-    
-    # 如果FMP失败，使用CoinGecko
-    if df is None:
-        df = calculator.get_btc_historical_coingecko(days=500)
-        if df is not None:
-            print(f"通过CoinGecko获取到 {len(df)} 天历史数据")
+    print("\n正在获取历史价格数据...")
+    df = calculator.get_btc_historical(days=500)
+    if df is not None:
+        print(f"从本地日线存储获取到 {len(df)} 天历史数据")
     
     if df is None or df.empty:
         print("无法获取历史数据，使用模拟数据进行演示...")
@@ -1,45 +1,34 @@
-import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import time
 import json
-import os
+import sys
+from pathlib import Path
 from typing import Dict, List, Tuple
 
+# Shared indicator kernels (investment/indicator_kernels.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'investment'))
+import indicator_kernels
+
+# Local BTC daily close store (btc_price_store.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from btc_price_store import get_store
+
 class BitcoinTradingStrategy:
     """
     A Bitcoin trading strategy that analyzes daily price data to generate buy/sell signals
     """
     
     def __init__(self):
-        self.api_url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
         self.signals = []
         
     def get_bitcoin_data(self, days: int = 365) -> pd.DataFrame:
         """
-        Fetch Bitcoin price data from CoinGecko API
+        Read Bitcoin daily closes from the local BTC store (refreshed incrementally when stale)
         """
-        url = f"{self.api_url}?vs_currency=usd&days={days}&interval=daily"
-        
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Convert to DataFrame
-            prices = [item[1] for item in data['prices']]
-            timestamps = [datetime.fromtimestamp(item[0]/1000) for item in data['prices']]
-            
-            df = pd.DataFrame({
-                'timestamp': timestamps,
-                'price': prices
-            })
-            
-            return df
-        except Exception as e:
-            print(f"Error fetching Bitcoin data: {e}")
-            return pd.DataFrame()
+        df = get_store().history(days)
+        if df.empty:
+            print("Error fetching Bitcoin data: local BTC store is empty and could not be updated")
+        return df
     
     def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -58,12 +47,8 @@ class BitcoinTradingStrategy:
         df['macd_signal'] = df['macd'].ewm(span=9).mean()
         df['macd_histogram'] = df['macd'] - df['macd_signal']
         
-        # RSI (Relative Strength Index)
-        delta = df['price'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
+        # RSI (Relative Strength Index), Wilder smoothing
+        df['rsi'] = indicator_kernels.rsi(df['price'].to_numpy(dtype=np.float64), 14)
         
         # Bollinger Bands
         df['bb_middle'] = df['price'].rolling(window=20).mean()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+BTC 日收盘价本地存储 - Local BTC Daily Close Store
+基于 SQLite 的 BTC/USD 日收盘价历史 (UTC 日期)，本目录下所有 ahr999 计算与策略共用
+
+- 首次使用时从 2010-07-17 起全量回填 (CryptoCompare 日线，每次请求 2000 天，向前翻页)
+- 之后只增量追加上次存储日期之后的收盘价 (重取最后一天，覆盖当时未收盘的价格)
+- 策略只从本地读取；距上次更新不足 max_age 时完全不访问网络，更新失败时使用已有的本地数据
+
+用法:
+    store = get_store()
+    df = store.history(500)        # DataFrame(timestamp, price)
+
+    python btc_price_store.py --backfill
+    python btc_price_store.py --update
+    python btc_price_store.py --stats
+    python btc_price_store.py --show 10
+    python btc_price_store.py --clear
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import pandas as pd
+except ImportError:
+    print("❌ 需要安装依赖: pip3 install pandas")
+    sys.exit(1)
+
+# 默认存储文件位置
+DEFAULT_BTC_STORE = Path(__file__).parent / 'data' / 'btc_daily.sqlite'
+
+# 有交易所报价的最早日期 (Mt.Gox 上线)
+BACKFILL_START = '2010-07-17'
+
+CRYPTOCOMPARE_URL = "https://min-api.cryptocompare.com/data/v2/histoday"
+# CryptoCompare 单次请求最多返回的天数
+CRYPTOCOMPARE_LIMIT = 2000
+
+COINGECKO_URL = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
+# CoinGecko 免费接口最多回溯的天数
+COINGECKO_MAX_DAYS = 365
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS closes (
+    date TEXT PRIMARY KEY,
+    close REAL NOT NULL,
+    source TEXT NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _utc_today() -> datetime:
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+
+
+def fetch_cryptocompare(start: datetime, end: datetime) -> pd.DataFrame:
+    """
+    CryptoCompare 日线 (自 2010-07 起完整)，从 end 向前按 2000 天翻页直到 start
+
+    Returns:
+        DataFrame(date, close)，date 为 UTC 日期
+    """
+    import requests  # 只有更新存储时才需要网络依赖
+
+    rows = []
+    to_ts = int(end.replace(tzinfo=timezone.utc).timestamp())
+    start_ts = int(start.replace(tzinfo=timezone.utc).timestamp())
+    while to_ts >= start_ts:
+        limit = min(CRYPTOCOMPARE_LIMIT, (to_ts - start_ts) // 86400 + 1)
+        response = requests.get(CRYPTOCOMPARE_URL, headers=HEADERS, timeout=30, params={
+            'fsym': 'BTC', 'tsym': 'USD', 'limit': limit, 'toTs': to_ts,
+        })
+        response.raise_for_status()
+        data = response.json()
+        if data.get('Response') == 'Error':
+            raise RuntimeError(data.get('Message', 'CryptoCompare 返回错误'))
+        bars = [b for b in data['Data']['Data'] if b['time'] >= start_ts]
+        if not bars:
+            break
+        rows.extend(bars)
+        to_ts = min(b['time'] for b in bars) - 86400
+
+    df = pd.DataFrame(rows, columns=['time', 'close'])
+    # 上线前的日期收盘价为 0
+    df = df[df['close'] > 0]
+    df['date'] = pd.to_datetime(df['time'], unit='s').dt.normalize()
+    return df[['date', 'close']]
+
+
+def fetch_coingecko(start: datetime, end: datetime) -> pd.DataFrame:
+    """
+    CoinGecko 日线 (只用于增量更新，免费接口最多回溯 365 天)
+
+    00:00 UTC 的价格即前一日收盘价；最后一个点为当前价格，记为当日 (未收盘)
+    """
+    import requests  # 只有更新存储时才需要网络依赖
+
+    days = min((end - start).days + 2, COINGECKO_MAX_DAYS)
+    response = requests.get(COINGECKO_URL, headers=HEADERS, timeout=30,
+                            params={'vs_currency': 'usd', 'days': days, 'interval': 'daily'})
+    response.raise_for_status()
+    prices = response.json()['prices']
+    df = pd.DataFrame(prices, columns=['ms', 'close'])
+    ts = pd.to_datetime(df['ms'], unit='ms')
+    midnight = ts == ts.dt.normalize()
+    df['date'] = ts.dt.normalize() - pd.to_timedelta(midnight.astype(int), unit='D')
+    df = df.drop_duplicates('date', keep='last')
+    return df[df['date'] >= pd.Timestamp(start)][['date', 'close']]
+
+
+# 数据源 (按优先级): 名称 -> fetcher(start, end)
+SOURCES = [
+    ('cryptocompare', fetch_cryptocompare),
+    ('coingecko', fetch_coingecko),
+]
+
+
+class BTCPriceStore:
+    """SQLite BTC 日收盘价存储"""
+
+    def __init__(self, path: Optional[str] = None, max_age: float = 3600):
+        """
+        Args:
+            path: SQLite 文件路径 (默认 projects/bitcoin-strategy/data/btc_daily.sqlite)
+            max_age: 距上次更新不足该秒数时 history() 不访问网络
+        """
+        self.path = Path(path) if path else DEFAULT_BTC_STORE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def last_date(self) -> Optional[pd.Timestamp]:
+        """最后一个存储的日期"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(date) FROM closes").fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def first_date(self) -> Optional[pd.Timestamp]:
+        """最早存储的日期"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MIN(date) FROM closes").fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def last_updated(self) -> Optional[float]:
+        """最近一次写入的时间 (epoch 秒)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(updated_at) FROM closes").fetchone()
+        return row[0] if row else None
+
+    def upsert(self, df: pd.DataFrame, source: str) -> int:
+        """写入 DataFrame(date, close)，同一日期覆盖旧值，返回写入条数"""
+        if df is None or df.empty:
+            return 0
+        now = time.time()
+        rows = [(pd.Timestamp(d).strftime('%Y-%m-%d'), float(c), source, now)
+                for d, c in zip(df['date'], df['close'])]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO closes (date, close, source, updated_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def load(self, days: Optional[int] = None, start: Optional[str] = None) -> pd.DataFrame:
+        """
+        从本地读取 (不访问网络)
+
+        Args:
+            days: 最近的天数 (None 为全部)
+            start: 起始日期 (含)
+
+        Returns:
+            DataFrame(timestamp, price)，按日期升序 (与各策略原有的数据格式一致)
+        """
+        query = "SELECT date, close FROM closes"
+        params = []
+        if start is not None:
+            query += " WHERE date >= ?"
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        query += " ORDER BY date DESC"
+        if days is not None:
+            query += " LIMIT ?"
+            params.append(int(days))
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        rows.reverse()
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime([r[0] for r in rows]),
+            'price': [r[1] for r in rows],
+        })
+
+    def _fetch(self, start: datetime, end: datetime, full_history: bool = False) -> int:
+        """按数据源优先级获取 [start, end] 并写入；full_history 时跳过只有近一年数据的数据源"""
+        for name, fetcher in SOURCES:
+            if full_history and name == 'coingecko':
+                continue
+            try:
+                df = fetcher(start, end)
+            except Exception as e:
+                print(f"⚠️  {name} 获取 BTC 日线失败: {e}")
+                continue
+            if not df.empty:
+                return self.upsert(df, name)
+        return 0
+
+    def backfill(self, start: str = BACKFILL_START) -> int:
+        """从 start 起全量回填，返回写入条数"""
+        print(f"📥 回填 BTC 日收盘价 ({start} ~ 今天)...")
+        return self._fetch(pd.Timestamp(start).to_pydatetime(), _utc_today(), full_history=True)
+
+    def update(self) -> int:
+        """增量追加最后存储日期之后的收盘价 (空库时全量回填)，返回写入条数"""
+        last = self.last_date()
+        if last is None:
+            return self.backfill()
+        return self._fetch(last.to_pydatetime(), _utc_today())
+
+    def is_stale(self) -> bool:
+        """今天 (UTC) 的价格还没有存储，或距上次更新超过 max_age"""
+        last, updated = self.last_date(), self.last_updated()
+        if last is None or updated is None:
+            return True
+        return last < pd.Timestamp(_utc_today()) or time.time() - updated > self.max_age
+
+    def history(self, days: Optional[int] = None, refresh: bool = True) -> pd.DataFrame:
+        """
+        策略使用的入口: 最近 days 天的日收盘价 DataFrame(timestamp, price)
+
+        refresh 且存储过期时先做一次增量更新 (空库时全量回填)，失败时返回本地已有数据
+        """
+        if refresh and self.is_stale():
+            try:
+                self.update()
+            except Exception as e:
+                print(f"⚠️  BTC 日线更新失败，使用本地数据: {e}")
+        return self.load(days)
+
+    def clear(self):
+        """清空存储 (下次 history() 时重新全量回填)"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM closes")
+
+    def stats(self) -> Dict:
+        """存储统计"""
+        with self._connect() as conn:
+            count, first, last, updated = conn.execute(
+                "SELECT COUNT(*), MIN(date), MAX(date), MAX(updated_at) FROM closes"
+            ).fetchone()
+            sources = dict(conn.execute(
+                "SELECT source, COUNT(*) FROM closes GROUP BY source ORDER BY source"
+            ).fetchall())
+        return {
+            'days': count,
+            'first': first,
+            'last': last,
+            'updated': time.strftime('%Y-%m-%d %H:%M', time.localtime(updated)) if updated else None,
+            'sources': sources,
+        }
+
+
+_store: Optional[BTCPriceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> BTCPriceStore:
+    """进程内共享的存储实例"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BTCPriceStore()
+    return _store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='BTC 日收盘价本地存储')
+    parser.add_argument('--path', help='存储文件路径 (默认 projects/bitcoin-strategy/data/btc_daily.sqlite)')
+    parser.add_argument('--backfill', nargs='?', const=BACKFILL_START, metavar='START',
+                        help=f'全量回填 (默认自 {BACKFILL_START})')
+    parser.add_argument('--update', action='store_true', help='增量追加最新收盘价')
+    parser.add_argument('--stats', action='store_true', help='显示存储统计')
+    parser.add_argument('--show', type=int, metavar='N', help='显示最近 N 天收盘价')
+    parser.add_argument('--clear', action='store_true', help='清空存储')
+
+    args = parser.parse_args()
+    if not (args.backfill or args.update or args.stats or args.show or args.clear):
+        parser.print_help()
+        return 1
+
+    store = BTCPriceStore(args.path)
+    if args.clear:
+        store.clear()
+        print("🗑️  已清空 BTC 日线存储")
+    if args.backfill:
+        print(f"✅ 写入 {store.backfill(args.backfill)} 天")
+    if args.update:
+        print(f"✅ 写入 {store.update()} 天")
+    if args.show:
+        df = store.load(args.show)
+        print(df.to_string(index=False) if not df.empty else "⚠️  本地没有 BTC 日线")
+    if args.stats:
+        stats = store.stats()
+        print(f"📦 存储文件: {store.path}")
+        if stats['days']:
+            print(f"   {stats['days']} 天  {stats['first']} ~ {stats['last']}  最近更新 {stats['updated']}")
+            print(f"   来源: " + ', '.join(f"{k} {v} 天" for k, v in stats['sources'].items()))
+        else:
+            print("   (空)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,16 @@
 import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import time
+from datetime import datetime
 import os
+import sys
+from pathlib import Path
 from typing import Dict
 
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from btc_price_store import get_store
+
 class CMCAHR999Calculator:
     """
     使用CoinMarketCap API计算AHR999指数
@@ -51,119 +56,14 @@ class CMCAHR999Calculator:
     
     def get_btc_historical_data(self, days=500):
         """
-        获取比特币历史价格数据
-        """
-        try:
-            # 获取比特币ID
-            id_url = f"{self.base_url}/v1/cryptocurrency/map"
-            id_params = {'symbol': 'BTC'}
-            id_response = requests.get(id_url, params=id_params, headers=self.headers, timeout=30)
-            id_response.raise_for_status()
-            id_data = id_response.json()
-            
-            if 'data' in id_data and len(id_data['data']) > 0:
-                btc_id = id_data['data'][0]['id']
-            else:
-                print("无法获取比特币ID")
-                return None
-            
-            # 获取历史数据
-            # 由于CMC专业版API的限制，我们使用另一种方式获取历史数据
-            print("正在获取历史数据...")
-            
-            # 获取当前日期往前推指定天数的数据
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            # 使用CMC的历史端点
-            hist_url = f"{self.base_url}/v1/cryptocurrency/quotes/historical"
-            hist_params = {
-                'id': btc_id,
-                'time_start': start_date.strftime('%Y-%m-%d'),
-                'time_end': end_date.strftime('%Y-%m-%d'),
-                'interval': '1d',
-                'convert': 'USD'
-            }
-            
-            response = requests.get(hist_url, params=hist_params, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'data' in data and 'quotes' in data['data']:
-                quotes = data['data']['quotes']
-                dates = []
-                prices = []
-                
-                for quote in quotes:
-                    date_str = quote['time_open'][:10]  # 取日期部分
-                    price = quote['quote']['USD']['price']
-                    dates.append(datetime.strptime(date_str, '%Y-%m-%d'))
-                    prices.append(price)
-                
-                df = pd.DataFrame({
-                    'timestamp': dates,
-                    'price': prices
-                })
-                
-                # 按时间排序
-                df = df.sort_values('timestamp').reset_index(drop=True)
-                return df
-            else:
-                print("无法从CoinMarketCap获取历史数据")
-                print(f"响应数据结构: {data.keys() if 'data' in data else 'No data key'}")
-                return None
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 402:  # 付费功能
-                print("CoinMarketCap历史数据API需要高级订阅，尝试使用替代方法...")
-                return self.get_historical_data_alternative()
-            else:
-                print(f"获取比特币历史数据HTTP错误: {e}")
-                return None
-        except Exception as e:
-            print(f"获取比特币历史数据错误: {e}")
-            return self.get_historical_data_alternative()
-    
-    def get_historical_data_alternative(self):
-        """
-        替代方法获取历史数据（如果CMC API受限）
+        获取比特币历史价格数据，从本地 BTC 日线存储读取 (过期时增量更新)
+        CMC 历史行情接口需要付费订阅，日线统一由存储维护
         """
-        try:
-            print("使用替代API获取历史数据...")
-            # 使用CoinGecko作为备选，但使用更可靠的方法
-            gecko_url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range"
-            
-            # 获取过去一年的数据
-            end_timestamp = int(time.time())
-            start_timestamp = end_timestamp - (500 * 24 * 3600)  # 500天前
-            
-            params = {
-                'vs_currency': 'usd',
-                'from': start_timestamp,
-                'to': end_timestamp
-            }
-            
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            
-            response = requests.get(gecko_url, params=params, headers=headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'prices' in data:
-                prices = [item[1] for item in data['prices']]
-                timestamps = [datetime.fromtimestamp(item[0]/1000) for item in data['prices']]
-                
-                df = pd.DataFrame({
-                    'timestamp': timestamps,
-                    'price': prices
-                })
-                
-                return df
-            else:
-                print("无法从替代API获取历史数据")
-                return None
-        except Exception as e:
-            print(f"替代API也失败: {e}")
+        df = get_store().history(days)
+        if df.empty:
+            print("无法获取历史数据: 本地 BTC 日线存储为空且无法更新")
             return None
+        return df
     
     def calculate_ahr999(self, df: pd.DataFrame, current_price: float) -> float:
         """
@@ -1,12 +1,16 @@
 import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import time
+from datetime import datetime
 import json
-import os
+import sys
+from pathlib import Path
 from typing import Dict, List, Tuple
 
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from btc_price_store import get_store
+
 class CorrectedAHR999Strategy:
     """
     修正版AHR999指数计算的比特币交易策略
@@ -14,34 +18,17 @@ class CorrectedAHR999Strategy:
     
     def __init__(self):
         self.price_api_url = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
-        self.historical_api_url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
         self.fear_greed_api = "https://api.alternative.me/fng/"
         self.signals = []
         
     def get_historical_data(self, days: int = 500) -> pd.DataFrame:
         """
-        获取历史价格数据
+        获取历史价格数据，从本地 BTC 日线存储读取 (过期时增量更新)
         """
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            url = f"{self.historical_api_url}?vs_currency=usd&days={days}&interval=daily"
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            # 转换为DataFrame
-            prices = [item[1] for item in data['prices']]
-            timestamps = [datetime.fromtimestamp(item[0]/1000) for item in data['prices']]
-            
-            df = pd.DataFrame({
-                'timestamp': timestamps,
-                'price': prices
-            })
-            
-            return df
-        except Exception as e:
-            print(f"获取历史数据错误: {e}")
-            return pd.DataFrame()
+        df = get_store().history(days)
+        if df.empty:
+            print("获取历史数据错误: 本地 BTC 日线存储为空且无法更新")
+        return df
     
     def get_current_price(self) -> float:
         """
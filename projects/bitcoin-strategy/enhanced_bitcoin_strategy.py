@@ -1,62 +1,37 @@
 import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import time
+from datetime import datetime
 import json
-import os
+import sys
+from pathlib import Path
 from typing import Dict, List, Tuple
 
+# 共享指标内核 (investment/indicator_kernels.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'investment'))
+import indicator_kernels
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from btc_price_store import get_store
+
 class EnhancedBitcoinTradingStrategy:
     """
     增强版比特币交易策略，包含恐惧贪婪指数和ahr999指数
     """
     
     def __init__(self):
-        self.price_api_url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
         self.fear_greed_api = "https://api.alternative.me/fng/"
         self.signals = []
         
     def get_bitcoin_data(self, days: int = 365) -> pd.DataFrame:
         """
-        获取比特币价格数据
+        获取比特币日收盘价，从本地 BTC 日线存储读取 (过期时增量更新)
         """
-        url = f"{self.price_api_url}?vs_currency=usd&days={days}&interval=daily"
-        
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            # 转换为DataFrame
-            prices = [item[1] for item in data['prices']]
-            timestamps = [datetime.fromtimestamp(item[0]/1000) for item in data['prices']]
-            
-            df = pd.DataFrame({
-                'timestamp': timestamps,
-                'price': prices
-            })
-            
-            return df
-        except Exception as e:
-            print(f"获取比特币数据错误: {e}")
-            # 如果API调用失败，返回一个模拟的数据框用于演示
-            if days == 1:
-                # 对于只需要一天数据的情况，尝试获取当前价格
-                try:
-                    current_price_response = requests.get("https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd", headers=headers)
-                    current_price_data = current_price_response.json()
-                    current_price = current_price_data['bitcoin']['usd']
-                    
-                    df = pd.DataFrame({
-                        'timestamp': [datetime.now()],
-                        'price': [current_price]
-                    })
-                    return df
-                except:
-                    pass
-            return pd.DataFrame()
+        df = get_store().history(days)
+        if df.empty:
+            print("获取比特币数据错误: 本地 BTC 日线存储为空且无法更新")
+        return df
     
     def get_fear_greed_index(self) -> Dict:
         """
@@ -78,17 +53,20 @@ class EnhancedBitcoinTradingStrategy:
             print(f"获取恐惧贪婪指数错误: {e}")
             return {}
     
-    def calculate_ahr999_index(self, price: float) -> float:
+    def calculate_ahr999_index(self, price: float, df: pd.DataFrame = None) -> float:
         """
         计算ahr999指数
         ahr999 = (BTC_price / MA200) * (BTC_price / (0.382 * MA200 + 0.618 * MA200_high))
         简化计算方式：ahr999 = BTC_price / (MA200 * threshold)
         当ahr999 < 1.2时，被认为是低估区域（抄底区域）
         当ahr999 > 1.5时，被认为是高估区域（顶部区域）
+        df 为调用方已有的日线数据，不足200天时从本地存储读取
         """
         try:
             # 获取更长期的数据来计算200日均线
-            df = self.get_bitcoin_data(400)  # 获取超过200天的数据
+            if df is None or len(df) < 200:
+                df = self.get_bitcoin_data(400)  # 获取超过200天的数据
+            df = df[['timestamp', 'price']].copy()
             
             if df.empty or len(df) < 200:
                 return None
@@ -125,12 +103,8 @@ class EnhancedBitcoinTradingStrategy:
         df['macd_signal'] = df['macd'].ewm(span=9).mean()
         df['macd_histogram'] = df['macd'] - df['macd_signal']
         
-        # RSI (相对强弱指数)
-        delta = df['price'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
+        # RSI (相对强弱指数), Wilder 平滑
+        df['rsi'] = indicator_kernels.rsi(df['price'].to_numpy(dtype=np.float64), 14)
         
         # 布林带
         df['bb_middle'] = df['price'].rolling(window=20).mean()
@@ -140,18 +114,19 @@ class EnhancedBitcoinTradingStrategy:
         
         return df
     
-    def get_market_sentiment_analysis(self) -> Dict:
+    def get_market_sentiment_analysis(self, history: pd.DataFrame = None) -> Dict:
         """
         获取市场情绪分析（恐惧贪婪指数 + ahr999指数）
+        history 为已读取的日线数据，传入时不再重复读取
         """
         fear_greed = self.get_fear_greed_index()
-        latest_data = self.get_bitcoin_data(days=1)
+        latest_data = history if history is not None else self.get_bitcoin_data(days=1)
         
         if latest_data.empty:
             return {'error': '无法获取最新价格数据'}
         
         current_price = latest_data.iloc[-1]['price']
-        ahr999 = self.calculate_ahr999_index(current_price)
+        ahr999 = self.calculate_ahr999_index(current_price, history)
         
         sentiment_analysis = {
             'fear_greed': fear_greed,
@@ -250,7 +225,9 @@ class EnhancedBitcoinTradingStrategy:
         生成综合信号（技术指标 + 恐惧贪婪指数 + ahr999指数）
         """
         # 获取技术指标信号
-        df = self.get_bitcoin_data(days=90)  # 获取3个月数据
+        # 一次读取210天: 最近3个月用于技术指标，全部用于ahr999的200日均线
+        history = self.get_bitcoin_data(days=210)
+        df = history.tail(90).reset_index(drop=True)
         if df.empty:
             return {'error': '无法获取数据'}
         
@@ -258,7 +235,7 @@ class EnhancedBitcoinTradingStrategy:
         tech_signals = self.generate_signals(df)
         
         # 获取市场情绪分析
-        sentiment = self.get_market_sentiment_analysis()
+        sentiment = self.get_market_sentiment_analysis(history)
         
         # 综合分析
         enhanced_signal = {
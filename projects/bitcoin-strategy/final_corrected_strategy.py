@@ -2,10 +2,15 @@ import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import time
 import json
+import sys
+from pathlib import Path
 from typing import Dict
 
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from btc_price_store import get_store
+
 class FinalCorrectedStrategy:
     """
     最终修正版比特币交易策略，包含正确理解的AHR999指数
@@ -14,7 +19,6 @@ class FinalCorrectedStrategy:
     def __init__(self):
         self.current_price_api = "https://api.coindesk.com/v1/bpi/currentprice/USD.json"
         self.fear_greed_api = "https://api.alternative.me/fng/"
-        self.historical_api = "https://api.coindesk.com/v1/bpi/historical/close.json"
         
     def get_current_price(self) -> float:
         """
@@ -33,33 +37,11 @@ class FinalCorrectedStrategy:
     
     def get_historical_prices(self, days: int = 500) -> pd.DataFrame:
         """
-        获取历史价格数据
+        获取历史价格数据，从本地 BTC 日线存储读取 (过期时增量更新)
         """
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-            
-            url = f"{self.historical_api}?start={start_date.strftime('%Y-%m-%d')}&end={end_date.strftime('%Y-%m-%d')}"
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            # 解析数据
-            dates = list(data['bpi'].keys())
-            prices = list(data['bpi'].values())
-            timestamps = [datetime.strptime(date, '%Y-%m-%d') for date in dates]
-            
-            df = pd.DataFrame({
-                'timestamp': timestamps,
-                'price': prices
-            })
-            
-            # 按时间排序
-            df = df.sort_values('timestamp').reset_index(drop=True)
-            return df
-        except Exception as e:
-            print(f"获取历史价格失败: {e}")
+        df = get_store().history(days)
+        if df.empty:
+            print("获取历史价格失败: 本地 BTC 日线存储为空且无法更新")
             # 创建一个模拟数据框
             dates = [datetime.now() - timedelta(days=i) for i in range(300, 0, -1)]
             prices = [30000 + 100*i + 50*np.sin(i/10) for i in range(len(dates))]  # 模拟价格曲线
@@ -67,7 +49,7 @@ class FinalCorrectedStrategy:
                 'timestamp': dates,
                 'price': prices
             })
-            return df
+        return df
     
     def get_fear_greed_index(self) -> Dict:
         """
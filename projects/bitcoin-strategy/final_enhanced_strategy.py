@@ -1,12 +1,20 @@
 import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import time
+from datetime import datetime
 import json
-import os
+import sys
+from pathlib import Path
 from typing import Dict, List, Tuple
 
+# 共享指标内核 (investment/indicator_kernels.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'investment'))
+import indicator_kernels
+
+# 添加当前目录到路径
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from btc_price_store import get_store
+
 class FinalEnhancedBitcoinTradingStrategy:
     """
     最终版增强比特币交易策略，包含恐惧贪婪指数和ahr999指数
@@ -14,66 +22,18 @@ class FinalEnhancedBitcoinTradingStrategy:
     """
     
     def __init__(self):
-        self.price_api_urls = [
-            "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart",
-            "https://api.coindesk.com/v1/bpi/historical/close.json",  # 仅收盘价
-        ]
         self.fear_greed_api = "https://api.alternative.me/fng/"
         self.current_price_api = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd"
         self.signals = []
         
     def get_bitcoin_data(self, days: int = 90) -> pd.DataFrame:
         """
-        获取比特币价格数据，使用备用API
+        获取比特币日收盘价，从本地 BTC 日线存储读取 (过期时增量更新)
         """
-        # 尝试主API
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-            url = f"https://api.coingecko.com/api/v3/coins/bitcoin/market_chart?vs_currency=usd&days={days}&interval=daily"
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            
-            # 转换为DataFrame
-            prices = [item[1] for item in data['prices']]
-            timestamps = [datetime.fromtimestamp(item[0]/1000) for item in data['prices']]
-            
-            df = pd.DataFrame({
-                'timestamp': timestamps,
-                'price': prices
-            })
-            
-            return df
-        except Exception as e:
-            print(f"主API获取比特币数据错误: {e}")
-            
-            # 尝试备用方案：获取历史数据和当前价格
-            try:
-                # 获取近期每日价格
-                end_date = datetime.now()
-                start_date = end_date - timedelta(days=days)
-                
-                bpi_url = f"https://api.coindesk.com/v1/bpi/historical/close.json?start={start_date.strftime('%Y-%m-%d')}&end={end_date.strftime('%Y-%m-%d')}"
-                response = requests.get(bpi_url, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                
-                # 转换数据格式
-                dates = list(data['bpi'].keys())
-                prices = list(data['bpi'].values())
-                timestamps = [datetime.strptime(date, '%Y-%m-%d') for date in dates]
-                
-                df = pd.DataFrame({
-                    'timestamp': timestamps,
-                    'price': prices
-                })
-                
-                return df
-            except Exception as e2:
-                print(f"备用API也失败: {e2}")
-                
-                # 返回空DataFrame
-                return pd.DataFrame()
+        df = get_store().history(days)
+        if df.empty:
+            print("⚠️  本地 BTC 日线存储为空且无法更新")
+        return df
     
     def get_current_price(self) -> float:
         """
@@ -116,15 +76,15 @@ class FinalEnhancedBitcoinTradingStrategy:
                 'timestamp': datetime.now()
             }
     
-    def calculate_ahr999_index(self, price: float) -> float:
+    def calculate_ahr999_index(self, price: float, df: pd.DataFrame = None) -> float:
         """
-        计算ahr999指数
-        由于API限制，这里使用简化计算方法
+        计算ahr999指数 (价格 / 200日均线的简化版本)
+        df 为调用方已有的日线数据，不足200天时从本地存储读取
         """
         try:
-            # 获取较长期的历史数据来计算200日均线
-            # 由于API限制，我们使用最近的移动平均值作为近似
-            df = self.get_bitcoin_data(210)  # 获取210天数据以确保有足够数据
+            if df is None or len(df) < 200:
+                df = self.get_bitcoin_data(210)  # 获取210天数据以确保有足够数据
+            df = df[['timestamp', 'price']].copy()
             
             if df.empty or len(df) < 200:
                 # 如果数据不足，返回基于当前价格的估算
@@ -182,13 +142,8 @@ class FinalEnhancedBitcoinTradingStrategy:
         df['macd_signal'] = df['macd'].ewm(span=9).mean()
         df['macd_histogram'] = df['macd'] - df['macd_signal']
         
-        # RSI (相对强弱指数)
-        delta = df['price'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        # 避免除以零
-        rs = gain / loss.replace(0, np.finfo(float).eps)
-        df['rsi'] = 100 - (100 / (1 + rs))
+        # RSI (相对强弱指数), Wilder 平滑
+        df['rsi'] = indicator_kernels.rsi(df['price'].to_numpy(dtype=np.float64), 14)
         
         # 布林带
         df['bb_middle'] = df['price'].rolling(window=20).mean()
@@ -198,13 +153,14 @@ class FinalEnhancedBitcoinTradingStrategy:
         
         return df
     
-    def get_market_sentiment_analysis(self) -> Dict:
+    def get_market_sentiment_analysis(self, history: pd.DataFrame = None) -> Dict:
         """
         获取市场情绪分析（恐惧贪婪指数 + ahr999指数）
+        history 为已读取的日线数据，传入时计算ahr999不再重复读取
         """
         fear_greed = self.get_fear_greed_index()
         current_price = self.get_current_price()
-        ahr999 = self.calculate_ahr999_index(current_price)
+        ahr999 = self.calculate_ahr999_index(current_price, history)
         
         sentiment_analysis = {
             'fear_greed': fear_greed,
@@ -314,7 +270,9 @@ class FinalEnhancedBitcoinTradingStrategy:
         生成综合信号（技术指标 + 恐惧贪婪指数 + ahr999指数）
         """
         # 获取技术指标信号
-        df = self.get_bitcoin_data(days=90)  # 获取3个月数据
+        # 一次读取210天: 最近3个月用于技术指标，全部用于ahr999的200日均线
+        history = self.get_bitcoin_data(days=210)
+        df = history.tail(90).reset_index(drop=True)
         if df.empty:
             # 如果无法获取历史数据，至少获取当前价格和技术指标的框架
             current_price = self.get_current_price()
@@ -327,7 +285,7 @@ class FinalEnhancedBitcoinTradingStrategy:
         tech_signals = self.generate_signals(df)
         
         # 获取市场情绪分析
-        sentiment = self.get_market_sentiment_analysis()
+        sentiment = self.get_market_sentiment_analysis(history)
         
         # 综合分析
         enhanced_signal = {
@@ -3,29 +3,65 @@
 Friday Portfolio 风险评估工具
 计算组合波动率、Beta、夏普比率、VaR、相关性矩阵等风险指标
 
+所有持仓的收盘价按日期对齐成一个收益率面板 (investment/returns_panel.py)，收益率只计算一次 (T, N)，
+全部指标在该矩阵上按列向量化计算，--universe 模式下数百个标的也能在亚秒级完成计算 (不含行情获取)。
+港股/美股按各自交易日对齐；上市较晚的标的只在自己的历史上计算个股指标，不会截短其他标的的窗口
+
 用法:
     python portfolio_risk.py [--days 90] [--output json|table]
+    python portfolio_risk.py --universe symbols.txt [--demo]
+    python portfolio_risk.py --universe MSFT NVDA AAPL 0700.HK
 """
 
 import json
 import sys
 import argparse
+import time
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
 from decimal import Decimal
-from longport.openapi import QuoteContext, Config
 from typing import Dict, List, Tuple, Optional
 
+# 共享行情数据源、风险指标、协方差估计、回撤分析与收益率面板
+# (investment/ 下的 market_data / risk_metrics / covariance / drawdown / returns_panel)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'investment'))
+from covariance import METHODS as COV_METHODS, estimate as estimate_covariance, to_correlation
+from drawdown import analyze_drawdowns
+from market_data import FetchOutcome, get_registry
+from returns_panel import ReturnsPanel
+import risk_metrics
+
 # 配置
 DATA_DIR = Path('/Users/daniel/.openclaw/workspace/investment/data')
 PORTFOLIO_FILE = DATA_DIR / 'portfolio.json'
 
+# 超过该数量时逐项输出 (逐标的日志、个股表格、相关性列表) 只显示前 N 项
+LIST_LIMIT = 30
+
+# 高相关阈值
+HIGH_CORRELATION = 0.8
+
+# 完整相关性矩阵只在标的数不超过该值时输出，否则只输出高相关组合
+FULL_CORRELATION_LIMIT = 50
+
+# K线请求线程数，与 LongPort 并发上限一致 (官方约 10 次/秒、5 个并发，令牌桶限速见 market_data.py)
+FETCH_WORKERS = 5
+
 def load_portfolio() -> Dict:
     """加载组合数据"""
     with open(PORTFOLIO_FILE, 'r') as f:
         return json.load(f)
 
+def to_api_symbol(symbol: str) -> str:
+    """组合代码转换为 API 格式 (港股及已带市场后缀的保持不变，其余视为美股)"""
+    return symbol if '.' in symbol else f"{symbol}.US"
+
+def display_symbol(api_symbol: str) -> str:
+    """API 代码去掉市场后缀"""
+    return api_symbol.replace('.US', '').replace('.HK', '')
+
 def get_stock_positions(portfolio: Dict) -> List[Dict]:
     """提取股票持仓（用于计算Beta等）"""
     positions = []
@@ -36,24 +72,80 @@ def get_stock_positions(portfolio: Dict) -> List[Dict]:
             symbol = pos['symbol']
             market_value = pos.get('market_value', pos.get('value', 0))
             if market_value > 0:
-                # 转换 API 格式
                 if symbol == 'BTC':
                     continue  # 加密货币单独处理
-                elif symbol.endswith('.HK'):
-                    api_symbol = symbol
-                else:
-                    api_symbol = f"{symbol}.US"
                 
                 positions.append({
                     'symbol': symbol,
-                    'api_symbol': api_symbol,
+                    'api_symbol': to_api_symbol(symbol),
                     'market_value': market_value,
                     'category': category
                 })
     return positions
 
-def fetch_historical_prices(symbols: List[str], days: int = 90, demo: bool = False) -> Dict[str, List[float]]:
-    """从 LongPort API 获取历史价格"""
+def load_universe(spec: List[str]) -> List[Dict]:
+    """
+    加载 --universe 标的池
+
+    Args:
+        spec: 单个文件路径，或直接列出的标的代码。文件可以是 JSON (代码列表、代码 -> 权重，
+              或 {symbol, weight, category} 列表)，也可以是每行 "代码[,权重[,类别]]" 的文本/CSV
+
+    Returns:
+        与 get_stock_positions 相同结构的持仓列表，未给出权重时等权 (market_value 为相对权重)
+    """
+    rows = []
+    path = Path(spec[0]) if len(spec) == 1 else None
+    if path is not None and path.is_file():
+        if path.suffix == '.json':
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                rows = [{'symbol': k, 'weight': v} for k, v in data.items()]
+            else:
+                rows = [item if isinstance(item, dict) else {'symbol': item} for item in data]
+        else:
+            for line in path.read_text().splitlines():
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                parts = [x.strip() for x in line.replace(',', ' ').split()]
+                if parts[0].lower() == 'symbol':
+                    continue  # CSV 表头
+                row = {'symbol': parts[0]}
+                if len(parts) > 1:
+                    row['weight'] = float(parts[1])
+                if len(parts) > 2:
+                    row['category'] = parts[2]
+                rows.append(row)
+    else:
+        rows = [{'symbol': s} for s in spec]
+    
+    positions = []
+    seen = set()
+    for row in rows:
+        symbol = str(row['symbol']).strip().upper()
+        if not symbol or symbol == 'BTC' or symbol in seen:
+            continue
+        seen.add(symbol)
+        positions.append({
+            'symbol': display_symbol(symbol) if symbol.endswith('.US') else symbol,
+            'api_symbol': to_api_symbol(symbol),
+            'market_value': float(row.get('weight', 1.0)),
+            'category': row.get('category', 'universe')
+        })
+    return positions
+
+def fetch_historical_prices(symbols: List[str], days: int = 90, demo: bool = False,
+                            report: Optional[List[FetchOutcome]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    并发批量获取历史日K线 DataFrame(date, close) (共享数据源注册表: LongPort -> Yahoo Finance)
+
+    每个请求有超时，失败或超时的标的抖动退避后重试，总耗时约等于最慢的单个请求 (受限速约束)
+
+    Args:
+        report: 传入列表时追加每个数据源对每个标的的 FetchOutcome (数据源、结果、尝试次数、耗时)
+    """
     if not symbols:
         return {}
     
@@ -61,41 +153,60 @@ def fetch_historical_prices(symbols: List[str], days: int = 90, demo: bool = Fal
         print("  📊 演示模式: 生成模拟数据")
         return generate_demo_prices(symbols, days)
     
-    try:
-        config = Config.from_env()
-        ctx = QuoteContext(config)
-    except Exception as e:
-        print(f"⚠️  LongPort API 配置失败: {e}")
+    outcomes = report if report is not None else []
+    start = time.perf_counter()
+    frames = get_registry().candles_many('1d', {symbol: (days, None) for symbol in symbols},
+                                         max_workers=FETCH_WORKERS, report=outcomes)
+    elapsed = time.perf_counter() - start
+    if not frames:
+        print("⚠️  行情数据源不可用")
         print("📊 切换到演示模式...")
         return generate_demo_prices(symbols, days)
     
+    # 每个标的最后一次尝试的数据源即最终结果
+    final = {o.symbol: o for o in outcomes}
     price_history = {}
+    verbose = len(symbols) <= LIST_LIMIT
     
     for symbol in symbols:
-        try:
-            # 获取日K线
-            candles = ctx.candles(
-                symbol,
-                period="day",
-                count=days,
-                adjust_type="forward"
-            )
-            
-            if candles:
-                # 提取收盘价
-                prices = [float(c.close) for c in candles]
-                price_history[symbol] = prices
-                print(f"  ✅ {symbol}: {len(prices)} 天数据")
-            else:
-                print(f"  ⚠️  {symbol}: 无数据")
-                
-        except Exception as e:
-            print(f"  ❌ {symbol}: {str(e)[:50]}")
-    
+        df = frames.get(symbol)
+        outcome = final.get(symbol)
+        if df is not None and not df.empty:
+            # 保留日期，按日期对齐
+            price_history[symbol] = df[['date', 'close']]
+            if verbose:
+                source = f" ({outcome.provider} {outcome.latency:.2f}s)" if outcome else ""
+                print(f"  ✅ {symbol}: {len(df)} 天数据{source}")
+        elif outcome is not None and outcome.error:
+            print(f"  ⚠️  {symbol}: 无数据 ({outcome.provider} {outcome.status}，"
+                  f"尝试 {outcome.attempts} 次: {outcome.error.splitlines()[0]})")
+        else:
+            print(f"  ⚠️  {symbol}: 无数据")
+    
+    if not verbose:
+        print(f"  ✅ {len(price_history)}/{len(symbols)} 个标的获取到数据")
+    if final:
+        slowest = max(final.values(), key=lambda o: o.latency)
+        retries = sum(max(o.attempts - 1, 0) for o in outcomes)
+        print(f"  ⏱️  行情获取 {elapsed:.2f}s (最慢 {slowest.symbol} {slowest.latency:.2f}s，"
+              f"重试 {retries} 次，失败 {len(symbols) - len(price_history)} 个)")
     return price_history
 
-def generate_demo_prices(symbols: List[str], days: int) -> Dict[str, List[float]]:
-    """生成模拟价格数据用于演示"""
+def summarize_fetch(outcomes: List[FetchOutcome]) -> Dict[str, Dict]:
+    """每个标的的最终获取结果 (用于 JSON 报告)"""
+    return {
+        o.symbol: {
+            'provider': o.provider,
+            'status': o.status,
+            'attempts': o.attempts,
+            'latency_ms': round(o.latency * 1000, 1),
+            **({'error': o.error} if o.error else {})
+        }
+        for o in outcomes
+    }
+
+def generate_demo_prices(symbols: List[str], days: int) -> Dict[str, pd.DataFrame]:
+    """生成模拟价格数据用于演示 (截至今天的 days+1 个工作日)"""
     np.random.seed(42)  # 固定种子以获得可重复结果
     
     demo_base_prices = {
@@ -104,20 +215,20 @@ def generate_demo_prices(symbols: List[str], days: int) -> Dict[str, List[float]
         'META.US': 600, 'SPY.US': 590
     }
     
-    price_history = {}
+    # 按标的顺序一次生成全部随机游走 (与逐个标的抽样的随机数序列相同)
+    base_prices = np.array([demo_base_prices.get(s, 100) for s in symbols], dtype=float)
+    returns = np.random.normal(0.0005, 0.016, (len(symbols), days))  # 均值0.05%, 日波动1.6%
+    paths = np.column_stack((base_prices, 1 + returns)).cumprod(axis=1)
     
-    for symbol in symbols:
-        base_price = demo_base_prices.get(symbol, 100)
-        
-        # 生成随机游走价格序列
-        returns = np.random.normal(0.0005, 0.016, days)  # 均值0.05%, 日波动1.6%
-        prices = [base_price]
-        
-        for ret in returns:
-            prices.append(prices[-1] * (1 + ret))
-        
-        price_history[symbol] = prices
-        print(f"  📊 {symbol}: {len(prices)} 天模拟数据 (基准价 ${base_price})")
+    dates = pd.bdate_range(end=datetime.now().date(), periods=days + 1)
+    price_history = {symbol: pd.DataFrame({'date': dates, 'close': paths[i]})
+                     for i, symbol in enumerate(symbols)}
+    
+    if len(symbols) <= LIST_LIMIT:
+        for symbol, base_price in zip(symbols, base_prices):
+            print(f"  📊 {symbol}: {days + 1} 天模拟数据 (基准价 ${base_price:g})")
+    else:
+        print(f"  📊 {len(symbols)} 个标的: {days + 1} 天模拟数据")
     
     return price_history
 
@@ -125,139 +236,142 @@ def calculate_returns(prices: List[float]) -> List[float]:
     """计算日收益率序列"""
     if len(prices) < 2:
         return []
-    returns = []
-    for i in range(1, len(prices)):
-        if prices[i-1] != 0:
-            daily_return = (prices[i] - prices[i-1]) / prices[i-1]
-            returns.append(daily_return)
-    return returns
+    return risk_metrics.simple_returns(prices).tolist()
 
 def calculate_volatility(returns: List[float]) -> float:
     """计算年化波动率"""
     if len(returns) < 2:
         return 0.0
-    std = np.std(returns, ddof=1)
-    annualized = std * np.sqrt(252)  # 252个交易日
-    return annualized
+    return float(risk_metrics.volatility(returns, risk_metrics.TRADING_DAYS))
 
 def calculate_beta(stock_returns: List[float], market_returns: List[float]) -> float:
     """计算Beta值"""
     if len(stock_returns) != len(market_returns) or len(stock_returns) < 2:
         return 0.0
-    
-    # 使用协方差/方差计算Beta
-    covariance = np.cov(stock_returns, market_returns)[0][1]
-    market_variance = np.var(market_returns, ddof=1)
-    
-    if market_variance == 0:
-        return 0.0
-    
-    beta = covariance / market_variance
-    return beta
+    return float(risk_metrics.beta(stock_returns, market_returns))
 
 def calculate_sharpe_ratio(returns: List[float], risk_free_rate: float = 0.04) -> float:
     """计算年化夏普比率"""
     if len(returns) < 2:
         return 0.0
-    
-    excess_returns = [r - risk_free_rate/252 for r in returns]
-    avg_excess = np.mean(excess_returns)
-    std_excess = np.std(excess_returns, ddof=1)
-    
-    if std_excess == 0:
-        return 0.0
-    
-    sharpe = (avg_excess / std_excess) * np.sqrt(252)
-    return sharpe
+    return float(risk_metrics.sharpe_ratio(returns, risk_free_rate))
 
 def calculate_var(returns: List[float], confidence: float = 0.95) -> float:
     """计算历史VaR (Value at Risk)"""
     if not returns:
         return 0.0
-    return np.percentile(returns, (1 - confidence) * 100)
+    return float(risk_metrics.historical_var(returns, confidence))
 
 def calculate_max_drawdown(prices: List[float]) -> Tuple[float, int, int]:
-    """计算最大回撤及发生时间"""
+    """计算最大回撤及发生时间 (回撤幅度为正值，返回前高与谷底位置)"""
     if not prices:
         return 0.0, 0, 0
     
-    peak = prices[0]
-    peak_idx = 0
-    max_dd = 0.0
-    dd_start = 0
-    dd_end = 0
-    
-    for i, price in enumerate(prices):
-        if price > peak:
-            peak = price
-            peak_idx = i
-        
-        dd = (peak - price) / peak
-        if dd > max_dd:
-            max_dd = dd
-            dd_start = peak_idx
-            dd_end = i
-    
-    return max_dd, dd_start, dd_end
-
-def calculate_correlation_matrix(price_histories: Dict[str, List[float]]) -> Dict:
-    """计算相关性矩阵"""
-    symbols = list(price_histories.keys())
-    if len(symbols) < 2:
-        return {}
-    
-    # 计算收益率
-    returns_data = {}
-    for symbol, prices in price_histories.items():
-        returns = calculate_returns(prices)
-        if returns:
-            returns_data[symbol] = returns
-    
-    if len(returns_data) < 2:
+    episode = analyze_drawdowns(prices).max_episode
+    if episode is None:
+        return 0.0, 0, 0
+    return -episode.depth, episode.peak_index, episode.trough_index
+
+def build_returns_panel(price_histories: Dict[str, pd.DataFrame],
+                        symbols: List[str]) -> ReturnsPanel:
+    """
+    把各标的K线按日期对齐成收益率面板 (只包含有数据的标的，收益率只计算一次)
+
+    港股/美股休市日沿用上一收盘价；上市前的日期保留为 NaN (drop='all')，
+    不会把所有标的截短到最短的历史
+    """
+    frames = {s: price_histories[s] for s in symbols
+              if price_histories.get(s) is not None and len(price_histories[s]) >= 2}
+    return ReturnsPanel.from_frames(frames, fill='ffill', drop='all')
+
+def column_metrics(prices: np.ndarray, market: Optional[np.ndarray],
+                   risk_free_rate: float = 0.04) -> Dict[str, np.ndarray]:
+    """
+    每列在自身有数据的日期上计算个股指标
+
+    有数据的日期相同的列 (通常是全部列) 归为一组，一次按列向量化计算；
+    上市较晚的标的单独成组，只用自己的历史
+
+    Args:
+        prices: 对齐后的价格矩阵 (T, N)，缺失为 NaN
+        market: 市场基准价格 (T,)，None 时 Beta 为 0
+    """
+    n = prices.shape[1]
+    metrics = {name: np.zeros(n) for name in ('volatility', 'sharpe_ratio', 'var_95', 'max_drawdown', 'beta')}
+    valid = ~np.isnan(prices)
+    patterns, group = np.unique(valid.T, axis=0, return_inverse=True)
+    for g, rows in enumerate(patterns):
+        cols = np.flatnonzero(group.ravel() == g)
+        p = prices[rows][:, cols]
+        if len(p) < 3:
+            continue
+        r = risk_metrics.simple_returns(p)
+        metrics['volatility'][cols] = risk_metrics.volatility(r, risk_metrics.TRADING_DAYS)
+        metrics['sharpe_ratio'][cols] = risk_metrics.sharpe_ratio(r, risk_free_rate)
+        metrics['var_95'][cols] = risk_metrics.historical_var(r)
+        metrics['max_drawdown'][cols] = -risk_metrics.drawdown_stats(p)[0]
+        if market is not None:
+            both = rows & ~np.isnan(market)
+            if both.sum() >= 3:
+                metrics['beta'][cols] = risk_metrics.beta(
+                    risk_metrics.simple_returns(prices[both][:, cols]),
+                    risk_metrics.simple_returns(market[both]))
+    return metrics
+
+def panel_correlation(panel: ReturnsPanel, method: str = 'sample') -> np.ndarray:
+    """
+    面板相关性矩阵
+
+    完整面板用 method 指定的协方差估计；有缺失值 (上市较晚的标的) 且为 sample 时按成对完整样本计算
+    """
+    if panel.complete or method != 'sample':
+        return to_correlation(estimate_covariance(panel.returns, method))
+    return panel.correlation()
+
+def calculate_correlation_matrix(price_histories: Dict[str, pd.DataFrame],
+                                 method: str = 'sample') -> Dict:
+    """计算相关性矩阵 (一次矩阵运算，method 见 investment/covariance.py)"""
+    panel = build_returns_panel(price_histories, list(price_histories))
+    if len(panel.symbols) < 2:
         return {}
     
-    # 找到最小长度，使所有序列对齐
-    min_len = min(len(r) for r in returns_data.values())
-    
-    # 构建相关性矩阵
-    corr_matrix = {}
-    for s1 in returns_data:
-        corr_matrix[s1] = {}
-        for s2 in returns_data:
-            if s1 == s2:
-                corr_matrix[s1][s2] = 1.0
-            else:
-                r1 = returns_data[s1][-min_len:]
-                r2 = returns_data[s2][-min_len:]
-                corr = np.corrcoef(r1, r2)[0][1]
-                corr_matrix[s1][s2] = corr
-    
-    return corr_matrix
+    corr = panel_correlation(panel, method)
+    return {s1: {s2: float(corr[i, j]) for j, s2 in enumerate(panel.symbols)}
+            for i, s1 in enumerate(panel.symbols)}
+
+def high_correlation_pairs(symbols: List[str], corr: np.ndarray,
+                           threshold: float = HIGH_CORRELATION) -> List[Dict]:
+    """相关系数超过阈值的标的组合 (按相关性从高到低)"""
+    i, j = np.triu_indices(len(symbols), k=1)
+    values = corr[i, j]
+    mask = values > threshold
+    order = np.argsort(-values[mask], kind='stable')
+    i, j, values = i[mask][order], j[mask][order], values[mask][order]
+    return [{'pair': [symbols[a], symbols[b]], 'correlation': float(c)}
+            for a, b, c in zip(i, j, values)]
 
 def calculate_concentration_risk(positions: List[Dict]) -> Dict:
     """计算集中度风险"""
-    total_value = sum(p['market_value'] for p in positions)
+    values = np.array([p['market_value'] for p in positions], dtype=float)
+    total_value = values.sum()
     
     if total_value == 0:
         return {}
     
     # 计算Herfindahl-Hirschman Index (HHI)
-    weights = [p['market_value'] / total_value for p in positions]
-    hhi = sum(w ** 2 for w in weights)
-    
-    # 按类别集中度
-    category_values = {}
-    for pos in positions:
-        cat = pos['category']
-        category_values[cat] = category_values.get(cat, 0) + pos['market_value']
+    weights = values / total_value
+    hhi = float(weights @ weights)
     
-    category_weights = {cat: val/total_value for cat, val in category_values.items()}
+    # 按类别集中度 (保持类别首次出现的顺序)
+    index = {cat: i for i, cat in enumerate(dict.fromkeys(p['category'] for p in positions))}
+    codes = np.array([index[p['category']] for p in positions])
+    category_weights = np.bincount(codes, weights=weights, minlength=len(index))
     
     return {
         'hhi': hhi,
         'hhi_diversified': hhi < 0.25,  # <0.25表示充分分散
-        'max_single_weight': max(weights) if weights else 0,
-        'category_weights': category_weights
+        'max_single_weight': float(weights.max()),
+        'category_weights': dict(zip(index, category_weights.tolist()))
     }
 
 def get_sp500_proxy() -> str:
@@ -314,6 +428,84 @@ def assess_risk_level(metrics: Dict) -> str:
     else:
         return "高风险 🔴"
 
+def compute_risk_metrics(positions: List[Dict], price_histories: Dict[str, List[float]],
+                         market_proxy: str, cov_method: str = 'sample',
+                         risk_free_rate: float = 0.04,
+                         full_correlation: bool = True) -> Dict:
+    """
+    在一个对齐的收益率矩阵上计算全部组合与个股指标
+
+    Args:
+        positions: 持仓列表 (get_stock_positions / load_universe)
+        price_histories: API 代码 -> DataFrame(date, close)
+        market_proxy: 市场基准的 API 代码 (用于 Beta)
+        cov_method: 相关性矩阵的协方差估计方法
+        risk_free_rate: 年化无风险利率
+        full_correlation: True 输出完整相关性矩阵，False 只输出高相关组合
+
+    Returns:
+        指标字典 (不含 date / lookback_days / risk_level)
+    """
+    total_value = sum(p['market_value'] for p in positions)
+    columns = list(dict.fromkeys([p['api_symbol'] for p in positions] + [market_proxy]))
+    panel = build_returns_panel(price_histories, columns)
+    
+    column = {s: i for i, s in enumerate(panel.symbols)}
+    held = [p for p in positions if p['api_symbol'] in column]
+    if not held or len(panel.returns) < 2:
+        return {}
+    
+    stocks = panel.select([p['api_symbol'] for p in held])
+    weights = np.array([p['market_value'] for p in held], dtype=float) / total_value
+    
+    # 个股指标 (按列一次计算，每个标的使用自身有数据的日期)
+    market = panel.prices[:, column[market_proxy]] if market_proxy in column else None
+    per_stock = column_metrics(stocks.prices, market, risk_free_rate)
+    betas = per_stock['beta']
+    
+    stock_metrics = [
+        {
+            'symbol': p['symbol'],
+            'weight': float(weights[k]),
+            'volatility': float(per_stock['volatility'][k]),
+            'beta': float(betas[k]),
+            'sharpe_ratio': float(per_stock['sharpe_ratio'][k]),
+            'var_95': float(per_stock['var_95'][k]),
+            'max_drawdown': float(per_stock['max_drawdown'][k])
+        }
+        for k, p in enumerate(held)
+    ]
+    
+    # 组合收益率与净值 (按权重加权，无数据的持仓/上市前的日期视为现金)
+    portfolio_returns = stocks.portfolio_returns(weights)
+    portfolio_nav = np.concatenate(([1.0], np.cumprod(1 + portfolio_returns)))
+    
+    # 相关性 (不含市场基准)
+    symbols = [display_symbol(p['api_symbol']) for p in held]
+    correlation = {}
+    if len(held) >= 2:
+        corr = panel_correlation(stocks, cov_method)
+        if full_correlation:
+            correlation['correlation_matrix'] = {
+                s1: {s2: float(corr[i, j]) for j, s2 in enumerate(symbols)}
+                for i, s1 in enumerate(symbols)
+            }
+        else:
+            off_diagonal = corr[~np.eye(len(symbols), dtype=bool)]
+            correlation['average_correlation'] = float(np.nanmean(off_diagonal))
+            correlation['high_correlation_pairs'] = high_correlation_pairs(symbols, corr)
+    
+    return {
+        'portfolio_volatility': float(risk_metrics.volatility(portfolio_returns, risk_metrics.TRADING_DAYS)),
+        'portfolio_beta': float(np.average(betas, weights=weights)),
+        'sharpe_ratio': float(risk_metrics.sharpe_ratio(portfolio_returns, risk_free_rate)),
+        'max_drawdown': float(-risk_metrics.drawdown_stats(portfolio_nav)[0]),
+        'var_95': float(risk_metrics.historical_var(portfolio_returns)),
+        'concentration': calculate_concentration_risk(positions),
+        **correlation,
+        'stock_metrics': stock_metrics
+    }
+
 def format_output(metrics: Dict, output_format: str = 'table') -> str:
     """格式化输出"""
     if output_format == 'json':
@@ -357,9 +549,25 @@ def format_output(metrics: Dict, output_format: str = 'table') -> str:
                 icon = "⚠️" if c > 0.8 else "  "
                 lines.append(f"   {icon} {s1} - {s2}: {c:.2f}")
     
+    pairs = metrics.get('high_correlation_pairs')
+    if pairs is not None:
+        lines.append(f"\n🔗 持仓相关性 (平均 {metrics.get('average_correlation', 0):.2f}，"
+                     f"> {HIGH_CORRELATION} 的组合 {len(pairs)} 个):")
+        for item in pairs[:LIST_LIMIT]:
+            s1, s2 = item['pair']
+            lines.append(f"   ⚠️ {s1} - {s2}: {item['correlation']:.2f}")
+        if len(pairs) > LIST_LIMIT:
+            lines.append(f"   ... 其余 {len(pairs) - LIST_LIMIT} 个见 JSON 输出")
+    
     # 个股指标
-    lines.append(f"\n📋 个股风险指标:")
-    for stock in metrics.get('stock_metrics', []):
+    stocks = metrics.get('stock_metrics', [])
+    if len(stocks) > LIST_LIMIT:
+        # 标的过多时只列出权重最大的部分
+        lines.append(f"\n📋 个股风险指标 (权重前 {LIST_LIMIT} / 共 {len(stocks)}):")
+        stocks = sorted(stocks, key=lambda x: -x['weight'])[:LIST_LIMIT]
+    else:
+        lines.append(f"\n📋 个股风险指标:")
+    for stock in stocks:
         lines.append(f"   {stock['symbol']:10} 波动率:{stock['volatility']*100:>6.1f}% "
                     f"Beta:{stock['beta']:>5.2f} 夏普:{stock['sharpe_ratio']:>5.2f}")
     
@@ -379,23 +587,41 @@ def main():
     parser.add_argument('--output', type=str, default='table', choices=['json', 'table'],
                         help='输出格式')
     parser.add_argument('--demo', action='store_true', help='演示模式(使用模拟数据)')
+    parser.add_argument('--cov-method', choices=COV_METHODS, default='sample',
+                        help='相关性矩阵的协方差估计方法 (默认 sample)')
+    parser.add_argument('--universe', nargs='+', metavar='FILE|SYMBOL',
+                        help='评估标的池而非组合: 标的文件 (txt/csv/json) 或直接列出代码，未给权重时等权')
+    parser.add_argument('--timeout', type=float,
+                        help='单次行情请求超时秒数 (默认 LongPort 15s / Yahoo 60s)')
     args = parser.parse_args()
     
+    if args.timeout:
+        for provider in get_registry().providers:
+            provider.request_timeout = args.timeout
+    
     print("=" * 70)
     print("Friday Portfolio 风险评估工具")
     print("=" * 70)
     
-    # 加载组合
-    print(f"\n📂 加载组合数据...")
-    portfolio = load_portfolio()
-    positions = get_stock_positions(portfolio)
-    
-    if not positions:
-        print("❌ 没有可分析的股票持仓")
-        return 1
-    
-    total_value = sum(p['market_value'] for p in positions)
-    print(f"✅ 找到 {len(positions)} 只股票，总市值 ¥{total_value:,.0f}")
+    if args.universe:
+        print(f"\n📂 加载标的池...")
+        positions = load_universe(args.universe)
+        if not positions:
+            print("❌ 标的池为空")
+            return 1
+        print(f"✅ 标的池 {len(positions)} 个标的")
+    else:
+        # 加载组合
+        print(f"\n📂 加载组合数据...")
+        portfolio = load_portfolio()
+        positions = get_stock_positions(portfolio)
+        
+        if not positions:
+            print("❌ 没有可分析的股票持仓")
+            return 1
+        
+        total_value = sum(p['market_value'] for p in positions)
+        print(f"✅ 找到 {len(positions)} 只股票，总市值 ¥{total_value:,.0f}")
     
     # 获取历史价格
     symbols = [p['api_symbol'] for p in positions]
@@ -406,118 +632,36 @@ def main():
     print(f"\n📡 获取历史价格 ({args.days}天)...")
     if args.demo:
         print("📊 演示模式已启用")
-    price_histories = fetch_historical_prices(symbols, args.days, demo=args.demo)
+    fetch_report: List[FetchOutcome] = []
+    price_histories = fetch_historical_prices(symbols, args.days, demo=args.demo, report=fetch_report)
     
     if not price_histories:
         print("❌ 未能获取任何历史价格数据")
         return 1
     
-    # 计算市场基准收益率
-    market_returns = []
-    if market_proxy in price_histories:
-        market_returns = calculate_returns(price_histories[market_proxy])
-    
-    # 计算各股票指标
+    # 计算风险指标
     print(f"\n🧮 计算风险指标...")
-    stock_metrics = []
-    portfolio_returns = None
-    
-    for pos in positions:
-        symbol = pos['api_symbol']
-        portfolio_symbol = pos['symbol']
-        weight = pos['market_value'] / total_value
-        
-        if symbol not in price_histories:
-            continue
-        
-        prices = price_histories[symbol]
-        returns = calculate_returns(prices)
-        
-        if not returns:
-            continue
-        
-        # 个股指标
-        vol = calculate_volatility(returns)
-        beta = calculate_beta(returns, market_returns) if market_returns else 0
-        sharpe = calculate_sharpe_ratio(returns)
-        var = calculate_var(returns)
-        mdd, _, _ = calculate_max_drawdown(prices)
-        
-        stock_metrics.append({
-            'symbol': portfolio_symbol,
-            'weight': weight,
-            'volatility': vol,
-            'beta': beta,
-            'sharpe_ratio': sharpe,
-            'var_95': var,
-            'max_drawdown': mdd
-        })
-        
-        # 组合收益率加权
-        if portfolio_returns is None:
-            portfolio_returns = [r * weight for r in returns]
-        else:
-            # 对齐长度
-            min_len = min(len(portfolio_returns), len(returns))
-            portfolio_returns = [portfolio_returns[i] + returns[i] * weight 
-                                for i in range(min_len)]
-    
-    # 计算组合指标
-    portfolio_vol = calculate_volatility(portfolio_returns) if portfolio_returns else 0
-    portfolio_beta = np.average([s['beta'] for s in stock_metrics], 
-                                weights=[s['weight'] for s in stock_metrics]) if stock_metrics else 0
-    portfolio_sharpe = calculate_sharpe_ratio(portfolio_returns) if portfolio_returns else 0
-    portfolio_var = calculate_var(portfolio_returns) if portfolio_returns else 0
-    
-    # 最大回撤（用组合价值模拟）
-    # 简化为使用持仓加权平均价格序列
-    portfolio_prices = None
-    for pos in positions:
-        symbol = pos['api_symbol']
-        weight = pos['market_value'] / total_value
-        if symbol in price_histories:
-            prices = price_histories[symbol]
-            if portfolio_prices is None:
-                portfolio_prices = [p * weight for p in prices]
-            else:
-                min_len = min(len(portfolio_prices), len(prices))
-                portfolio_prices = [portfolio_prices[i] + prices[i] * weight 
-                                   for i in range(min_len)]
-    
-    portfolio_mdd, _, _ = calculate_max_drawdown(portfolio_prices) if portfolio_prices else (0, 0, 0)
-    
-    # 相关性矩阵
-    price_histories_no_market = {k: v for k, v in price_histories.items() if k != market_proxy}
-    corr_matrix = calculate_correlation_matrix(price_histories_no_market)
-    
-    # 转换symbol格式
-    corr_matrix_clean = {}
-    for s1 in corr_matrix:
-        clean_s1 = s1.replace('.US', '').replace('.HK', '')
-        corr_matrix_clean[clean_s1] = {}
-        for s2 in corr_matrix[s1]:
-            clean_s2 = s2.replace('.US', '').replace('.HK', '')
-            corr_matrix_clean[clean_s1][clean_s2] = corr_matrix[s1][s2]
-    
-    # 集中度
-    concentration = calculate_concentration_risk(positions)
+    start = time.perf_counter()
+    full_correlation = len(positions) <= FULL_CORRELATION_LIMIT
+    computed = compute_risk_metrics(positions, price_histories, market_proxy,
+                                    args.cov_method, full_correlation=full_correlation)
+    if not computed:
+        print("❌ 有效价格数据不足")
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"   {len(computed['stock_metrics'])} 个标的，耗时 {elapsed*1000:.1f}ms")
     
     # 汇总
     metrics = {
         'date': datetime.now().isoformat()[:10],
         'lookback_days': args.days,
-        'portfolio_volatility': portfolio_vol,
-        'portfolio_beta': portfolio_beta,
-        'sharpe_ratio': portfolio_sharpe,
-        'max_drawdown': portfolio_mdd,
-        'var_95': portfolio_var,
-        'concentration': concentration,
-        'correlation_matrix': corr_matrix_clean,
-        'stock_metrics': stock_metrics
+        **computed
     }
     
     # 风险等级
     metrics['risk_level'] = assess_risk_level(metrics)
+    if fetch_report:
+        metrics['data_fetch'] = summarize_fetch(fetch_report)
     
     # 输出
     print(f"\n✅ 分析完成!")
@@ -526,7 +670,8 @@ def main():
     
     # 保存JSON
     if args.output == 'json':
-        output_file = DATA_DIR / f'risk_report_{metrics["date"]}.json'
+        name = 'risk_report_universe' if args.universe else 'risk_report'
+        output_file = DATA_DIR / f'{name}_{metrics["date"]}.json'
         with open(output_file, 'w') as f:
             json.dump(metrics, f, indent=2, ensure_ascii=False)
         print(f"\n💾 报告已保存: {output_file}")